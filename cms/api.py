@@ -0,0 +1,226 @@
+"""
+API Wagtail v2 (pages, images, documents) avec cache et projection.
+
+Les réponses JSON des listes et des détails sont mises en cache par
+mairie, hôte et URL (paramètres triés), avec un ETag : un client qui
+renvoie If-None-Match reçoit un 304 sans que la base soit interrogée.
+Publier, dépublier, déplacer ou supprimer une page, ou modifier une image
+ou un document, change la version de l'API de la mairie et périme toutes
+ses réponses. Les requêtes authentifiées, ou d'un visiteur ayant passé une
+restriction d'accès, ne passent pas par le cache.
+
+Les listes ne lisent que les colonnes des champs demandés (`fields=`) via
+only(), chargent les images liées avec select_related et leurs rendus en
+une requête (limitée aux filtres sérialisés), et les tags en une requête.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch, QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
+
+from wagtail.api import APIField
+from wagtail.api.v2.serializers import TagsField
+from wagtail.api.v2.views import BaseAPIViewSet, PagesAPIViewSet as BasePagesAPIViewSet
+from wagtail.documents.api.v2.views import DocumentsAPIViewSet as BaseDocumentsAPIViewSet
+from wagtail.images import get_image_model
+from wagtail.images.api.v2.views import ImagesAPIViewSet as BaseImagesAPIViewSet
+from wagtail.models import PageViewRestriction
+
+from core.cache import cache_pages as cache
+from core.tenants import schema_courant
+
+DUREE = getattr(settings, 'API_CACHE_DUREE', 600)
+
+
+def _cle_version():
+    return f'api:{schema_courant()}:version'
+
+
+def invalider():
+    """Périme toutes les réponses de l'API de la mairie courante."""
+    cle = _cle_version()
+    try:
+        cache.incr(cle)
+    except ValueError:
+        cache.set(cle, 1, None)
+
+
+class ApiEnCacheMixin:
+    """
+    Cache des réponses JSON, ETag et projection des listes.
+
+    `colonnes_requises` : colonnes toujours lues ; `colonnes_calculees` :
+    colonnes lues par les champs sans colonne propre (ex: download_url).
+    """
+
+    colonnes_requises = ['id']
+    colonnes_calculees = {'type': [], 'detail_url': []}
+
+    # --- Cache et ETag ---
+
+    def cle_cache(self, request):
+        """Clé de la réponse, ou None si elle ne doit pas être mise en cache."""
+        if request.accepted_renderer.format != 'json':
+            return None
+        if request.user.is_authenticated:
+            return None
+        session = getattr(request, 'session', None)
+        if session is not None and session.get(PageViewRestriction.passed_view_restrictions_session_key):
+            return None
+        parametres = sorted((nom, valeurs) for nom, valeurs in request.GET.lists())
+        empreinte = hashlib.md5(repr((request.path, parametres)).encode()).hexdigest()
+        version = cache.get(_cle_version(), 0)
+        return f'api:{schema_courant()}:{version}:{request.get_host()}:{empreinte}'
+
+    def reponse_en_cache(self, vue, request, *args):
+        cle = self.cle_cache(request)
+        if cle is None:
+            return vue(request, *args)
+
+        entree = cache.get(cle)
+        if entree is None:
+            response = vue(request, *args)
+            if response.status_code != 200:
+                return response
+            # Rendu ici (et non par finalize_response) pour mettre les octets en cache
+            response.accepted_renderer = request.accepted_renderer
+            response.accepted_media_type = request.accepted_media_type
+            response.renderer_context = self.get_renderer_context()
+            response.render()
+            entree = {
+                'contenu': response.content,
+                'type': response['Content-Type'],
+                'etag': quote_etag(hashlib.md5(response.content).hexdigest()),
+            }
+            cache.set(cle, entree, DUREE)
+
+        etags = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+        if entree['etag'] in etags or '*' in etags:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(entree['contenu'], content_type=entree['type'])
+        response['ETag'] = entree['etag']
+        # Le client revalide à chaque fois : un 304 ne coûte qu'une lecture de cache
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    def listing_view(self, request):
+        return self.reponse_en_cache(super().listing_view, request)
+
+    def detail_view(self, request, pk):
+        return self.reponse_en_cache(super().detail_view, request, pk)
+
+    # --- Projection ---
+
+    def get_serializer_class(self):
+        # Appelée par la projection puis par get_serializer : construite une fois
+        if not hasattr(self, '_serializer_class'):
+            self._serializer_class = super().get_serializer_class()
+        return self._serializer_class
+
+    def paginate_queryset(self, queryset):
+        # Les résultats d'une recherche ne sont pas des QuerySet
+        if self.action == 'listing_view' and isinstance(queryset, QuerySet):
+            queryset = self.projeter(queryset)
+        return super().paginate_queryset(queryset)
+
+    def projeter(self, queryset):
+        """Limite la requête aux colonnes des champs sérialisés."""
+        model = queryset.model
+        champs_api = {champ.name: champ for champ in self.get_body_fields(model) + self.get_meta_fields(model)}
+        colonnes = set(self.colonnes_requises)
+        jointures, prefetch = [], []
+        # Rendus à précharger par image liée : seulement les filtres sérialisés
+        specs = {}
+
+        for nom in self.get_serializer_class().Meta.fields:
+            if nom in self.colonnes_calculees:
+                colonnes.update(self.colonnes_calculees[nom])
+                continue
+            # APIField(..., serializer=ImageRenditionField(..., source='image_principale'))
+            serializer = getattr(champs_api.get(nom), 'serializer', None)
+            source = getattr(serializer, 'source', None) or nom
+            try:
+                champ = model._meta.get_field(source)
+            except FieldDoesNotExist:
+                # Propriété calculée inconnue : pas de projection sûre
+                return queryset
+            if champ.many_to_many or champ.one_to_many:
+                prefetch.append(source)
+            elif champ.concrete:
+                colonnes.add(source)
+                if champ.many_to_one:
+                    jointures.append(source)
+                    if champ.related_model is get_image_model() and getattr(serializer, 'filter_spec', None):
+                        specs.setdefault(source, set()).add(serializer.filter_spec)
+
+        Rendition = get_image_model().get_rendition_model()
+        for source, filtres in specs.items():
+            prefetch.append(Prefetch(
+                f'{source}__renditions',
+                queryset=Rendition.objects.filter(filter_spec__in=filtres),
+            ))
+
+        queryset = queryset.only(*colonnes)
+        if jointures:
+            queryset = queryset.select_related(*jointures)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+
+class TagsPrechargesField(TagsField):
+    """Tags triés par nom, lus dans le prefetch de la liste (pas une requête par objet)."""
+
+    def to_representation(self, value):
+        return sorted(tag.name for tag in value.all())
+
+
+class PagesAPIViewSet(ApiEnCacheMixin, BasePagesAPIViewSet):
+    colonnes_requises = ['id', 'content_type', 'path', 'depth', 'url_path', 'locale', 'live']
+    colonnes_calculees = {
+        **ApiEnCacheMixin.colonnes_calculees,
+        'html_url': [],
+        'parent': [],
+    }
+
+    def get_base_queryset(self):
+        # Appelée trois fois par requête (liste, sérialiseur, contexte) : restrictions et site lus une fois
+        if not hasattr(self, '_base_queryset'):
+            self._base_queryset = super().get_base_queryset()
+        return self._base_queryset
+
+
+class ImagesAPIViewSet(ApiEnCacheMixin, BaseImagesAPIViewSet):
+    # ImageField relit largeur et hauteur à l'instanciation si elles sont différées
+    colonnes_requises = ['id', 'file', 'width', 'height']
+    colonnes_calculees = {**ApiEnCacheMixin.colonnes_calculees, 'download_url': []}
+    meta_fields = BaseAPIViewSet.meta_fields + [APIField('tags', serializer=TagsPrechargesField()), 'download_url']
+
+
+class DocumentsAPIViewSet(ApiEnCacheMixin, BaseDocumentsAPIViewSet):
+    colonnes_requises = ['id', 'file']
+    colonnes_calculees = {**ApiEnCacheMixin.colonnes_calculees, 'download_url': []}
+    meta_fields = BaseAPIViewSet.meta_fields + [APIField('tags', serializer=TagsPrechargesField()), 'download_url']
+
+
+def _apres_modification(sender, **kwargs):
+    invalider()
+
+
+def connecter_signaux():
+    from wagtail.documents import get_document_model
+    from wagtail.models import Page, Site
+    from wagtail.signals import page_published, page_unpublished, post_page_move
+
+    # Un brouillon enregistré ne change pas l'API : pas de post_save sur Page
+    for signal in (page_published, page_unpublished, post_page_move):
+        signal.connect(_apres_modification)
+    post_delete.connect(_apres_modification, sender=Page)
+    for model in (PageViewRestriction, Site, get_image_model(), get_document_model()):
+        post_save.connect(_apres_modification, sender=model)
+        post_delete.connect(_apres_modification, sender=model)
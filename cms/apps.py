@@ -5,3 +5,14 @@ class CmsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cms'
     verbose_name = 'CMS Wagtail'
+
+    def ready(self):
+        from .images import enregistrer_encodeurs
+        enregistrer_encodeurs()
+
+        from . import api, cache_blocs, facettes, listes, texte_riche
+        api.connecter_signaux()
+        listes.connecter_signaux()
+        facettes.connecter_signaux()
+        cache_blocs.connecter_signaux()
+        texte_riche.installer()
@@ -1,18 +1,20 @@
 """
 Blocs StreamField pour Wagtail.
-Composants réutilisables pour les pages.
+Composants réutilisables pour les pages. Les blocs à gabarit mettent leur
+rendu en cache (voir cms.cache_blocs) ; les blocs de choix sont résolus
+en groupe (voir cms.choix).
 """
 from wagtail import blocks
-from wagtail.images.blocks import ImageChooserBlock
-from wagtail.documents.blocks import DocumentChooserBlock
-from wagtail.snippets.blocks import SnippetChooserBlock
 from wagtail.embeds.blocks import EmbedBlock
 
+from .cache_blocs import BlocEnCacheMixin
+from .choix import ChoixDocumentBlock, ChoixImageBlock, ChoixPageBlock, ChoixSnippetBlock
+
 
 class LinkBlock(blocks.StructBlock):
     """Bloc de lien."""
     texte = blocks.CharBlock(required=True)
-    page = blocks.PageChooserBlock(required=False)
+    page = ChoixPageBlock(required=False)
     url_externe = blocks.URLBlock(required=False)
     
     class Meta:
@@ -23,7 +25,7 @@ class LinkBlock(blocks.StructBlock):
 class BoutonBlock(blocks.StructBlock):
     """Bloc de bouton avec variantes."""
     texte = blocks.CharBlock(required=True)
-    page = blocks.PageChooserBlock(required=False)
+    page = ChoixPageBlock(required=False)
     url_externe = blocks.URLBlock(required=False)
     style = blocks.ChoiceBlock(choices=[
         ('primary', 'Primaire'),
@@ -37,11 +39,11 @@ class BoutonBlock(blocks.StructBlock):
         label = 'Bouton'
 
 
-class HeroBlock(blocks.StructBlock):
+class HeroBlock(BlocEnCacheMixin, blocks.StructBlock):
     """Bloc hero/bannière principale."""
     titre = blocks.CharBlock(required=True, max_length=200)
     sous_titre = blocks.TextBlock(required=False)
-    image = ImageChooserBlock(required=False)
+    image = ChoixImageBlock(required=False)
     video_url = blocks.URLBlock(required=False, help_text="URL YouTube ou Vimeo")
     overlay = blocks.BooleanBlock(required=False, default=True, help_text="Ajouter un overlay sombre")
     boutons = blocks.ListBlock(BoutonBlock(), max_num=2)
@@ -62,8 +64,8 @@ class CardBlock(blocks.StructBlock):
     """Bloc carte individuelle."""
     titre = blocks.CharBlock(required=True)
     description = blocks.TextBlock(required=False)
-    image = ImageChooserBlock(required=False)
-    lien = blocks.PageChooserBlock(required=False)
+    image = ChoixImageBlock(required=False)
+    lien = ChoixPageBlock(required=False)
     url_externe = blocks.URLBlock(required=False)
     icone = blocks.CharBlock(required=False, help_text="Nom de l'icône")
     
@@ -72,7 +74,7 @@ class CardBlock(blocks.StructBlock):
         label = 'Carte'
 
 
-class CardsBlock(blocks.StructBlock):
+class CardsBlock(BlocEnCacheMixin, blocks.StructBlock):
     """Bloc grille de cartes."""
     titre_section = blocks.CharBlock(required=False)
     sous_titre = blocks.TextBlock(required=False)
@@ -89,11 +91,11 @@ class CardsBlock(blocks.StructBlock):
         template = 'cms/blocks/cards.html'
 
 
-class CTABlock(blocks.StructBlock):
+class CTABlock(BlocEnCacheMixin, blocks.StructBlock):
     """Bloc appel à l'action."""
     titre = blocks.CharBlock(required=True)
     description = blocks.TextBlock(required=False)
-    image_fond = ImageChooserBlock(required=False)
+    image_fond = ChoixImageBlock(required=False)
     bouton = BoutonBlock()
     style = blocks.ChoiceBlock(choices=[
         ('light', 'Clair'),
@@ -110,11 +112,11 @@ class CTABlock(blocks.StructBlock):
 
 class GalerieImageBlock(blocks.StructBlock):
     """Image de galerie."""
-    image = ImageChooserBlock(required=True)
+    image = ChoixImageBlock(required=True)
     legende = blocks.CharBlock(required=False)
 
 
-class GalerieBlock(blocks.StructBlock):
+class GalerieBlock(BlocEnCacheMixin, blocks.StructBlock):
     """Bloc galerie d'images."""
     titre = blocks.CharBlock(required=False)
     images = blocks.ListBlock(GalerieImageBlock())
@@ -138,7 +140,7 @@ class AccordionItemBlock(blocks.StructBlock):
     ouvert = blocks.BooleanBlock(required=False, default=False)
 
 
-class AccordionBlock(blocks.StructBlock):
+class AccordionBlock(BlocEnCacheMixin, blocks.StructBlock):
     """Bloc accordéon/FAQ."""
     titre_section = blocks.CharBlock(required=False)
     elements = blocks.ListBlock(AccordionItemBlock())
@@ -154,10 +156,10 @@ class TimelineItemBlock(blocks.StructBlock):
     date = blocks.CharBlock(required=True)
     titre = blocks.CharBlock(required=True)
     description = blocks.TextBlock(required=False)
-    image = ImageChooserBlock(required=False)
+    image = ChoixImageBlock(required=False)
 
 
-class TimelineBlock(blocks.StructBlock):
+class TimelineBlock(BlocEnCacheMixin, blocks.StructBlock):
     """Bloc timeline/chronologie."""
     titre_section = blocks.CharBlock(required=False)
     elements = blocks.ListBlock(TimelineItemBlock())
@@ -176,7 +178,7 @@ class StatBlock(blocks.StructBlock):
     description = blocks.TextBlock(required=False)
 
 
-class StatsBlock(blocks.StructBlock):
+class StatsBlock(BlocEnCacheMixin, blocks.StructBlock):
     """Bloc statistiques."""
     titre_section = blocks.CharBlock(required=False)
     sous_titre = blocks.TextBlock(required=False)
@@ -195,10 +197,10 @@ class StatsBlock(blocks.StructBlock):
 
 class TeamMemberBlock(blocks.StructBlock):
     """Membre d'équipe."""
-    membre = SnippetChooserBlock('cms.MembreEquipe')
+    membre = ChoixSnippetBlock('cms.MembreEquipe')
 
 
-class TeamBlock(blocks.StructBlock):
+class TeamBlock(BlocEnCacheMixin, blocks.StructBlock):
     """Bloc équipe."""
     titre_section = blocks.CharBlock(required=False)
     sous_titre = blocks.TextBlock(required=False)
@@ -216,10 +218,10 @@ class TeamBlock(blocks.StructBlock):
 
 class TemoignageItemBlock(blocks.StructBlock):
     """Témoignage individuel."""
-    temoignage = SnippetChooserBlock('cms.Temoignage')
+    temoignage = ChoixSnippetBlock('cms.Temoignage')
 
 
-class TestimonialsBlock(blocks.StructBlock):
+class TestimonialsBlock(BlocEnCacheMixin, blocks.StructBlock):
     """Bloc témoignages."""
     titre_section = blocks.CharBlock(required=False)
     temoignages = blocks.ListBlock(TemoignageItemBlock())
@@ -231,7 +233,7 @@ class TestimonialsBlock(blocks.StructBlock):
         template = 'cms/blocks/testimonials.html'
 
 
-class ContactBlock(blocks.StructBlock):
+class ContactBlock(BlocEnCacheMixin, blocks.StructBlock):
     """Bloc informations de contact."""
     titre = blocks.CharBlock(required=False, default="Nous contacter")
     adresse = blocks.TextBlock(required=False)
@@ -246,7 +248,7 @@ class ContactBlock(blocks.StructBlock):
         template = 'cms/blocks/contact.html'
 
 
-class MapBlock(blocks.StructBlock):
+class MapBlock(BlocEnCacheMixin, blocks.StructBlock):
     """Bloc carte/map."""
     titre = blocks.CharBlock(required=False)
     latitude = blocks.FloatBlock(required=True)
@@ -263,10 +265,10 @@ class MapBlock(blocks.StructBlock):
 
 class ServiceItemBlock(blocks.StructBlock):
     """Service individuel."""
-    service = SnippetChooserBlock('cms.ServiceMairie')
+    service = ChoixSnippetBlock('cms.ServiceMairie')
 
 
-class ServicesBlock(blocks.StructBlock):
+class ServicesBlock(BlocEnCacheMixin, blocks.StructBlock):
     """Bloc services."""
     titre_section = blocks.CharBlock(required=False)
     sous_titre = blocks.TextBlock(required=False)
@@ -283,7 +285,7 @@ class ServicesBlock(blocks.StructBlock):
         template = 'cms/blocks/services.html'
 
 
-class RichTextBlock(blocks.StructBlock):
+class RichTextBlock(BlocEnCacheMixin, blocks.StructBlock):
     """Bloc texte riche."""
     contenu = blocks.RichTextBlock()
     colonnes = blocks.ChoiceBlock(choices=[
@@ -297,9 +299,9 @@ class RichTextBlock(blocks.StructBlock):
         template = 'cms/blocks/richtext.html'
 
 
-class ImageTextBlock(blocks.StructBlock):
+class ImageTextBlock(BlocEnCacheMixin, blocks.StructBlock):
     """Bloc image + texte."""
-    image = ImageChooserBlock(required=True)
+    image = ChoixImageBlock(required=True)
     titre = blocks.CharBlock(required=False)
     texte = blocks.RichTextBlock()
     position_image = blocks.ChoiceBlock(choices=[
@@ -318,7 +320,7 @@ class ImageTextBlock(blocks.StructBlock):
         template = 'cms/blocks/image_text.html'
 
 
-class VideoBlock(blocks.StructBlock):
+class VideoBlock(BlocEnCacheMixin, blocks.StructBlock):
     """Bloc vidéo."""
     titre = blocks.CharBlock(required=False)
     video = EmbedBlock()
@@ -332,12 +334,12 @@ class VideoBlock(blocks.StructBlock):
 
 class DocumentItemBlock(blocks.StructBlock):
     """Document individuel."""
-    document = DocumentChooserBlock(required=True)
+    document = ChoixDocumentBlock(required=True)
     titre_personnalise = blocks.CharBlock(required=False)
     description = blocks.TextBlock(required=False)
 
 
-class DocumentsBlock(blocks.StructBlock):
+class DocumentsBlock(BlocEnCacheMixin, blocks.StructBlock):
     """Bloc liste de documents."""
     titre = blocks.CharBlock(required=False)
     documents = blocks.ListBlock(DocumentItemBlock())
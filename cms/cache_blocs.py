@@ -0,0 +1,186 @@
+"""
+Cache du rendu des blocs StreamField.
+
+Le HTML d'un bloc est mis en cache par mairie et par site. Sa clé dépend de
+l'empreinte de la valeur du bloc et de la révision publiée de la page.
+
+Les objets référencés par le bloc sont suivis via
+Block.extract_references : snippets (ServiceMairie, MembreEquipe,
+Temoignage), images, documents et pages liées. Chacun a un numéro de
+version, incrémenté à sa modification, qui entre dans la clé. Modifier un
+service invalide ainsi les seuls blocs qui l'affichent.
+
+Les gabarits affichent aussi des objets atteints à travers un snippet (page
+de détail d'un service, photo d'un membre ou d'un témoignage, voir
+LIENS_SUIVIS) : modifier, déplacer ou supprimer l'un d'eux incrémente la
+version des snippets qui le référencent.
+
+Les images négociées d'après l'en-tête Accept ({% image_negociee %}, voir
+cms.images) font entrer le format choisi dans la clé ; le rendu en cache
+garde l'indication `Vary: Accept` de la réponse.
+
+Les aperçus (révisions non publiées) ne passent jamais par le cache.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.utils.safestring import mark_safe
+
+from core.cache import cache_fragments as cache
+from core.tenants import schema_courant
+
+from .images import format_pour_requete
+
+DUREE = getattr(settings, 'BLOCS_CACHE_DUREE', 24 * 3600)
+# Désactivable à chaud (benchmark_blocs)
+ACTIF = DUREE > 0
+
+# Snippets affichés par les blocs
+MODELES_SUIVIS = ['cms.ServiceMairie', 'cms.MembreEquipe', 'cms.Temoignage']
+
+# Objets affichés à travers un snippet : (snippet, clé étrangère)
+LIENS_SUIVIS = [
+    ('cms.ServiceMairie', 'lien_page'),
+    ('cms.MembreEquipe', 'photo'),
+    ('cms.Temoignage', 'photo'),
+]
+
+
+def cle_dependance(label, pk):
+    return f'blocs:{schema_courant()}:dep:{label}:{pk}'
+
+
+def dependances(block, value):
+    """(modèle, pk) des objets référencés par la valeur du bloc."""
+    return sorted({
+        (model._meta.label_lower, str(object_id))
+        for model, object_id, _, _ in block.extract_references(value)
+    })
+
+
+def versions_dependances(refs):
+    """Versions des objets `refs` (liste de (modèle, pk)), en un seul accès au cache."""
+    if not refs:
+        return []
+    versions = cache.get_many([cle_dependance(label, pk) for label, pk in refs])
+    return [versions.get(cle_dependance(label, pk), 0) for label, pk in refs]
+
+
+def _incrementer(label, pk):
+    cle = cle_dependance(label, pk)
+    try:
+        cache.incr(cle)
+    except ValueError:
+        cache.set(cle, 1, None)
+
+
+def invalider_liens(model, pks):
+    """Invalide les snippets de LIENS_SUIVIS qui pointent vers les objets `model` / `pks`."""
+    from django.apps import apps
+
+    for label, champ in LIENS_SUIVIS:
+        snippet = apps.get_model(label)
+        if not issubclass(model, snippet._meta.get_field(champ).related_model):
+            continue
+        for pk in snippet._default_manager.filter(**{f'{champ}__in': pks}).values_list('pk', flat=True):
+            _incrementer(snippet._meta.label_lower, pk)
+
+
+def invalider_objet(label, pk):
+    """Invalide les blocs et textes riches qui affichent l'objet `label` / `pk`."""
+    from django.apps import apps
+
+    _incrementer(label, pk)
+    invalider_liens(apps.get_model(label), [pk])
+
+
+def _cle_rendu(block, value, context):
+    request = context.get('request')
+    site = None
+    if request is not None:
+        from wagtail.models import Site
+        site = getattr(Site.find_for_request(request), 'pk', None)
+    page = context.get('page')
+
+    refs = dependances(block, value)
+    empreinte = hashlib.md5(json.dumps(
+        [block.get_prep_value(value), versions_dependances(refs)],
+        cls=DjangoJSONEncoder, sort_keys=True,
+    ).encode()).hexdigest()
+    return (
+        f'blocs:{schema_courant()}:{site}:{type(block).__name__}:'
+        f'{getattr(page, "live_revision_id", None)}:{format_pour_requete(request)}:{empreinte}'
+    )
+
+
+class BlocEnCacheMixin:
+    """Met en cache le rendu d'un StructBlock à gabarit."""
+
+    def render(self, value, context=None):
+        context = context or {}
+        request = context.get('request')
+        if not ACTIF or getattr(request, 'is_preview', False):
+            return super().render(value, context)
+
+        cle = _cle_rendu(self, value, context)
+        rendu = cache.get(cle)
+        if rendu is None:
+            # Le bloc négocie-t-il lui-même le format d'une image ?
+            vary = getattr(request, 'vary_accept_images', False)
+            if request is not None:
+                request.vary_accept_images = False
+            html = super().render(value, context)
+            negocie = getattr(request, 'vary_accept_images', False)
+            if request is not None:
+                request.vary_accept_images = vary or negocie
+            cache.set(cle, (str(html), negocie), DUREE)
+        else:
+            html, negocie = rendu
+            if negocie:
+                request.vary_accept_images = True
+        return mark_safe(html)
+
+
+def _apres_modification(sender, instance, **kwargs):
+    invalider_objet(sender._meta.label_lower, instance.pk)
+
+
+def _apres_publication(sender, instance, **kwargs):
+    # Titre ou URL d'une page liée : clé sous le type de base des pages
+    invalider_objet('wagtailcore.page', instance.pk)
+
+
+def _apres_changement_url(sender, instance, **kwargs):
+    # Slug modifié ou page déplacée : l'URL des sous-pages change aussi
+    pks = list(instance.get_descendants(inclusive=True).values_list('pk', flat=True))
+    for pk in pks:
+        _incrementer('wagtailcore.page', pk)
+    invalider_liens(sender, pks)
+
+
+def _avant_suppression(sender, instance, **kwargs):
+    # Après la suppression, SET_NULL a déjà vidé la clé étrangère des snippets
+    invalider_liens(sender, [instance.pk])
+
+
+def connecter_signaux():
+    from django.apps import apps
+    from wagtail.documents import get_document_model
+    from wagtail.images import get_image_model
+    from wagtail.models import Page
+    from wagtail.signals import page_published, page_slug_changed, page_unpublished, post_page_move
+
+    modeles = [apps.get_model(label) for label in MODELES_SUIVIS]
+    for model in modeles + [get_image_model(), get_document_model()]:
+        post_save.connect(_apres_modification, sender=model)
+        post_delete.connect(_apres_modification, sender=model)
+    for signal in (page_published, page_unpublished):
+        signal.connect(_apres_publication)
+    for signal in (page_slug_changed, post_page_move):
+        signal.connect(_apres_changement_url)
+    post_delete.connect(_apres_publication, sender=Page)
+    for model in (get_image_model(), Page):
+        pre_delete.connect(_avant_suppression, sender=model)
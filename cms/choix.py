@@ -0,0 +1,127 @@
+"""
+Résolution groupée des blocs de choix (snippets, documents, images, pages).
+
+Wagtail convertit les blocs d'un StreamField type par type : une page avec
+un hero, des cartes et un appel à l'action interroge la table des pages une
+fois par type de bloc, et les gabarits ajoutent une requête par service
+(page de détail) ou par membre (photo).
+
+`precharger(valeur)` parcourt les données brutes de tout le StreamField,
+rassemble les identifiants référencés par modèle et les charge en une
+requête par modèle, avec les clés étrangères affichées par les gabarits.
+Les blocs de choix de cms.blocks lisent d'abord ces objets préchargés ;
+hors préchargement, ils se comportent comme ceux de Wagtail.
+"""
+from contextvars import ContextVar
+
+from wagtail import blocks
+from wagtail.documents.blocks import DocumentChooserBlock
+from wagtail.fields import StreamField
+from wagtail.images.blocks import ImageChooserBlock
+from wagtail.snippets.blocks import SnippetChooserBlock
+
+# Clés étrangères lues par les gabarits des blocs
+SELECT_RELATED = {
+    'cms.servicemairie': ['lien_page'],
+    'cms.membreequipe': ['photo'],
+    'cms.temoignage': ['photo'],
+}
+
+# {modèle: {pk: objet ou None}} pendant `precharger()`
+_precharges = ContextVar('choix_precharges', default=None)
+
+
+class ChoixGroupeMixin:
+    """Bloc de choix qui lit les objets préchargés avant d'interroger la base."""
+
+    def queryset_choix(self):
+        relations = SELECT_RELATED.get(self.model_class._meta.label_lower)
+        queryset = self.model_class.objects.all()
+        return queryset.select_related(*relations) if relations else queryset
+
+    def cle(self, value):
+        return self.model_class._meta.pk.to_python(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, self.model_class):
+            return value
+        return self.bulk_to_python([value])[0]
+
+    def bulk_to_python(self, values):
+        cles = [None if value is None else self.cle(value) for value in values]
+        objets = dict((_precharges.get() or {}).get(self.model_class, {}))
+        manquants = {cle for cle in cles if cle is not None and cle not in objets}
+        if manquants:
+            objets.update(self.queryset_choix().in_bulk(manquants))
+        return [objets.get(cle) for cle in cles]
+
+
+class ChoixSnippetBlock(ChoixGroupeMixin, SnippetChooserBlock):
+    pass
+
+
+class ChoixDocumentBlock(ChoixGroupeMixin, DocumentChooserBlock):
+    pass
+
+
+class ChoixImageBlock(ChoixGroupeMixin, ImageChooserBlock):
+    pass
+
+
+class ChoixPageBlock(ChoixGroupeMixin, blocks.PageChooserBlock):
+    pass
+
+
+# Les migrations référencent les blocs de Wagtail : changer de classe ne crée pas de migration
+DECONSTRUCT_ALIASES = {
+    ChoixSnippetBlock: 'wagtail.snippets.blocks.SnippetChooserBlock',
+    ChoixDocumentBlock: 'wagtail.documents.blocks.DocumentChooserBlock',
+    ChoixImageBlock: 'wagtail.images.blocks.ImageChooserBlock',
+    ChoixPageBlock: 'wagtail.blocks.PageChooserBlock',
+}
+
+
+def _collecter(block, raw, references):
+    """Ajoute à `references` ({modèle: (bloc, {pk})}) les objets choisis dans `raw`."""
+    if raw is None:
+        return
+    if isinstance(block, ChoixGroupeMixin):
+        references.setdefault(block.model_class, (block, set()))[1].add(block.cle(raw))
+    elif isinstance(block, blocks.StructBlock):
+        for nom, enfant in block.child_blocks.items():
+            if nom in raw:
+                _collecter(enfant, raw[nom], references)
+    elif isinstance(block, blocks.ListBlock):
+        for item in raw:
+            valeur = item['value'] if block._item_is_in_block_format(item) else item
+            _collecter(block.child_block, valeur, references)
+    elif isinstance(block, blocks.StreamBlock):
+        for item in raw:
+            if item['type'] in block.child_blocks:
+                _collecter(block.child_blocks[item['type']], item['value'], references)
+
+
+def precharger(valeur):
+    """Convertit tout le StreamField `valeur` avec une requête par modèle choisi."""
+    references = {}
+    _collecter(valeur.stream_block, list(valeur.raw_data), references)
+    objets = {}
+    for model, (block, cles) in references.items():
+        trouves = block.queryset_choix().in_bulk(cles)
+        # Objets supprimés compris : aucune requête de plus au rendu
+        objets[model] = {cle: trouves.get(cle) for cle in cles}
+
+    jeton = _precharges.set(objets)
+    try:
+        for i in range(len(valeur)):
+            valeur[i]
+    finally:
+        _precharges.reset(jeton)
+    return sum(len(cles) for _, cles in references.values())
+
+
+def precharger_page(page):
+    """Précharge les blocs de choix de tous les StreamField de la page."""
+    for champ in page._meta.get_fields():
+        if isinstance(champ, StreamField):
+            precharger(getattr(page, champ.name))
@@ -0,0 +1,197 @@
+"""
+Facettes des articles : nombre d'articles publiés par catégorie et par tag.
+
+Chaque processus garde en mémoire, par mairie, les ensembles d'identifiants
+des ArticlePage publiées par page d'index, par catégorie et par tag (via
+PageTag). Les comptes et les combinaisons de filtres se calculent par
+intersection d'ensembles, sans requête.
+
+Une publication, une dépublication ou une suppression met à jour
+l'ensemble du processus qui la traite et change la version partagée
+(cache) : les autres processus reconstruisent le leur (deux requêtes) à
+leur prochaine lecture.
+"""
+import math
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+
+from wagtail.models import Page
+from wagtail.signals import page_published, page_unpublished, post_page_move
+
+from core.tenants import schema_courant
+
+# Nombre de tailles dans le nuage de tags
+NIVEAUX_NUAGE = 5
+
+_index = {}
+_verrou = threading.Lock()
+
+
+@dataclass
+class IndexFacettes:
+    version: int
+    par_index: dict = field(default_factory=lambda: defaultdict(set))
+    par_categorie: dict = field(default_factory=lambda: defaultdict(set))
+    par_tag: dict = field(default_factory=lambda: defaultdict(set))
+    noms_categories: dict = field(default_factory=dict)
+
+    def retirer(self, pk):
+        for ensembles in (self.par_index, self.par_categorie, self.par_tag):
+            for ids in ensembles.values():
+                ids.discard(pk)
+
+    def selection(self, index_pk, categorie=None, tag=None):
+        """Identifiants des articles de la page d'index correspondant aux filtres."""
+        ids = self.par_index.get(index_pk, set())
+        if categorie:
+            ids = ids & self.par_categorie.get(categorie, set())
+        if tag:
+            ids = ids & self.par_tag.get(tag, set())
+        return ids
+
+
+@dataclass
+class Facettes:
+    total: int
+    # (slug, nom, nombre)
+    categories: list
+    # (nom, nombre, niveau de 1 à NIVEAUX_NUAGE)
+    tags: list
+
+
+def _cle_version():
+    return f'facettes:{schema_courant()}:version'
+
+
+def construire(version):
+    """Index complet de la mairie courante."""
+    from .models import ArticleIndexPage, ArticlePage, CategorieArticle, PageTag
+
+    index = IndexFacettes(version)
+    index.noms_categories = dict(CategorieArticle.objects.values_list('slug', 'nom'))
+    pages_index = dict(ArticleIndexPage.objects.values_list('path', 'pk'))
+    for pk, chemin, categorie in ArticlePage.objects.live().values_list('pk', 'path', 'categorie__slug'):
+        index_pk = pages_index.get(chemin[:-Page.steplen])
+        if index_pk is not None:
+            index.par_index[index_pk].add(pk)
+        if categorie:
+            index.par_categorie[categorie].add(pk)
+    tags = PageTag.objects.filter(content_object__live=True).values_list('content_object_id', 'tag__name')
+    for pk, nom in tags:
+        index.par_tag[nom].add(pk)
+    return index
+
+
+def index_facettes():
+    """Index de la mairie courante, reconstruit si un autre processus l'a modifié."""
+    schema = schema_courant()
+    version = cache.get(_cle_version(), 0)
+    index = _index.get(schema)
+    if index is None or index.version != version:
+        with _verrou:
+            index = _index.get(schema)
+            if index is None or index.version != version:
+                index = _index[schema] = construire(version)
+    return index
+
+
+def _nouvelle_version():
+    cle = _cle_version()
+    try:
+        return cache.incr(cle)
+    except ValueError:
+        cache.set(cle, 1, None)
+        return 1
+
+
+def invalider():
+    """Fait reconstruire l'index par tous les processus (catégorie ou tag renommé...)."""
+    _nouvelle_version()
+
+
+def mettre_a_jour(page):
+    """Applique la publication, dépublication ou suppression d'un article."""
+    from .models import ArticlePage
+
+    version = _nouvelle_version()
+    with _verrou:
+        index = _index.get(schema_courant())
+        if index is None or index.version != version - 1:
+            # Un autre processus a aussi modifié l'index : reconstruction à la lecture
+            return
+        index.retirer(page.pk)
+        article = (
+            ArticlePage.objects.live().filter(pk=page.pk)
+            .values_list('path', 'categorie__slug').first()
+        )
+        if article is not None:
+            chemin, categorie = article
+            parent = Page.objects.filter(path=chemin[:-Page.steplen]).values_list('pk', flat=True).first()
+            if parent is not None:
+                index.par_index[parent].add(page.pk)
+            if categorie:
+                index.par_categorie[categorie].add(page.pk)
+            for nom in page.tags.names():
+                index.par_tag[nom].add(page.pk)
+        index.version = version
+
+
+def _niveau(nombre, maximum):
+    if maximum <= 1:
+        return 1
+    return 1 + round((NIVEAUX_NUAGE - 1) * math.log(nombre) / math.log(maximum))
+
+
+def facettes(index_pk, categorie=None, tag=None):
+    """
+    Comptes par catégorie et par tag des articles de la page d'index.
+    Chaque facette tient compte du filtre de l'autre : les catégories sont
+    comptées dans le tag sélectionné, les tags dans la catégorie.
+    """
+    index = index_facettes()
+    dans_tag = index.selection(index_pk, tag=tag)
+    dans_categorie = index.selection(index_pk, categorie=categorie)
+
+    categories = [
+        (slug, index.noms_categories.get(slug, slug), len(ids & dans_tag))
+        for slug, ids in index.par_categorie.items()
+    ]
+    comptes_tags = [(nom, len(ids & dans_categorie)) for nom, ids in index.par_tag.items()]
+    comptes_tags = [(nom, nombre) for nom, nombre in comptes_tags if nombre]
+    maximum = max((nombre for _, nombre in comptes_tags), default=0)
+
+    return Facettes(
+        total=len(index.selection(index_pk, categorie, tag)),
+        categories=sorted(
+            [c for c in categories if c[2]], key=lambda c: c[1].lower()
+        ),
+        tags=sorted(
+            [(nom, nombre, _niveau(nombre, maximum)) for nom, nombre in comptes_tags],
+            key=lambda t: t[0].lower(),
+        ),
+    )
+
+
+def _apres_publication(sender, instance, **kwargs):
+    mettre_a_jour(instance)
+
+
+def _apres_modification(sender, **kwargs):
+    invalider()
+
+
+def connecter_signaux():
+    from taggit.models import Tag
+    from .models import ArticlePage, CategorieArticle
+
+    page_published.connect(_apres_publication, sender=ArticlePage)
+    page_unpublished.connect(_apres_publication, sender=ArticlePage)
+    post_delete.connect(_apres_publication, sender=ArticlePage)
+    post_page_move.connect(_apres_modification, sender=ArticlePage)
+    for model in (CategorieArticle, Tag):
+        post_save.connect(_apres_modification, sender=model)
+        post_delete.connect(_apres_modification, sender=model)
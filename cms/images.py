@@ -0,0 +1,101 @@
+"""
+Diffusion des images : formats modernes (AVIF/WebP) et négociation.
+
+Les templates de blocs utilisent {% picture_moderne %} (cms_tags) pour
+laisser le navigateur choisir le format parmi ceux dont l'encodeur est
+disponible ; lorsque seule une URL peut être émise (lien lightbox,
+fond CSS, balises meta), le format est choisi d'après l'en-tête Accept.
+"""
+from django.conf import settings
+from PIL import Image as PILImage
+
+
+def enregistrer_encodeurs():
+    """
+    Active l'encodeur AVIF fourni par pillow-heif (Pillow < 11 n'en a pas).
+    Appelé au démarrage de l'application CMS.
+    """
+    try:
+        from pillow_heif import register_avif_opener
+    except ImportError:
+        return
+    register_avif_opener()
+
+
+def _format_disponible(fmt):
+    PILImage.init()
+    return fmt.upper() in PILImage.SAVE
+
+
+def formats_modernes():
+    """Formats modernes configurés dont l'encodeur est disponible."""
+    return [
+        fmt for fmt in getattr(settings, 'IMAGES_FORMATS_MODERNES', ['avif', 'webp'])
+        if _format_disponible(fmt)
+    ]
+
+
+TYPES_MIME = {
+    'avif': 'image/avif',
+    'webp': 'image/webp',
+}
+
+
+def _types_acceptes(accept):
+    """Analyse un en-tête Accept et renvoie les types MIME acceptés (q > 0)."""
+    types = set()
+    for element in accept.split(','):
+        parties = [p.strip() for p in element.split(';')]
+        if not parties[0]:
+            continue
+        qualite = 1.0
+        for parametre in parties[1:]:
+            if parametre.startswith('q='):
+                try:
+                    qualite = float(parametre[2:])
+                except ValueError:
+                    qualite = 0.0
+        if qualite > 0:
+            types.add(parties[0].lower())
+    return types
+
+
+def format_pour_requete(request):
+    """
+    Renvoie le meilleur format moderne accepté par le client,
+    ou None pour conserver le format d'origine.
+    """
+    if request is None:
+        return None
+    types = _types_acceptes(request.META.get('HTTP_ACCEPT', ''))
+    for fmt in formats_modernes():
+        if TYPES_MIME[fmt] in types:
+            return fmt
+    return None
+
+
+def spec_negociee(filter_spec, request):
+    """Ajoute l'opération format-xxx adaptée au client à une spec de filtre."""
+    fmt = format_pour_requete(request)
+    if fmt and 'format-' not in filter_spec:
+        return f"{filter_spec}|format-{fmt}"
+    return filter_spec
+
+
+def rendition_negociee(image, filter_spec, request):
+    """
+    Rendition dans le format négocié avec le client.
+    Marque la requête pour que la réponse porte `Vary: Accept`.
+    """
+    if request is not None:
+        request.vary_accept_images = True
+    return image.get_rendition(spec_negociee(filter_spec, request))
+
+
+def specs_formats(filter_spec, repli=None):
+    """
+    Déclinaisons d'une spec : format d'origine (ou `repli`, format imposé
+    aux navigateurs sans format moderne) puis formats modernes disponibles.
+    """
+    origine = f"{filter_spec}|format-{repli}" if repli else filter_spec
+    return [origine] + [f"{filter_spec}|format-{fmt}" for fmt in formats_modernes()]
@@ -0,0 +1,161 @@
+"""
+Listes paginées et mises en cache des pages d'index (articles, événements,
+projets).
+
+Chaque page de liste (filtres + numéro de page) est mise en cache sous
+forme d'identifiants. Une publication ne vide pas le cache : elle change la
+version de la page d'index parente. Une entrée d'une version antérieure, ou
+plus ancienne que LISTES_FRAICHEUR, reste servie pendant que le worker la
+recalcule (stale-while-revalidate) : pendant une rafale de publications,
+aucun visiteur n'attend le calcul de la liste.
+
+Les objets affichés sont relus à chaque requête (une requête, images et
+catégories comprises) : une page dépubliée disparaît immédiatement.
+"""
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.paginator import Page as PageListe, Paginator
+from django.db.models.signals import post_delete
+
+from wagtail.models import Page
+from wagtail.signals import page_published, page_unpublished, post_page_move
+
+from core.cache import cache_pages as cache
+from core.tenants import schema_courant
+
+PAR_PAGE = getattr(settings, 'LISTES_PAR_PAGE', 12)
+FRAICHEUR = getattr(settings, 'LISTES_FRAICHEUR', 300)
+DUREE_CACHE = getattr(settings, 'LISTES_DUREE_CACHE', 24 * 3600)
+# Un seul recalcul en file par entrée pendant ce délai
+DELAI_RAFRAICHISSEMENT = 60
+
+
+def _cle_version(index_pk):
+    return f'listes:{schema_courant()}:{index_pk}:version'
+
+
+def version(index_pk):
+    return cache.get(_cle_version(index_pk), 0)
+
+
+def invalider(index_pk):
+    """Rend périmées (mais encore servies) les listes de la page d'index."""
+    cle = _cle_version(index_pk)
+    try:
+        cache.incr(cle)
+    except ValueError:
+        cache.set(cle, 1, None)
+
+
+def _cle(index_pk, parametres, numero):
+    empreinte = hashlib.md5(urlencode(sorted(parametres.items())).encode()).hexdigest()
+    return f'listes:{schema_courant()}:{index_pk}:{empreinte}:{numero}'
+
+
+def planifier_rafraichissement(index_pk, parametres, numero):
+    """Met en file le recalcul d'une liste, sauf s'il est déjà en file."""
+    from .taches import rafraichir_liste
+
+    if cache.add(_cle(index_pk, parametres, numero) + ':rafraichissement', True, DELAI_RAFRAICHISSEMENT):
+        rafraichir_liste.differer(index_pk, parametres, numero)
+
+
+class ListeCacheeMixin:
+    """
+    Page d'index dont les pages filles sont listées avec pagination et cache.
+
+    Les sous-classes définissent `parametres_liste` (filtres acceptés dans
+    l'URL), `base_liste()` (pages publiées, avec select_related) et
+    `requete_liste(parametres)` (filtres et tri).
+    """
+
+    parametres_liste = ()
+
+    def base_liste(self):
+        raise NotImplementedError
+
+    def requete_liste(self, parametres):
+        raise NotImplementedError
+
+    def parametres_de(self, request):
+        return {
+            nom: request.GET[nom][:100]
+            for nom in self.parametres_liste
+            if request.GET.get(nom)
+        }
+
+    def calculer_liste(self, parametres, numero):
+        """Calcule une page de la liste et l'enregistre dans le cache."""
+        # Lue avant la requête : une publication concurrente rendra l'entrée périmée
+        version_courante = version(self.pk)
+        paginator = Paginator(self.requete_liste(parametres).values_list('pk', flat=True), PAR_PAGE)
+        page = paginator.get_page(numero)
+        entree = {
+            'ids': list(page.object_list),
+            'total': paginator.count,
+            'numero': page.number,
+            'version': version_courante,
+            'date': time.time(),
+        }
+        cle = _cle(self.pk, parametres, numero)
+        cache.set(cle, entree, DUREE_CACHE)
+        cache.delete(cle + ':rafraichissement')
+        return entree
+
+    def entree_liste(self, parametres, numero):
+        entree = cache.get(_cle(self.pk, parametres, numero))
+        if entree is None:
+            return self.calculer_liste(parametres, numero)
+        if entree['version'] != version(self.pk) or time.time() - entree['date'] > FRAICHEUR:
+            planifier_rafraichissement(self.pk, parametres, numero)
+        return entree
+
+    def liste_paginee(self, request):
+        """Page de la liste demandée par `request` (objet Page de Django)."""
+        parametres = self.parametres_de(request)
+        try:
+            numero = max(int(request.GET.get('page', 1)), 1)
+        except ValueError:
+            numero = 1
+
+        entree = self.entree_liste(parametres, numero)
+        objets = self.base_liste().in_bulk(entree['ids'])
+        return PageListe(
+            [objets[pk] for pk in entree['ids'] if pk in objets],
+            entree['numero'],
+            Paginator(range(entree['total']), PAR_PAGE),
+        )
+
+
+def _index_parent(instance):
+    # Par le chemin : fonctionne aussi après la suppression de la page
+    chemin_parent = instance.path[:-Page.steplen]
+    return Page.objects.filter(path=chemin_parent).values_list('pk', flat=True).first()
+
+
+def _apres_modification(sender, instance, **kwargs):
+    index_pk = _index_parent(instance)
+    if index_pk is not None:
+        invalider(index_pk)
+        # La première page non filtrée est la plus demandée : recalculée sans attendre un visiteur
+        planifier_rafraichissement(index_pk, {}, 1)
+
+
+def _apres_deplacement(sender, instance, parent_page_before, parent_page_after, **kwargs):
+    for parent in (parent_page_before, parent_page_after):
+        invalider(parent.pk)
+        planifier_rafraichissement(parent.pk, {}, 1)
+
+
+def connecter_signaux():
+    """Invalide les listes à chaque publication, dépublication, suppression ou déplacement."""
+    from .models import ArticlePage, EvenementPage, ProjetPage
+
+    for model in (ArticlePage, EvenementPage, ProjetPage):
+        page_published.connect(_apres_modification, sender=model)
+        page_unpublished.connect(_apres_modification, sender=model)
+        post_delete.connect(_apres_modification, sender=model)
+        post_page_move.connect(_apres_deplacement, sender=model)
@@ -0,0 +1,86 @@
+"""Mesure le temps de rendu des StreamField avec et sans cache des blocs.
+
+Usage:
+  python manage.py benchmark_blocs [--repetitions=5] [--page=ID]
+
+Pour chaque page publiée de type PageAccueil, PageStandard et ProjetPage,
+les blocs du champ `contenu` sont rendus sans cache, puis avec le cache
+des blocs (voir cms.cache_blocs) après un premier rendu qui le remplit. Le
+rapport donne le temps moyen par page et le gain, par type de page.
+"""
+import statistics
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from cms import cache_blocs
+from cms.models import PageAccueil, PageStandard, ProjetPage
+
+TYPES_PAGES = [PageAccueil, PageStandard, ProjetPage]
+
+
+class Command(BaseCommand):
+    help = 'Report StreamField render time saved per page type by the block cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repetitions', type=int, default=5, help='Renders per page and mode')
+        parser.add_argument('--page', type=int, default=None, help='Only measure this page id')
+
+    def handle(self, *args, **options):
+        repetitions = options['repetitions']
+        factory = RequestFactory()
+        resultats = defaultdict(lambda: {'pages': 0, 'blocs': 0, 'sans': [], 'avec': []})
+
+        actif = cache_blocs.ACTIF
+        try:
+            for model in TYPES_PAGES:
+                pages = model.objects.live()
+                if options['page']:
+                    pages = pages.filter(pk=options['page'])
+                for page in pages:
+                    site = page.get_site()
+                    request = factory.get(page.url or '/', HTTP_HOST=getattr(site, 'hostname', 'localhost'))
+                    context = {'page': page, 'self': page, 'request': request}
+                    blocs = list(page.contenu)
+
+                    cache_blocs.ACTIF = False
+                    sans = self.mesurer(blocs, context, repetitions)
+                    cache_blocs.ACTIF = True
+                    self.mesurer(blocs, context, 1)
+                    avec = self.mesurer(blocs, context, repetitions)
+
+                    ligne = resultats[model._meta.verbose_name]
+                    ligne['pages'] += 1
+                    ligne['blocs'] += len(blocs)
+                    ligne['sans'].append(sans)
+                    ligne['avec'].append(avec)
+        finally:
+            cache_blocs.ACTIF = actif
+
+        if not resultats:
+            self.stdout.write('Aucune page publiée à mesurer')
+            return
+
+        self.stdout.write(
+            f"{'Type de page':<20}{'Pages':>7}{'Blocs':>7}{'Sans cache':>12}{'Avec cache':>12}{'Gain':>8}  (ms par page)"
+        )
+        for nom, ligne in resultats.items():
+            sans = statistics.mean(ligne['sans'])
+            avec = statistics.mean(ligne['avec'])
+            gain = (1 - avec / sans) * 100 if sans else 0
+            self.stdout.write(
+                f"{nom:<20}{ligne['pages']:>7}{ligne['blocs']:>7}{sans:>12.2f}{avec:>12.2f}{gain:>7.0f}%"
+            )
+        self.stdout.write(self.style.SUCCESS('Benchmark terminé'))
+
+    def mesurer(self, blocs, context, repetitions):
+        """Temps moyen (ms) du rendu de tous les blocs de la page."""
+        durees = []
+        for _ in range(repetitions):
+            debut = time.perf_counter()
+            for bloc in blocs:
+                bloc.render(context)
+            durees.append((time.perf_counter() - debut) * 1000)
+        return statistics.mean(durees)
@@ -0,0 +1,82 @@
+"""Mesure les octets économisés par page grâce aux renditions AVIF/WebP.
+
+Usage:
+  python manage.py benchmark_images [--page=ID] [--spec=max-1200x1200]
+
+Pour chaque page publiée, les images référencées (champs, StreamField,
+texte riche) sont retrouvées via l'index de références de Wagtail, puis
+la même rendition est générée au format d'origine et dans chaque format
+moderne. Le rapport donne le poids total par page et le gain obtenu.
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+
+from wagtail.images import get_image_model
+from wagtail.models import Page, ReferenceIndex
+
+from cms.images import formats_modernes, specs_formats
+
+
+class Command(BaseCommand):
+    help = 'Report bytes saved per page by AVIF/WebP renditions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page', type=int, default=None, help='Only measure this page id')
+        parser.add_argument('--spec', default='max-1200x1200', help='Rendition filter spec to measure')
+
+    def handle(self, *args, **options):
+        Image = get_image_model()
+        image_ct = ContentType.objects.get_for_model(Image)
+        page_ct = ContentType.objects.get_for_model(Page)
+
+        pages = Page.objects.live().specific()
+        if options['page']:
+            pages = pages.filter(pk=options['page'])
+
+        specs = specs_formats(options['spec'])
+        formats = ['origine'] + formats_modernes()
+        tailles_images = {}
+        totaux = dict.fromkeys(formats, 0)
+
+        self.stdout.write(
+            f"{'Page':<40} {'Images':>6} " + ' '.join(f'{fmt:>12}' for fmt in formats) + f" {'Gain':>7}"
+        )
+
+        for page in pages:
+            image_ids = set(
+                ReferenceIndex.objects.filter(
+                    base_content_type=page_ct,
+                    object_id=str(page.pk),
+                    to_content_type=image_ct,
+                ).values_list('to_object_id', flat=True)
+            )
+            if not image_ids:
+                continue
+
+            poids = dict.fromkeys(formats, 0)
+            for image in Image.objects.filter(pk__in=image_ids):
+                if image.pk not in tailles_images:
+                    renditions = image.get_renditions(*specs)
+                    tailles_images[image.pk] = [renditions[spec].file.size for spec in specs]
+                for fmt, taille in zip(formats, tailles_images[image.pk]):
+                    poids[fmt] += taille
+
+            meilleur = min(poids.values())
+            gain = 100 * (1 - meilleur / poids['origine']) if poids['origine'] else 0
+            for fmt in formats:
+                totaux[fmt] += poids[fmt]
+
+            self.stdout.write(
+                f"{page.title[:40]:<40} {len(image_ids):>6} "
+                + ' '.join(f'{poids[fmt]:>12}' for fmt in formats)
+                + f" {gain:>6.1f}%"
+            )
+
+        if totaux['origine']:
+            economie = totaux['origine'] - min(totaux.values())
+            self.stdout.write(self.style.SUCCESS(
+                f"Total : {totaux['origine']} octets au format d'origine, "
+                f"{economie} octets économisés ({100 * economie / totaux['origine']:.1f}%)"
+            ))
+        else:
+            self.stdout.write(self.style.WARNING('Aucune image référencée par les pages publiées.'))
@@ -0,0 +1,17 @@
+"""
+Middlewares du CMS.
+"""
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+
+class VaryAcceptImagesMiddleware(MiddlewareMixin):
+    """
+    Ajoute `Vary: Accept` aux pages dont les URLs d'images ont été
+    négociées d'après l'en-tête Accept (voir cms.images).
+    """
+
+    def process_response(self, request, response):
+        if getattr(request, 'vary_accept_images', False):
+            patch_vary_headers(response, ('Accept',))
+        return response
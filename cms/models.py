@@ -11,6 +11,8 @@ from modelcluster.contrib.taggit import ClusterTaggableManager
 from modelcluster.models import ClusterableModel
 from taggit.models import TaggedItemBase
 
+from wagtail.api import APIField
+from wagtail.images.api.fields import ImageRenditionField
 from wagtail.models import Page, Orderable
 from wagtail.fields import RichTextField, StreamField
 from wagtail.admin.panels import (
@@ -30,6 +32,10 @@ from .blocks import (
     ContactBlock, MapBlock, ServicesBlock, TestimonialsBlock,
     RichTextBlock, ImageTextBlock, VideoBlock, DocumentsBlock
 )
+from .facettes import facettes, index_facettes
+from .listes import ListeCacheeMixin
+from recherche.models import TexteExtraitMixin
+from recherche.ponderation import BOOST_CORPS, BOOST_RESUME, BOOST_TITRE
 
 
 # =============================================================================
@@ -60,7 +66,7 @@ class ImagePersonnaliseeRendition(AbstractRendition):
         unique_together = (('image', 'filter_spec', 'focal_point_key'),)
 
 
-class DocumentPersonnalise(AbstractDocument):
+class DocumentPersonnalise(TexteExtraitMixin, AbstractDocument):
     """Document personnalisé avec métadonnées supplémentaires."""
     description = models.TextField(blank=True, verbose_name="Description")
     categorie = models.CharField(max_length=100, blank=True, verbose_name="Catégorie")
@@ -68,6 +74,12 @@ class DocumentPersonnalise(AbstractDocument):
     
     admin_form_fields = Document.admin_form_fields + ('description', 'categorie', 'date_document',)
 
+    search_fields = AbstractDocument.search_fields + [
+        index.SearchField('description', boost=BOOST_RESUME),
+        # Texte du fichier, extrait par le worker (voir recherche.documents)
+        index.SearchField('texte_extrait', boost=BOOST_CORPS),
+    ]
+
     class Meta:
         verbose_name = "Document"
         verbose_name_plural = "Documents"
@@ -337,7 +349,7 @@ class MembreEquipe(models.Model):
 
 
 @register_snippet
-class FAQ(models.Model):
+class FAQ(index.Indexed, models.Model):
     """Questions fréquemment posées."""
     question = models.CharField(max_length=500)
     reponse = RichTextField()
@@ -360,6 +372,14 @@ class FAQ(models.Model):
         FieldPanel('ordre'),
         FieldPanel('publie'),
     ]
+    
+    search_fields = [
+        index.SearchField('question', boost=BOOST_TITRE),
+        index.AutocompleteField('question'),
+        index.SearchField('reponse', boost=BOOST_CORPS),
+        index.FilterField('categorie'),
+        index.FilterField('publie'),
+    ]
 
 
 @register_snippet
@@ -477,8 +497,9 @@ class PageAccueil(Page):
     ]
     
     search_fields = Page.search_fields + [
-        index.SearchField('hero_titre'),
-        index.SearchField('hero_sous_titre'),
+        index.SearchField('hero_titre', boost=BOOST_RESUME),
+        index.SearchField('hero_sous_titre', boost=BOOST_RESUME),
+        index.SearchField('contenu', boost=BOOST_CORPS),
     ]
     
     class Meta:
@@ -533,7 +554,8 @@ class PageStandard(Page):
     ]
     
     search_fields = Page.search_fields + [
-        index.SearchField('introduction'),
+        index.SearchField('introduction', boost=BOOST_RESUME),
+        index.SearchField('contenu', boost=BOOST_CORPS),
     ]
     
     class Meta:
@@ -541,7 +563,7 @@ class PageStandard(Page):
         verbose_name_plural = "Pages standard"
 
 
-class ArticleIndexPage(Page):
+class ArticleIndexPage(ListeCacheeMixin, Page):
     """Page d'index des articles/actualités."""
     
     introduction = RichTextField(blank=True)
@@ -550,22 +572,30 @@ class ArticleIndexPage(Page):
         FieldPanel('introduction'),
     ]
     
+    parametres_liste = ('categorie', 'tag')
+    
+    def base_liste(self):
+        return (
+            ArticlePage.objects.live().descendant_of(self)
+            .select_related('image_principale', 'categorie')
+        )
+    
+    def requete_liste(self, parametres):
+        articles = self.base_liste().order_by('-date_publication', '-pk')
+        
+        # Filtrage par catégorie et par tag : ensembles d'identifiants en mémoire
+        if parametres.get('categorie') or parametres.get('tag'):
+            ids = index_facettes().selection(self.pk, parametres.get('categorie'), parametres.get('tag'))
+            articles = articles.filter(pk__in=ids)
+        return articles
+    
     def get_context(self, request):
         context = super().get_context(request)
-        articles = ArticlePage.objects.live().descendant_of(self).order_by('-date_publication')
-        
-        # Filtrage par catégorie
-        categorie = request.GET.get('categorie')
-        if categorie:
-            articles = articles.filter(categorie__slug=categorie)
-        
-        # Filtrage par tag
-        tag = request.GET.get('tag')
-        if tag:
-            articles = articles.filter(tags__name=tag)
-        
-        context['articles'] = articles
+        context['articles'] = context['page_obj'] = self.liste_paginee(request)
         context['categories'] = CategorieArticle.objects.all()
+        context['facettes'] = facettes(
+            self.pk, request.GET.get('categorie'), request.GET.get('tag')
+        )
         return context
     
     class Meta:
@@ -667,11 +697,20 @@ class ArticlePage(Page):
     ]
     
     search_fields = Page.search_fields + [
-        index.SearchField('resume'),
+        index.SearchField('resume', boost=BOOST_RESUME),
+        index.SearchField('contenu', boost=BOOST_CORPS),
         index.FilterField('date_publication'),
         index.FilterField('categorie'),
     ]
     
+    # API v2 (voir cms.api) : vignette servie par les listes de l'application mobile
+    api_fields = [
+        APIField('date_publication'),
+        APIField('resume'),
+        APIField('image_principale'),
+        APIField('vignette', serializer=ImageRenditionField('fill-600x400', source='image_principale')),
+    ]
+    
     class Meta:
         verbose_name = "Article"
         verbose_name_plural = "Articles"
@@ -680,7 +719,7 @@ class ArticlePage(Page):
     parent_page_types = ['cms.ArticleIndexPage']
 
 
-class EvenementIndexPage(Page):
+class EvenementIndexPage(ListeCacheeMixin, Page):
     """Page d'index des événements."""
     
     introduction = RichTextField(blank=True)
@@ -689,21 +728,25 @@ class EvenementIndexPage(Page):
         FieldPanel('introduction'),
     ]
     
-    def get_context(self, request):
-        context = super().get_context(request)
+    parametres_liste = ('filtre',)
+    
+    def base_liste(self):
+        return EvenementPage.objects.live().descendant_of(self).select_related('image_principale')
+    
+    def requete_liste(self, parametres):
         from django.utils import timezone
         
-        evenements = EvenementPage.objects.live().descendant_of(self)
+        evenements = self.base_liste()
         
         # Filtrer: à venir ou passés
-        filtre = request.GET.get('filtre', 'avenir')
-        if filtre == 'avenir':
-            evenements = evenements.filter(date_debut__gte=timezone.now()).order_by('date_debut')
-        else:
-            evenements = evenements.filter(date_debut__lt=timezone.now()).order_by('-date_debut')
-        
-        context['evenements'] = evenements
-        context['filtre_actif'] = filtre
+        if parametres.get('filtre', 'avenir') == 'avenir':
+            return evenements.filter(date_debut__gte=timezone.now()).order_by('date_debut', 'pk')
+        return evenements.filter(date_debut__lt=timezone.now()).order_by('-date_debut', '-pk')
+    
+    def get_context(self, request):
+        context = super().get_context(request)
+        context['evenements'] = context['page_obj'] = self.liste_paginee(request)
+        context['filtre_actif'] = request.GET.get('filtre', 'avenir')
         return context
     
     class Meta:
@@ -770,11 +813,20 @@ class EvenementPage(Page):
     ]
     
     search_fields = Page.search_fields + [
-        index.SearchField('lieu'),
-        index.SearchField('description'),
+        index.SearchField('lieu', boost=BOOST_RESUME),
+        index.SearchField('description', boost=BOOST_CORPS),
         index.FilterField('date_debut'),
     ]
     
+    api_fields = [
+        APIField('date_debut'),
+        APIField('date_fin'),
+        APIField('lieu'),
+        APIField('gratuit'),
+        APIField('image_principale'),
+        APIField('vignette', serializer=ImageRenditionField('fill-600x400', source='image_principale')),
+    ]
+    
     class Meta:
         verbose_name = "Événement"
         verbose_name_plural = "Événements"
@@ -830,7 +882,9 @@ class ServicePage(Page):
     ]
     
     search_fields = Page.search_fields + [
-        index.SearchField('introduction'),
+        index.SearchField('introduction', boost=BOOST_RESUME),
+        index.SearchField('contenu', boost=BOOST_CORPS),
+        index.SearchField('documents_requis', boost=BOOST_CORPS),
     ]
     
     class Meta:
@@ -954,7 +1008,7 @@ class FormulaireContactPage(AbstractEmailForm):
         verbose_name = "Formulaire de contact"
 
 
-class ProjetIndexPage(Page):
+class ProjetIndexPage(ListeCacheeMixin, Page):
     """Page d'index des projets municipaux."""
     
     introduction = RichTextField(blank=True)
@@ -963,16 +1017,22 @@ class ProjetIndexPage(Page):
         FieldPanel('introduction'),
     ]
     
-    def get_context(self, request):
-        context = super().get_context(request)
-        projets = ProjetPage.objects.live().descendant_of(self).order_by('-first_published_at')
+    parametres_liste = ('statut',)
+    
+    def base_liste(self):
+        return ProjetPage.objects.live().descendant_of(self).select_related('image_principale')
+    
+    def requete_liste(self, parametres):
+        projets = self.base_liste().order_by('-first_published_at', '-pk')
         
         # Filtrage par statut
-        statut = request.GET.get('statut')
-        if statut:
-            projets = projets.filter(statut=statut)
-        
-        context['projets'] = projets
+        if parametres.get('statut'):
+            projets = projets.filter(statut=parametres['statut'])
+        return projets
+    
+    def get_context(self, request):
+        context = super().get_context(request)
+        context['projets'] = context['page_obj'] = self.liste_paginee(request)
         return context
     
     class Meta:
@@ -1055,7 +1115,9 @@ class ProjetPage(Page):
     ]
     
     search_fields = Page.search_fields + [
-        index.SearchField('description'),
+        index.SearchField('description', boost=BOOST_RESUME),
+        index.SearchField('objectifs', boost=BOOST_CORPS),
+        index.SearchField('contenu', boost=BOOST_CORPS),
         index.FilterField('statut'),
     ]
     
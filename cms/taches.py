@@ -0,0 +1,17 @@
+"""
+Tâches en arrière-plan du CMS.
+"""
+from wagtail.models import Page
+
+from taches.models import Tache
+from taches.registre import tache
+
+
+@tache(nom='cms.rafraichir_liste', priorite=Tache.PRIORITE_NORMALE)
+def rafraichir_liste(index_pk, parametres, numero):
+    """Recalcule une page de liste mise en cache (voir cms.listes)."""
+    from .listes import ListeCacheeMixin
+
+    index_page = Page.objects.filter(pk=index_pk).specific().first()
+    if isinstance(index_page, ListeCacheeMixin):
+        index_page.calculer_liste(parametres, numero)
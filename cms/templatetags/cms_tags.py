@@ -2,14 +2,18 @@
 Template tags personnalisés pour le CMS Wagtail.
 """
 from django import template
+from django.template.base import Token, TokenType
 from django.template.loader import render_to_string
 
+from wagtail.images.models import Filter
+from wagtail.images.templatetags.wagtailimages_tags import PictureNode, image as analyser_image
 from wagtail.models import Site
 
 from cms.models import (
     MenuPrincipal, ConfigurationMairie, Partenaire,
     ServiceMairie, FAQ
 )
+from cms.images import rendition_negociee, specs_formats
 
 register = template.Library()
 
@@ -91,6 +95,49 @@ def faq_widget(categorie=None, limit=5):
     return {'faqs': faqs[:limit]}
 
 
+@register.simple_tag(takes_context=True)
+def image_negociee(context, image, filter_spec):
+    """
+    Rendition au format accepté par le navigateur (AVIF, WebP ou origine).
+    Usage: {% image_negociee item.image "max-1600x1600" as full %}
+    """
+    if not image:
+        return None
+    return rendition_negociee(image, filter_spec, context.get('request'))
+
+
+# Format des <img> de repli, pour les navigateurs sans AVIF ni WebP
+FORMAT_REPLI = 'jpeg'
+
+
+class PictureModerneNode(PictureNode):
+    """{% picture %} décliné en FORMAT_REPLI et dans les formats modernes disponibles."""
+
+    def get_filters(self, preserve_svg=False):
+        if preserve_svg:
+            return super().get_filters(preserve_svg)
+        return [
+            Filter(spec=spec)
+            for base in Filter.expand_spec(self.filter_specs)
+            for spec in specs_formats(base, repli=FORMAT_REPLI)
+        ]
+
+
+@register.tag
+def picture_moderne(parser, token):
+    """
+    Comme {% picture %}, sans opération format-… : les formats viennent de
+    cms.images.specs_formats (AVIF seulement si un encodeur est installé).
+    Usage: {% picture_moderne value.image fill-{400x300,800x600} sizes="100vw" alt="" %}
+    """
+    reste = token.contents.partition(' ')[2]
+    noeud = analyser_image(parser, Token(TokenType.BLOCK, f'picture {reste}'))
+    return PictureModerneNode(
+        noeud.image_expr, noeud.filter_specs,
+        output_var_name=noeud.output_var_name, attrs=noeud.attrs, preserve_svg=noeud.preserve_svg,
+    )
+
+
 @register.simple_tag
 def get_partenaires(limit=10):
     """Récupère les partenaires actifs."""
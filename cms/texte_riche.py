@@ -0,0 +1,122 @@
+"""
+Cache de l'expansion du texte riche.
+
+Wagtail convertit le HTML stocké (<a linktype="page" id="12">, <embed
+embedtype="image" .../>) en HTML affichable à chaque rendu, avec des
+requêtes pour retrouver pages, documents et images liés. Le résultat est
+mis en cache par mairie, selon l'empreinte du HTML stocké et la version
+des objets liés (voir cms.cache_blocs) : publier, dépublier, renommer ou
+déplacer une page liée invalide les textes qui pointent vers elle.
+
+`installer()` remplace expand_db_html dans les deux modules de Wagtail qui
+l'appellent : le filtre |richtext et les valeurs RichText (RichTextBlock).
+Le hook before_serve_page appelle `precharger()` avec tous les textes
+riches de la page servie : les textes absents du cache sont expansés en
+un seul passage, donc une requête par type de lien pour toute la page.
+"""
+import hashlib
+from collections.abc import Sequence
+
+from django.conf import settings
+
+from wagtail.fields import RichTextField, StreamField
+from wagtail.rich_text import RichText, extract_references_from_rich_text, get_rewriter
+
+from core.cache import cache_fragments as cache
+from core.tenants import schema_courant
+
+from .cache_blocs import versions_dependances
+
+DUREE = getattr(settings, 'TEXTE_RICHE_CACHE_DUREE', 24 * 3600)
+
+# Ne peut apparaître dans un texte riche enregistré par l'éditeur
+SEPARATEUR = '<!--texte-riche-->'
+
+
+def _a_expanser(html):
+    # Sans lien interne ni embed, l'expansion ne fait aucune requête : pas de cache
+    return bool(html) and ('linktype=' in html or '<embed' in html)
+
+
+def _cles(textes):
+    """Clé de cache de chaque texte ; versions des objets liés lues en un accès."""
+    refs = {
+        html: sorted({
+            (model._meta.label_lower, str(object_id))
+            for model, object_id, _, _ in extract_references_from_rich_text(html)
+        })
+        for html in textes
+    }
+    toutes = sorted({ref for refs_texte in refs.values() for ref in refs_texte})
+    versions = dict(zip(toutes, versions_dependances(toutes)))
+
+    schema = schema_courant()
+    cles = {}
+    for html, refs_texte in refs.items():
+        empreinte = hashlib.md5(html.encode())
+        empreinte.update(repr([versions[ref] for ref in refs_texte]).encode())
+        cles[html] = f'texte_riche:{schema}:{empreinte.hexdigest()}'
+    return cles
+
+
+def expand_db_html(html):
+    """expand_db_html de Wagtail, avec cache."""
+    if not _a_expanser(html):
+        return get_rewriter()(html)
+    cle = _cles([html])[html]
+    resultat = cache.get(cle)
+    if resultat is None:
+        resultat = get_rewriter()(html)
+        cache.set(cle, resultat, DUREE)
+    return resultat
+
+
+def precharger(textes):
+    """Expanse en un seul passage les textes absents du cache."""
+    textes = {html for html in textes if _a_expanser(html) and SEPARATEUR not in html}
+    if not textes:
+        return 0
+    cles = _cles(textes)
+    presents = cache.get_many(list(cles.values()))
+    manquants = [html for html, cle in cles.items() if cle not in presents]
+    if not manquants:
+        return 0
+
+    # Un passage : chaque type de lien est résolu en une requête pour tous les textes
+    morceaux = get_rewriter()(SEPARATEUR.join(manquants)).split(SEPARATEUR)
+    if len(morceaux) != len(manquants):
+        return 0
+    cache.set_many({cles[html]: morceau for html, morceau in zip(manquants, morceaux)}, DUREE)
+    return len(manquants)
+
+
+def _textes_valeur(valeur):
+    """Textes riches d'une valeur de StreamField, à toute profondeur."""
+    if isinstance(valeur, RichText):
+        yield valeur.source
+    elif isinstance(valeur, dict):
+        # StructValue
+        for enfant in valeur.values():
+            yield from _textes_valeur(enfant)
+    elif isinstance(valeur, Sequence) and not isinstance(valeur, str):
+        # ListValue, StreamValue (dont les enfants portent la valeur)
+        for enfant in valeur:
+            yield from _textes_valeur(getattr(enfant, 'value', enfant))
+
+
+def textes_riches(page):
+    """HTML stocké des RichTextField et des blocs de texte riche de la page."""
+    for champ in page._meta.get_fields():
+        if isinstance(champ, RichTextField):
+            yield getattr(page, champ.name) or ''
+        elif isinstance(champ, StreamField):
+            yield from _textes_valeur(getattr(page, champ.name))
+
+
+def installer():
+    """Branche le cache sur le filtre |richtext et sur les valeurs RichText."""
+    import wagtail.rich_text
+    from wagtail.templatetags import wagtailcore_tags
+
+    wagtail.rich_text.expand_db_html = expand_db_html
+    wagtailcore_tags.expand_db_html = expand_db_html
@@ -381,3 +381,20 @@ class HubMairieWelcomePanel:
 @hooks.register("construct_homepage_panels")
 def add_hubmairie_dashboard(request, panels):
     panels.insert(0, HubMairieWelcomePanel(request))
+
+
+# =============================================================================
+# BLOCS DE CHOIX ET TEXTE RICHE : RÉSOLUTION GROUPÉE AVANT LE RENDU
+# =============================================================================
+
+@hooks.register("before_serve_page")
+def precharger_page(page, request, serve_args, serve_kwargs):
+    """
+    Résout en une requête par modèle les objets choisis dans les StreamField,
+    puis expanse en un passage les textes riches absents du cache.
+    """
+    from cms import choix, texte_riche
+
+    choix.precharger_page(page)
+    if not getattr(request, 'is_preview', False):
+        texte_riche.precharger(texte_riche.textes_riches(page))
@@ -0,0 +1,58 @@
+# Generated by Django 5.1 on 2026-10-19 18:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenu', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='image_hauteur',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='image_largeur',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='evenement',
+            name='image_hauteur',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='evenement',
+            name='image_largeur',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='projetmunicipal',
+            name='image_hauteur',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='projetmunicipal',
+            name='image_largeur',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='article',
+            name='image',
+            field=models.ImageField(blank=True, height_field='image_hauteur', null=True, upload_to='articles/', width_field='image_largeur'),
+        ),
+        migrations.AlterField(
+            model_name='evenement',
+            name='image',
+            field=models.ImageField(blank=True, height_field='image_hauteur', null=True, upload_to='evenements/', width_field='image_largeur'),
+        ),
+        migrations.AlterField(
+            model_name='projetmunicipal',
+            name='image',
+            field=models.ImageField(blank=True, height_field='image_hauteur', null=True, upload_to='projets/', width_field='image_largeur'),
+        ),
+    ]
@@ -5,6 +5,11 @@ from django.db import models
 from django.conf import settings
 from django.utils.text import slugify
 
+from wagtail.search import index
+
+from recherche.models import TexteExtraitMixin
+from recherche.ponderation import BOOST_CORPS, BOOST_RESUME, BOOST_TITRE
+
 
 class Categorie(models.Model):
     """Catégorie d'articles."""
@@ -26,13 +31,18 @@ class Categorie(models.Model):
         return self.nom
 
 
-class Article(models.Model):
+class Article(index.Indexed, models.Model):
     """Article ou actualité."""
     titre = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     resume = models.TextField(max_length=500, verbose_name="Résumé")
     contenu = models.TextField()
-    image = models.ImageField(upload_to='articles/', blank=True, null=True)
+    image = models.ImageField(
+        upload_to='articles/', blank=True, null=True,
+        width_field='image_largeur', height_field='image_hauteur'
+    )
+    image_largeur = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_hauteur = models.PositiveIntegerField(null=True, blank=True, editable=False)
     
     categorie = models.ForeignKey(Categorie, on_delete=models.SET_NULL, null=True, blank=True)
     auteur = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
@@ -46,6 +56,15 @@ class Article(models.Model):
     
     vues = models.PositiveIntegerField(default=0)
     
+    search_fields = [
+        index.SearchField('titre', boost=BOOST_TITRE),
+        index.AutocompleteField('titre'),
+        index.SearchField('resume', boost=BOOST_RESUME),
+        index.SearchField('contenu', boost=BOOST_CORPS),
+        index.FilterField('publie'),
+        index.FilterField('date_publication'),
+    ]
+    
     class Meta:
         verbose_name = "Article"
         verbose_name_plural = "Articles"
@@ -60,12 +79,17 @@ class Article(models.Model):
         return self.titre
 
 
-class Evenement(models.Model):
+class Evenement(index.Indexed, models.Model):
     """Événement public ou culturel."""
     titre = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
-    image = models.ImageField(upload_to='evenements/', blank=True, null=True)
+    image = models.ImageField(
+        upload_to='evenements/', blank=True, null=True,
+        width_field='image_largeur', height_field='image_hauteur'
+    )
+    image_largeur = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_hauteur = models.PositiveIntegerField(null=True, blank=True, editable=False)
     
     lieu = models.CharField(max_length=200)
     adresse = models.TextField(blank=True)
@@ -82,6 +106,15 @@ class Evenement(models.Model):
     
     date_creation = models.DateTimeField(auto_now_add=True)
     
+    search_fields = [
+        index.SearchField('titre', boost=BOOST_TITRE),
+        index.AutocompleteField('titre'),
+        index.SearchField('lieu', boost=BOOST_RESUME),
+        index.SearchField('description', boost=BOOST_CORPS),
+        index.FilterField('publie'),
+        index.FilterField('date_debut'),
+    ]
+    
     class Meta:
         verbose_name = "Événement"
         verbose_name_plural = "Événements"
@@ -96,7 +129,7 @@ class Evenement(models.Model):
         return self.titre
 
 
-class Document(models.Model):
+class Document(TexteExtraitMixin, index.Indexed, models.Model):
     """Document téléchargeable (délibérations, budgets, formulaires)."""
     
     TYPE_CHOICES = [
@@ -128,6 +161,17 @@ class Document(models.Model):
         verbose_name="Ajouté par"
     )
     
+    search_fields = [
+        index.SearchField('titre', boost=BOOST_TITRE),
+        index.AutocompleteField('titre'),
+        index.SearchField('numero_reference', boost=BOOST_RESUME),
+        index.SearchField('description', boost=BOOST_CORPS),
+        # Texte du fichier, extrait par le worker (voir recherche.documents)
+        index.SearchField('texte_extrait', boost=BOOST_CORPS),
+        index.FilterField('public'),
+        index.FilterField('type_document'),
+    ]
+    
     class Meta:
         verbose_name = "Document"
         verbose_name_plural = "Documents"
@@ -141,7 +185,7 @@ class Document(models.Model):
         return self.fichier.name.split('.')[-1].upper() if self.fichier else ''
 
 
-class ProjetMunicipal(models.Model):
+class ProjetMunicipal(index.Indexed, models.Model):
     """Projet municipal avec suivi d'avancement."""
     
     STATUT_CHOICES = [
@@ -155,7 +199,12 @@ class ProjetMunicipal(models.Model):
     titre = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
-    image = models.ImageField(upload_to='projets/', blank=True, null=True)
+    image = models.ImageField(
+        upload_to='projets/', blank=True, null=True,
+        width_field='image_largeur', height_field='image_hauteur'
+    )
+    image_largeur = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_hauteur = models.PositiveIntegerField(null=True, blank=True, editable=False)
     
     statut = models.CharField(max_length=20, choices=STATUT_CHOICES, default='planifie')
     pourcentage_avancement = models.PositiveIntegerField(default=0)
@@ -172,6 +221,14 @@ class ProjetMunicipal(models.Model):
     publie = models.BooleanField(default=True)
     date_creation = models.DateTimeField(auto_now_add=True)
     
+    search_fields = [
+        index.SearchField('titre', boost=BOOST_TITRE),
+        index.AutocompleteField('titre'),
+        index.SearchField('description', boost=BOOST_CORPS),
+        index.FilterField('publie'),
+        index.FilterField('statut'),
+    ]
+    
     class Meta:
         verbose_name = "Projet municipal"
         verbose_name_plural = "Projets municipaux"
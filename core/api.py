@@ -0,0 +1,247 @@
+"""
+Briques communes des API REST des applications (état civil, services).
+
+- `PaginationCurseur` : pagination par curseur sur la clé primaire. Le coût
+  d'une page ne dépend pas de sa position (pas d'OFFSET ni de COUNT) et un
+  partenaire qui synchronise toute une table ne saute ni ne répète aucun
+  enregistrement si d'autres sont créés pendant son parcours.
+- `RelationGroupee` : clé étrangère écrite par identifiant, résolue dans les
+  objets préchargés pour tout un lot au lieu d'une requête par ligne.
+- `LotMixin` : routes `lot/` de création (POST) et de mise à jour (PATCH)
+  groupées. Un lot est validé en entier puis écrit avec bulk_create /
+  bulk_update dans une transaction : tout ou rien.
+- `ChangementsView` : /api/changements/, journal des changements pour la
+  synchronisation incrémentale (voir core.changements).
+- `SoumissionsView` : /api/soumissions/, formulaires citoyens mis en file
+  hors ligne (voir core.soumissions).
+
+bulk_create et bulk_update n'appellent ni save() ni les signaux post_save :
+les vues préparent les objets dans `preparer_creation()` et le lot est
+journalisé en une requête.
+"""
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import changements, soumissions
+from .models import Changement
+
+LOT_MAX = getattr(settings, 'API_LOT_MAX', 5000)
+TAILLE_LOT_SQL = 500
+
+
+class PaginationCurseur(CursorPagination):
+    ordering = 'pk'
+    page_size = 100
+    page_size_query_param = 'taille'
+    max_page_size = 1000
+
+
+class RelationGroupee(serializers.PrimaryKeyRelatedField):
+    """Clé étrangère lue dans context['relations'][nom] ({pk: objet}) si le lot est préchargé."""
+
+    def to_internal_value(self, data):
+        objets = self.context.get('relations', {}).get(self.field_name)
+        if objets is None:
+            return super().to_internal_value(data)
+        try:
+            cle = self.get_queryset().model._meta.pk.to_python(data)
+        except (DjangoValidationError, TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        objet = objets.get(cle)
+        if objet is None:
+            self.fail('does_not_exist', pk_value=data)
+        return objet
+
+
+class ModeleSerializer(serializers.ModelSerializer):
+    serializer_related_field = RelationGroupee
+
+
+class LotMixin:
+    """
+    Création et mise à jour groupées pour un ModelViewSet.
+
+    POST lot/ : liste d'objets à créer. PATCH lot/ : liste de modifications
+    partielles, chacune identifiée par `lookup_field`.
+    """
+
+    def preparer_creation(self, objets):
+        """Complète les objets avant bulk_create (champs calculés par save())."""
+
+    def journaliser(self, objets, operation):
+        label = self.get_queryset().model._meta.label_lower
+        if label in changements.MODELES_SUIVIS:
+            changements.journaliser_lot(label, [objet.pk for objet in objets], operation)
+
+    def _lignes(self, request):
+        lignes = request.data
+        if not isinstance(lignes, list):
+            return None, Response({'detail': "Une liste d'objets est attendue."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(lignes) > LOT_MAX:
+            return None, Response(
+                {'detail': f"Au plus {LOT_MAX} objets par lot."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return lignes, None
+
+    def _contexte_lot(self, lignes):
+        """Contexte du sérialiseur avec les clés étrangères du lot chargées en une requête par champ."""
+        contexte = self.get_serializer_context()
+        relations = {}
+        for nom, champ in self.get_serializer_class()().fields.items():
+            if not isinstance(champ, RelationGroupee) or champ.read_only:
+                continue
+            pk = champ.get_queryset().model._meta.pk
+            cles = set()
+            for ligne in lignes:
+                valeur = ligne.get(nom) if isinstance(ligne, dict) else None
+                try:
+                    cles.add(pk.to_python(valeur))
+                except (DjangoValidationError, TypeError, ValueError):
+                    continue
+            cles.discard(None)
+            relations[nom] = champ.get_queryset().in_bulk(cles) if cles else {}
+        contexte['relations'] = relations
+        return contexte
+
+    def _erreurs(self, erreurs):
+        return Response(
+            {'erreurs': [{'index': i, 'erreurs': e} for i, e in enumerate(erreurs) if e]},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    @action(detail=False, methods=['post'], url_path='lot')
+    def creer_lot(self, request):
+        lignes, erreur = self._lignes(request)
+        if erreur:
+            return erreur
+        serializer = self.get_serializer_class()(data=lignes, many=True, context=self._contexte_lot(lignes))
+        if not serializer.is_valid():
+            return self._erreurs(serializer.errors)
+
+        model = self.get_queryset().model
+        objets = [model(**donnees) for donnees in serializer.validated_data]
+        try:
+            with transaction.atomic():
+                self.preparer_creation(objets)
+                model.objects.bulk_create(objets, batch_size=TAILLE_LOT_SQL)
+                self.journaliser(objets, Changement.CREATION)
+        except IntegrityError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_409_CONFLICT)
+        return Response(self.get_serializer(objets, many=True).data, status=status.HTTP_201_CREATED)
+
+    @creer_lot.mapping.patch
+    def modifier_lot(self, request):
+        lignes, erreur = self._lignes(request)
+        if erreur:
+            return erreur
+        champ_cle = self.get_queryset().model._meta.get_field(self.lookup_field)
+        cles, erreurs = [], [None] * len(lignes)
+        for i, ligne in enumerate(lignes):
+            try:
+                cles.append(champ_cle.to_python(ligne[self.lookup_field]))
+            except (DjangoValidationError, KeyError, TypeError):
+                cles.append(None)
+                erreurs[i] = {self.lookup_field: ["Identifiant manquant ou invalide."]}
+        instances = self.get_queryset().in_bulk({cle for cle in cles if cle is not None}, field_name=self.lookup_field)
+
+        contexte = self._contexte_lot(lignes)
+        objets, champs = {}, set()
+        for i, (cle, ligne) in enumerate(zip(cles, lignes)):
+            if erreurs[i]:
+                continue
+            instance = instances.get(cle)
+            if instance is None:
+                erreurs[i] = {self.lookup_field: ["Objet introuvable."]}
+                continue
+            serializer = self.get_serializer_class()(instance, data=ligne, partial=True, context=contexte)
+            if not serializer.is_valid():
+                erreurs[i] = serializer.errors
+                continue
+            for nom, valeur in serializer.validated_data.items():
+                setattr(instance, nom, valeur)
+                champs.add(nom)
+            objets[instance.pk] = instance
+        if any(erreurs):
+            return self._erreurs(erreurs)
+
+        if champs:
+            model = self.get_queryset().model
+            with transaction.atomic():
+                model.objects.bulk_update(list(objets.values()), sorted(champs), batch_size=TAILLE_LOT_SQL)
+                self.journaliser(objets.values(), Changement.MODIFICATION)
+        return Response({'modifies': len(objets)})
+
+
+class ChangementsView(APIView):
+    """
+    GET /api/changements/?since=<id>[&modeles=label,label][&taille=N]
+
+    Sans `since` : curseur courant, à lire avant un téléchargement complet.
+    Les opérations c (création) et u (modification) se traitent comme un
+    ajout ou remplacement de l'objet, d comme sa suppression.
+    """
+    permission_classes = [AllowAny]
+    taille_defaut = 1000
+    taille_max = 5000
+
+    def get(self, request):
+        labels = changements.modeles_lisibles(request.user)
+        demandes = request.query_params.get('modeles')
+        if demandes:
+            labels = [label for label in labels if label in demandes.split(',')]
+
+        if 'since' not in request.query_params:
+            return Response({'changements': [], 'suivant': changements.curseur_courant(), 'suite': False})
+        try:
+            curseur = int(request.query_params['since'])
+            taille = min(int(request.query_params.get('taille', self.taille_defaut)), self.taille_max)
+        except ValueError:
+            return Response({'detail': "Paramètre entier attendu."}, status=status.HTTP_400_BAD_REQUEST)
+        minimal = changements.curseur_minimal()
+        if curseur < minimal:
+            return Response(
+                {'detail': "Curseur trop ancien : téléchargement complet requis.", 'curseur_minimal': minimal},
+                status=status.HTTP_410_GONE,
+            )
+
+        entrees = changements.depuis(curseur, labels, taille + 1)
+        suite = len(entrees) > taille
+        entrees = entrees[:taille]
+        return Response({
+            'changements': [
+                {
+                    'id': entree.pk,
+                    'modele': entree.modele,
+                    'objet': entree.objet_id,
+                    'operation': entree.operation,
+                    'version': entree.version,
+                }
+                for entree in entrees
+            ],
+            'suivant': entrees[-1].pk if entrees else curseur,
+            'suite': suite,
+        })
+
+
+class SoumissionsView(APIView):
+    """POST /api/soumissions/ : [{"cle", "formulaire", "donnees"}, ...] → {"resultats": [...]}"""
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        elements = request.data
+        if not isinstance(elements, list):
+            return Response({'detail': "Une liste de formulaires est attendue."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(elements) > soumissions.LOT_MAX:
+            return Response(
+                {'detail': f"Au plus {soumissions.LOT_MAX} formulaires par envoi."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response({'resultats': soumissions.traiter(elements, request.user)})
@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core'
+    verbose_name = 'Noyau E-CMS'
+
+    def ready(self):
+        # idempotence, sessions : enregistrent les tâches core.purger_*
+        from . import changements, idempotence, images, plan_site, sessions  # noqa: F401
+        changements.connecter_signaux()
+        images.connecter_signaux()
+        plan_site.connecter_signaux()
@@ -0,0 +1,182 @@
+"""
+Caches du projet.
+
+Chaque usage a son alias (voir CACHES) : 'pages' (réponses de l'API,
+listes paginées), 'fragments' (blocs et textes riches rendus), 'sessions',
+'limitation' (seaux de la limitation de débit) et 'default' pour le reste.
+Tous sont des CacheFichiersPartage sous CACHE_DOSSIER ('sessions' sous
+SESSIONS_DOSSIER, voir core.sessions) : partagés par les workers du
+serveur et par le worker de tâches (qui recalcule les listes et périme le
+cache de recherche), sans service externe. En conteneurs,
+CACHE_DOSSIER est un volume tmpfs monté par `web` et `worker` (voir
+docker-compose.yml), dimensionné pour les MAX_ENTRIES des alias.
+
+La fonction de clé `cle_mairie` préfixe chaque clé du schéma de la mairie
+courante : deux mairies ne lisent jamais les entrées l'une de l'autre, sans
+que l'appelant ait à mettre le schéma dans ses clés.
+
+Chaque alias compte ses lectures trouvées et manquées ; les comptes des
+processus sont cumulés dans STATISTIQUES/<alias>.json (commande
+statistiques_cache).
+"""
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files import locks
+from django.utils.connection import ConnectionProxy
+
+from .tenants import schema_courant
+
+# Comptes d'un processus écrits au plus tard après ce nombre de lectures ou de secondes
+FREQUENCE_STATISTIQUES = 1000
+INTERVALLE_STATISTIQUES = 60
+
+_ABSENT = object()
+
+logger = logging.getLogger(__name__)
+
+
+def cle_mairie(key, key_prefix, version):
+    """KEY_FUNCTION : clé préfixée du schéma de la mairie courante."""
+    return f'{key_prefix}:{version}:{schema_courant()}:{key}'
+
+
+class CacheFichiersPartage(FileBasedCache):
+    """
+    Cache fichier partagé par les workers d'un même serveur.
+
+    Placé sur un tmpfs, il reste en mémoire. FileBasedCache parcourt tout
+    son dossier à chaque écriture pour vérifier MAX_ENTRIES ; ici, une
+    écriture sur FREQUENCE_MENAGE seulement (option, 100 par défaut).
+
+    Une écriture impossible (dossier plein) est journalisée et ignorée :
+    set() renvoie False au lieu de faire échouer le rendu de la page.
+
+    Option EVINCER (True par défaut) : à False, aucune entrée n'est
+    supprimée pour respecter MAX_ENTRIES ; seules les entrées expirées le
+    sont, par purger_expirees() (alias 'sessions').
+
+    Le nom de l'alias est celui du dossier. Option STATISTIQUES : dossier
+    des comptes de lectures (par défaut `statistiques`, à côté du dossier).
+    """
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        options = params.get('OPTIONS', {})
+        self._frequence_menage = int(options.get('FREQUENCE_MENAGE', 100))
+        self._evincer = options.get('EVINCER', True)
+        self._ecritures = 0
+
+        dossier = Path(dir)
+        self.nom = dossier.name
+        statistiques = Path(options.get('STATISTIQUES', dossier.parent / 'statistiques'))
+        self._fichier_statistiques = statistiques / f'{self.nom}.json'
+        self._succes = self._echecs = 0
+        self._dernier_envoi = time.monotonic()
+
+    def _cull(self):
+        if not self._evincer:
+            return
+        self._ecritures += 1
+        if self._ecritures % self._frequence_menage == 0:
+            super()._cull()
+
+    def purger_expirees(self):
+        """Supprime les entrées expirées ; renvoie leur nombre."""
+        supprimees = 0
+        for nom in self._list_cache_files():
+            try:
+                with open(nom, 'rb') as fichier:
+                    supprimees += self._is_expired(fichier)
+            except FileNotFoundError:
+                pass
+        return supprimees
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        try:
+            super().set(key, value, timeout, version)
+        except OSError as exc:
+            logger.warning("Cache %s : écriture impossible (%s)", self.nom, exc)
+            return False
+        return True
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if self.has_key(key, version):
+            return False
+        return self.set(key, value, timeout, version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        try:
+            return super().touch(key, timeout, version)
+        except OSError as exc:
+            logger.warning("Cache %s : écriture impossible (%s)", self.nom, exc)
+            return False
+
+    def get(self, key, default=None, version=None):
+        # get_many, incr et get_or_set passent aussi par ici
+        valeur = super().get(key, _ABSENT, version)
+        if valeur is _ABSENT:
+            self._echecs += 1
+            valeur = default
+        else:
+            self._succes += 1
+        if (
+            self._succes + self._echecs >= FREQUENCE_STATISTIQUES
+            or time.monotonic() - self._dernier_envoi >= INTERVALLE_STATISTIQUES
+        ):
+            self.enregistrer_statistiques()
+        return valeur
+
+    # =========================================================================
+    # STATISTIQUES
+    # =========================================================================
+
+    def enregistrer_statistiques(self):
+        """Ajoute les comptes du processus au fichier de l'alias (verrouillé)."""
+        succes, echecs = self._succes, self._echecs
+        self._succes = self._echecs = 0
+        self._dernier_envoi = time.monotonic()
+        if not (succes or echecs):
+            return
+        try:
+            self._fichier_statistiques.parent.mkdir(parents=True, exist_ok=True)
+            descripteur = os.open(self._fichier_statistiques, os.O_RDWR | os.O_CREAT, 0o644)
+            with open(descripteur, 'r+') as fichier:
+                locks.lock(fichier, locks.LOCK_EX)
+                try:
+                    contenu = fichier.read()
+                    totaux = json.loads(contenu) if contenu else {'succes': 0, 'echecs': 0}
+                    totaux['succes'] += succes
+                    totaux['echecs'] += echecs
+                    fichier.seek(0)
+                    fichier.truncate()
+                    json.dump(totaux, fichier)
+                finally:
+                    locks.unlock(fichier)
+        except (OSError, ValueError, KeyError):
+            # Les statistiques ne doivent jamais faire échouer une lecture du cache
+            pass
+
+    def statistiques(self):
+        """{'succes': n, 'echecs': n} cumulés par tous les processus."""
+        self.enregistrer_statistiques()
+        try:
+            return json.loads(self._fichier_statistiques.read_text())
+        except (OSError, ValueError):
+            return {'succes': 0, 'echecs': 0}
+
+    def reinitialiser_statistiques(self):
+        self._succes = self._echecs = 0
+        self._fichier_statistiques.unlink(missing_ok=True)
+
+
+# Accès aux alias comme à django.core.cache.cache
+cache_pages = ConnectionProxy(caches, 'pages')
+cache_fragments = ConnectionProxy(caches, 'fragments')
+cache_sessions = ConnectionProxy(caches, 'sessions')
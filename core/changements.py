@@ -0,0 +1,186 @@
+"""
+Journal des changements pour la synchronisation incrémentale.
+
+Chaque écriture d'un objet suivi (actes, réclamations, rendez-vous, pages
+publiées) ajoute au journal de la mairie une entrée (modèle, identifiant,
+opération, version), dans la même transaction que l'écriture. La version
+compte les écritures de l'objet. Les routes `lot/` de l'API écrivent leurs
+entrées en une requête par lot (`journaliser_lot`).
+
+/api/changements/?since=<id> renvoie les entrées suivantes par identifiant
+croissant (voir core.api). Les entrées de moins de CHANGEMENTS_DELAI
+secondes ne sont pas encore servies : une transaction plus ancienne mais
+encore ouverte peut écrire un identifiant inférieur au dernier lu.
+
+`compacter()` supprime, au-delà de CHANGEMENTS_RETENTION_JOURS, les entrées
+remplacées par une plus récente du même objet puis les suppressions. Un
+client dont le curseur précède la dernière suppression compactée doit tout
+retélécharger (410).
+"""
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db.models import Exists, Max, OuterRef
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from taches.models import Tache
+from taches.registre import tache
+
+from .models import Changement, Configuration
+
+RETENTION = timedelta(days=getattr(settings, 'CHANGEMENTS_RETENTION_JOURS', 30))
+DELAI = timedelta(seconds=getattr(settings, 'CHANGEMENTS_DELAI', 10))
+
+# Modèles suivis et rôle requis pour lire leurs changements (None : tout le monde)
+MODELES_SUIVIS = {
+    'etat_civil.actenaissance': 'can_manage_etat_civil',
+    'etat_civil.actemariage': 'can_manage_etat_civil',
+    'etat_civil.actedeces': 'can_manage_etat_civil',
+    'etat_civil.livretfamille': 'can_manage_etat_civil',
+    'services.reclamation': 'is_agent',
+    'services.rendezvous': 'is_agent',
+    'wagtailcore.page': None,
+}
+
+# Clé de Configuration : identifiant de la dernière suppression compactée
+CLE_COMPACTION = 'changements.compaction'
+
+
+def modeles_lisibles(user):
+    """Labels des modèles dont `user` peut lire les changements."""
+    labels = []
+    for label, role in MODELES_SUIVIS.items():
+        if role is None:
+            labels.append(label)
+        elif user.is_authenticated and (user.is_admin() or getattr(user, role)()):
+            labels.append(label)
+    return labels
+
+
+def _versions(modele, objet_ids):
+    """Dernière version connue de chaque objet, en une requête."""
+    return dict(
+        Changement.objects.filter(modele=modele, objet_id__in=objet_ids)
+        .values('objet_id').annotate(derniere=Max('version'))
+        .values_list('objet_id', 'derniere')
+    )
+
+
+def journaliser_lot(modele, objet_ids, operation):
+    """Ajoute au journal une entrée par objet de `objet_ids` (label du modèle en minuscules)."""
+    objet_ids = [str(objet_id) for objet_id in objet_ids]
+    if not objet_ids:
+        return
+    versions = _versions(modele, objet_ids)
+    maintenant = timezone.now()
+    Changement.objects.bulk_create([
+        Changement(
+            modele=modele, objet_id=objet_id, operation=operation,
+            version=versions.get(objet_id, 0) + 1, date=maintenant,
+        )
+        for objet_id in objet_ids
+    ], batch_size=1000)
+
+
+def journaliser(modele, objet_id, operation):
+    journaliser_lot(modele, [objet_id], operation)
+
+
+def depuis(curseur, labels, limite):
+    """Entrées d'identifiant supérieur à `curseur` sur les modèles `labels`, stables (voir DELAI)."""
+    return list(
+        Changement.objects
+        .filter(pk__gt=curseur, modele__in=labels, date__lte=timezone.now() - DELAI)
+        .order_by('pk')[:limite]
+    )
+
+
+def curseur_courant():
+    """Identifiant de la dernière entrée stable."""
+    return Changement.objects.filter(date__lte=timezone.now() - DELAI).aggregate(Max('pk'))['pk__max'] or 0
+
+
+def curseur_minimal():
+    """Curseur en dessous duquel le journal a perdu des suppressions."""
+    configuration = Configuration.objects.filter(cle=CLE_COMPACTION).first()
+    return int(configuration.valeur) if configuration else 0
+
+
+@tache(nom='core.compacter_changements', priorite=Tache.PRIORITE_BASSE)
+def compacter():
+    """Supprime les entrées remplacées ou de suppression plus anciennes que la rétention."""
+    limite = timezone.now() - RETENTION
+    anciennes = Changement.objects.filter(date__lt=limite)
+    suivantes = Changement.objects.filter(
+        modele=OuterRef('modele'), objet_id=OuterRef('objet_id'), pk__gt=OuterRef('pk'),
+    )
+    remplacees, _ = anciennes.filter(Exists(suivantes)).delete()
+
+    suppressions = anciennes.filter(operation=Changement.SUPPRESSION)
+    derniere = suppressions.aggregate(Max('pk'))['pk__max']
+    supprimees = 0
+    if derniere is not None:
+        # La version d'un objet supprimé n'a plus de suite : l'entrée peut disparaître
+        supprimees, _ = suppressions.filter(pk__lte=derniere).delete()
+        Configuration.objects.update_or_create(
+            cle=CLE_COMPACTION,
+            defaults={
+                'valeur': str(max(derniere, curseur_minimal())),
+                'description': "Dernier changement de suppression compacté (voir core.changements)",
+            },
+        )
+    return remplacees + supprimees
+
+
+# =============================================================================
+# SIGNAUX
+# =============================================================================
+
+def _apres_enregistrement(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    operation = Changement.CREATION if created else Changement.MODIFICATION
+    journaliser(sender._meta.label_lower, instance.pk, operation)
+
+
+def _apres_suppression(sender, instance, **kwargs):
+    journaliser(sender._meta.label_lower, instance.pk, Changement.SUPPRESSION)
+
+
+def _apres_publication(sender, instance, **kwargs):
+    premiere = instance.first_published_at == instance.last_published_at
+    journaliser('wagtailcore.page', instance.pk, Changement.CREATION if premiere else Changement.MODIFICATION)
+
+
+def _apres_depublication(sender, instance, **kwargs):
+    journaliser('wagtailcore.page', instance.pk, Changement.SUPPRESSION)
+
+
+def _apres_suppression_page(sender, instance, **kwargs):
+    if instance.live:
+        journaliser('wagtailcore.page', instance.pk, Changement.SUPPRESSION)
+
+
+def _apres_changement_url(sender, instance, **kwargs):
+    # Slug modifié ou page déplacée : l'URL des sous-pages publiées change aussi
+    pks = instance.get_descendants(inclusive=True).live().values_list('pk', flat=True)
+    journaliser_lot('wagtailcore.page', list(pks), Changement.MODIFICATION)
+
+
+def connecter_signaux():
+    from wagtail.models import Page
+    from wagtail.signals import page_published, page_slug_changed, page_unpublished, post_page_move
+
+    for label in MODELES_SUIVIS:
+        if label == 'wagtailcore.page':
+            continue
+        model = apps.get_model(label)
+        post_save.connect(_apres_enregistrement, sender=model)
+        post_delete.connect(_apres_suppression, sender=model)
+    page_published.connect(_apres_publication)
+    page_unpublished.connect(_apres_depublication)
+    post_delete.connect(_apres_suppression_page, sender=Page)
+    for signal in (page_slug_changed, post_page_move):
+        signal.connect(_apres_changement_url)
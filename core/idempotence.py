@@ -0,0 +1,150 @@
+"""
+Envois de formulaires idempotents.
+
+Un citoyen sur un réseau instable renvoie souvent le même formulaire : la
+réponse perdue, il clique de nouveau. Pour les vues de IDEMPOTENCE_VUES,
+le middleware core.middleware.IdempotenceMiddleware calcule l'empreinte du
+POST : mairie, hôte, chemin, auteur (utilisateur connecté, sinon adresse
+IP) et champs envoyés hors jeton CSRF, ou l'en-tête Idempotency-Key s'il
+est fourni. La première requête réserve l'empreinte, exécute la vue et
+enregistre sa réponse ; un envoi identique avant IDEMPOTENCE_DUREE reçoit
+cette réponse sans que la vue soit appelée. Une seule lecture par clé
+primaire suffit à reconnaître un doublon.
+
+Un doublon arrivé pendant le traitement du premier attend sa réponse
+quelques secondes. Une erreur serveur libère l'empreinte : le renvoi est
+alors traité normalement.
+"""
+import hashlib
+import ipaddress
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse
+from django.utils import timezone
+
+from taches.models import Tache
+from taches.registre import tache
+
+from .models import RequeteIdempotente, Soumission
+from .tenants import schema_courant
+
+DUREE = timedelta(seconds=getattr(settings, 'IDEMPOTENCE_DUREE', 24 * 3600))
+VUES = set(getattr(settings, 'IDEMPOTENCE_VUES', []))
+# Conservation des clés des formulaires envoyés hors ligne (voir core.soumissions)
+DUREE_SOUMISSIONS = timedelta(days=getattr(settings, 'IDEMPOTENCE_SOUMISSIONS_JOURS', 30))
+
+ATTENTE = 5
+TAILLE_MAX = 512 * 1024
+EN_TETES_REJOUES = ['Content-Type', 'Location']
+
+PROXIES = [ipaddress.ip_network(reseau) for reseau in getattr(settings, 'PROXIES_DE_CONFIANCE', [])]
+
+
+def _proxy_de_confiance(adresse):
+    try:
+        adresse = ipaddress.ip_address(adresse)
+    except ValueError:
+        return False
+    return any(adresse in reseau for reseau in PROXIES)
+
+
+def adresse_client(request):
+    """
+    Adresse IP du client. L'en-tête X-Real-IP n'est lu que si la requête
+    vient d'un proxy de PROXIES_DE_CONFIANCE (nginx) : un client qui
+    s'adresse directement au serveur ne peut pas choisir son adresse.
+    """
+    adresse = request.META.get('REMOTE_ADDR', '')
+    if _proxy_de_confiance(adresse):
+        return request.META.get('HTTP_X_REAL_IP') or adresse
+    return adresse
+
+
+def empreinte(request):
+    """Empreinte de l'envoi : deux envois identiques du même auteur ont la même."""
+    if request.user.is_authenticated:
+        auteur = f'utilisateur:{request.user.pk}'
+    else:
+        # Pas la session : la réponse perdue a pu créer celle du premier envoi
+        auteur = f'ip:{adresse_client(request)}'
+
+    cle = request.headers.get('Idempotency-Key')
+    if cle:
+        contenu = ['cle', cle]
+    elif request.content_type in ('application/x-www-form-urlencoded', 'multipart/form-data'):
+        contenu = [
+            sorted((nom, valeurs) for nom, valeurs in request.POST.lists() if nom != 'csrfmiddlewaretoken'),
+            sorted(
+                (nom, fichier.name, fichier.size)
+                for nom, fichiers in request.FILES.lists() for fichier in fichiers
+            ),
+        ]
+    else:
+        contenu = hashlib.sha256(request.body).hexdigest()
+
+    donnees = [schema_courant(), request.get_host(), request.path, auteur, contenu]
+    return hashlib.sha256(json.dumps(donnees).encode()).hexdigest()
+
+
+def reserver(cle):
+    """Réponse enregistrée (ou en cours) pour `cle`, ou None après avoir réservé `cle`."""
+    maintenant = timezone.now()
+    existante = RequeteIdempotente.objects.filter(pk=cle).first()
+    if existante is not None:
+        if existante.expire > maintenant:
+            return existante
+        existante.delete()
+    try:
+        with transaction.atomic():
+            RequeteIdempotente.objects.create(empreinte=cle, expire=maintenant + DUREE)
+    except IntegrityError:
+        # Envoi identique réservé au même instant par un autre worker
+        return RequeteIdempotente.objects.filter(pk=cle).first()
+    return None
+
+
+def attendre(cle):
+    """Attend la réponse du premier envoi ; None si elle n'arrive pas à temps."""
+    limite = time.monotonic() + ATTENTE
+    while time.monotonic() < limite:
+        time.sleep(0.25)
+        requete = RequeteIdempotente.objects.filter(pk=cle).first()
+        if requete is None:
+            return None
+        if requete.statut is not None:
+            return requete
+    return None
+
+
+def enregistrer(cle, response):
+    """Enregistre la réponse de la vue, ou libère `cle` si elle ne doit pas être rejouée."""
+    contenu = b'' if response.streaming else response.content
+    if response.status_code >= 500 or response.streaming or len(contenu) > TAILLE_MAX:
+        RequeteIdempotente.objects.filter(pk=cle).delete()
+        return
+    RequeteIdempotente.objects.filter(pk=cle).update(
+        statut=response.status_code,
+        en_tetes={nom: response[nom] for nom in EN_TETES_REJOUES if response.has_header(nom)},
+        contenu=contenu,
+    )
+
+
+def rejouer(requete):
+    response = HttpResponse(bytes(requete.contenu), status=requete.statut)
+    for nom, valeur in requete.en_tetes.items():
+        response[nom] = valeur
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+@tache(nom='core.purger_idempotence', priorite=Tache.PRIORITE_BASSE)
+def purger():
+    """Supprime les réponses expirées et les clés de soumission hors ligne trop anciennes."""
+    maintenant = timezone.now()
+    requetes, _ = RequeteIdempotente.objects.filter(expire__lte=maintenant).delete()
+    soumissions, _ = Soumission.objects.filter(date__lt=maintenant - DUREE_SOUMISSIONS).delete()
+    return requetes + soumissions
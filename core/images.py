@@ -0,0 +1,208 @@
+"""
+Normalisation des images à l'upload.
+
+Les photos prises au téléphone (4000px et plus, 5 à 8 Mo) sont réduites à
+une dimension maximale, réorientées puis débarrassées de leurs métadonnées
+EXIF (dont la géolocalisation) et recompressées. Le traitement est confié
+à la file de tâches (application taches) : la requête n'attend pas.
+
+Sont couverts : les images Wagtail (cms.ImagePersonnalisee) et les
+ImageField des applications contenu, services et tenants.
+"""
+import io
+import os
+from dataclasses import dataclass
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models.signals import post_init, post_save
+from PIL import Image, ImageOps
+
+from taches.models import Tache
+from taches.registre import tache
+
+
+DIMENSION_MAX = getattr(settings, 'IMAGES_UPLOAD_DIMENSION_MAX', 2560)
+QUALITE = getattr(settings, 'IMAGES_UPLOAD_QUALITE', 82)
+
+# ImageField normalisés : (modèle, champ)
+CHAMPS_IMAGES = [
+    ('contenu.Article', 'image'),
+    ('contenu.Evenement', 'image'),
+    ('contenu.ProjetMunicipal', 'image'),
+    ('services.Reclamation', 'photo'),
+    ('tenants.Mairie', 'logo'),
+]
+
+# Formats conservés tels quels ; les autres (BMP, TIFF, HEIC...) passent en JPEG
+FORMATS_WEB = {'JPEG', 'PNG', 'WEBP'}
+
+OPTIONS_ENREGISTREMENT = {
+    'JPEG': {'quality': QUALITE, 'optimize': True, 'progressive': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': QUALITE},
+}
+
+EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp'}
+
+@dataclass
+class ImageNormalisee:
+    contenu: bytes
+    format: str
+    largeur: int
+    hauteur: int
+
+    @property
+    def extension(self):
+        return EXTENSIONS[self.format]
+
+
+def normaliser_image(fichier, dimension_max=DIMENSION_MAX):
+    """
+    Réduit, réoriente et recompresse une image sans ses métadonnées.
+    Renvoie None si l'image est déjà conforme (ou animée).
+    """
+    with Image.open(fichier) as image:
+        if getattr(image, 'is_animated', False):
+            return None
+
+        format_origine = image.format
+        a_exif = bool(image.info.get('exif'))
+        trop_grande = max(image.size) > dimension_max
+        if not (a_exif or trop_grande or format_origine not in FORMATS_WEB):
+            return None
+
+        # Appliquer l'orientation EXIF avant de supprimer les métadonnées
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((dimension_max, dimension_max), Image.LANCZOS)
+
+        format_sortie = format_origine if format_origine in FORMATS_WEB else 'JPEG'
+        if format_sortie == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+
+        sortie = io.BytesIO()
+        image.save(sortie, format_sortie, **OPTIONS_ENREGISTREMENT[format_sortie])
+        return ImageNormalisee(sortie.getvalue(), format_sortie, image.width, image.height)
+
+
+def _enregistrer_normalisee(fieldfile, resultat):
+    """Enregistre la version normalisée à côté de l'original ; renvoie son nom."""
+    nouveau_nom = os.path.splitext(fieldfile.name)[0] + resultat.extension
+    return fieldfile.storage.save(nouveau_nom, ContentFile(resultat.contenu))
+
+
+def _supprimer_ancien(storage, ancien_nom, nouveau_nom):
+    # Après la mise à jour de la ligne : l'objet ne pointe jamais vers un fichier absent
+    if nouveau_nom != ancien_nom:
+        storage.delete(ancien_nom)
+
+
+@tache(nom='core.normaliser_champ', priorite=Tache.PRIORITE_BASSE)
+def normaliser_champ(label, champ, pk):
+    """Normalise l'ImageField `champ` de l'objet `label` / `pk`."""
+    Model = apps.get_model(label)
+    obj = Model._default_manager.filter(pk=pk).first()
+    if obj is None or not getattr(obj, champ):
+        return
+
+    fieldfile = getattr(obj, champ)
+    with fieldfile.open('rb') as f:
+        resultat = normaliser_image(f)
+    if resultat is None:
+        return
+
+    field = Model._meta.get_field(champ)
+    ancien_nom = fieldfile.name
+    valeurs = {champ: _enregistrer_normalisee(fieldfile, resultat)}
+    if field.width_field:
+        valeurs[field.width_field] = resultat.largeur
+    if field.height_field:
+        valeurs[field.height_field] = resultat.hauteur
+    # update() : ne redéclenche pas post_save
+    Model._default_manager.filter(pk=pk).update(**valeurs)
+    _supprimer_ancien(fieldfile.storage, ancien_nom, valeurs[champ])
+
+
+@tache(nom='core.normaliser_image_wagtail', priorite=Tache.PRIORITE_BASSE)
+def normaliser_image_wagtail(pk):
+    """Normalise l'original d'une image Wagtail et invalide ses renditions et caches."""
+    from wagtail.images import get_image_model
+
+    ImageModel = get_image_model()
+    image = ImageModel.objects.filter(pk=pk).first()
+    if image is None:
+        return
+
+    with image.open_file() as f:
+        resultat = normaliser_image(f)
+    if resultat is None:
+        return
+
+    ratio = resultat.largeur / image.width
+    ancien_nom = image.file.name
+    image.file.name = _enregistrer_normalisee(image.file, resultat)
+    image.width = resultat.largeur
+    image.height = resultat.hauteur
+    image._set_image_file_metadata()
+    image.file.close()
+
+    valeurs = {
+        'file': image.file.name,
+        'width': image.width,
+        'height': image.height,
+        'file_size': image.file_size,
+        'file_hash': image.file_hash,
+    }
+    # Le point focal est exprimé en pixels de l'original
+    if image.has_focal_point():
+        for attr in ('focal_point_x', 'focal_point_y', 'focal_point_width', 'focal_point_height'):
+            valeurs[attr] = round(getattr(image, attr) * ratio)
+
+    ImageModel.objects.filter(pk=pk).update(**valeurs)
+    _supprimer_ancien(image.file.storage, ancien_nom, image.file.name)
+    image.renditions.all().delete()
+
+    # update() n'envoie pas post_save : périmer ici les blocs et l'API en cache
+    from cms import api, cache_blocs
+    cache_blocs.invalider_objet(ImageModel._meta.label_lower, pk)
+    api.invalider()
+
+
+def surveiller_fichier(model, champ, fonction, *args):
+    """Met en file `fonction(*args, pk)` à chaque nouveau fichier dans `champ`."""
+    attribut = f'_{champ}_nom_initial'
+
+    def nom_fichier(instance):
+        # Lecture directe de __dict__ : pas de requête pour un champ différé
+        valeur = instance.__dict__.get(champ)
+        return getattr(valeur, 'name', valeur) or ''
+
+    def memoriser(sender, instance, **kwargs):
+        setattr(instance, attribut, nom_fichier(instance))
+
+    def apres_enregistrement(sender, instance, update_fields=None, **kwargs):
+        if update_fields is not None and champ not in update_fields:
+            return
+        nom = nom_fichier(instance)
+        if not nom or nom == getattr(instance, attribut, None):
+            return
+        setattr(instance, attribut, nom)
+        fonction.differer(*args, instance.pk)
+
+    post_init.connect(memoriser, sender=model, weak=False)
+    post_save.connect(apres_enregistrement, sender=model, weak=False)
+
+
+def connecter_signaux():
+    """Branche la normalisation sur les modèles d'images installés."""
+    from wagtail.images import get_image_model
+
+    surveiller_fichier(get_image_model(), 'file', normaliser_image_wagtail)
+    for label, champ in CHAMPS_IMAGES:
+        try:
+            model = apps.get_model(label)
+        except LookupError:
+            # Application non installée (ex: tenants en SQLite)
+            continue
+        surveiller_fichier(model, champ, normaliser_champ, label, champ)
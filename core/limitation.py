@@ -0,0 +1,91 @@
+"""
+Limitation du débit des vues publiques (seaux à jetons).
+
+Chaque règle de LIMITATION_DEBIT couvre une ou plusieurs vues (nom d'URL)
+et définit des seaux par portée : `ip` (un seau par adresse client) et
+`mairie` (un seau commun à tous les clients de la mairie, contre un
+moissonnage réparti sur de nombreuses adresses). Un seau contient au plus
+`capacite` jetons et se remplit de `capacite` jetons par `periode`
+secondes ; chaque requête en consomme un.
+
+    LIMITATION_DEBIT = {
+        'suivi_acte': {
+            'vues': ['etat_civil:suivi_form', 'etat_civil:suivi'],
+            'ip': (20, 60),
+            'mairie': (600, 60),
+            'methodes': ['GET', 'POST'],   # facultatif : toutes par défaut
+        },
+    }
+
+Les seaux sont dans le cache 'limitation' (à défaut 'default'), partagé
+par les workers : une lecture et, si la requête passe, une écriture. Le
+middleware core.middleware.LimitationDebitMiddleware refuse une requête
+épuisée (429) avant toute requête en base.
+
+Deux workers qui lisent le même seau au même instant peuvent laisser
+passer une requête de trop : la limite protège contre les abus, pas au
+jeton près.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import InvalidCacheBackendError
+
+from .tenants import schema_courant
+
+REGLES = getattr(settings, 'LIMITATION_DEBIT', {})
+PORTEES = ('ip', 'mairie')
+
+# Nom de vue → (nom de la règle, règle)
+REGLES_PAR_VUE = {
+    vue: (nom, regle)
+    for nom, regle in REGLES.items()
+    for vue in regle['vues']
+}
+
+
+def _cache():
+    try:
+        return caches['limitation']
+    except InvalidCacheBackendError:
+        return caches['default']
+
+
+def regle(nom_vue, methode):
+    """(nom, règle) applicable à la vue `nom_vue` pour `methode`, ou None."""
+    trouvee = REGLES_PAR_VUE.get(nom_vue)
+    if trouvee is None:
+        return None
+    methodes = trouvee[1].get('methodes')
+    if methodes and methode not in methodes:
+        return None
+    return trouvee
+
+
+def consommer(nom, regle, adresse):
+    """Consomme un jeton de chaque seau de la règle ; 0 si accepté, sinon secondes d'attente."""
+    schema = schema_courant()
+    seaux = {}
+    for portee in PORTEES:
+        if portee in regle:
+            suffixe = f':{adresse}' if portee == 'ip' else ''
+            seaux[f'limite:{schema}:{nom}:{portee}{suffixe}'] = regle[portee]
+
+    cache = _cache()
+    etats = cache.get_many(list(seaux))
+    maintenant = time.time()
+    attente = 0
+    for cle, (capacite, periode) in seaux.items():
+        debit = capacite / periode
+        jetons, date = etats.get(cle, (capacite, maintenant))
+        jetons = min(capacite, jetons + (maintenant - date) * debit)
+        if jetons < 1:
+            attente = max(attente, (1 - jetons) / debit)
+        etats[cle] = (jetons - 1, maintenant)
+
+    if attente:
+        return attente
+    # Après une période sans requête le seau est plein : inutile de le garder plus longtemps
+    cache.set_many(etats, max(periode for _, periode in seaux.values()))
+    return 0
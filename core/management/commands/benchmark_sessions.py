@@ -0,0 +1,107 @@
+"""Mesure le coût des sessions par requête selon le moteur.
+
+Usage:
+  python manage.py benchmark_sessions [--requetes=200]
+
+Chaque moteur (base, cache + base, cookie signé, core.sessions) sert N
+requêtes à travers SessionMiddleware, pour une session connectée puis une
+session anonyme, selon trois usages :
+  - « lecture »      : la vue lit la session
+  - « réécriture »   : la vue réaffecte une valeur identique
+  - « modification » : la vue change une valeur
+Le rapport donne le temps et le nombre de requêtes SQL par requête HTTP.
+Tout est annulé à la fin (rollback).
+"""
+import statistics
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+MOTEURS = [
+    ('base', 'django.contrib.sessions.backends.db'),
+    ('cache + base', 'django.contrib.sessions.backends.cached_db'),
+    ('cookie signé', 'django.contrib.sessions.backends.signed_cookies'),
+    ('core.sessions', 'core.sessions'),
+]
+
+
+def _lecture(session):
+    session.get('compteur')
+
+
+def _reecriture(session):
+    session['compteur'] = session.get('compteur', 0)
+
+
+def _modification(session):
+    session['compteur'] = session.get('compteur', 0) + 1
+
+
+USAGES = [('lecture', _lecture), ('réécriture', _reecriture), ('modification', _modification)]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark per-request session overhead for each session engine'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requetes', type=int, default=200, help='Requests per engine and scenario')
+
+    def handle(self, *args, **options):
+        nombre = options['requetes']
+        self.factory = RequestFactory()
+
+        self.stdout.write(
+            f"{'Moteur':<16}{'Session':<10}{'Usage':<14}{'ms/requête':>12}{'SQL/requête':>13}"
+        )
+        with transaction.atomic():
+            for nom, moteur in MOTEURS:
+                with override_settings(SESSION_ENGINE=moteur):
+                    for connectee in (True, False):
+                        for usage, vue in USAGES:
+                            duree, requetes = self.mesurer(moteur, connectee, vue, nombre)
+                            self.stdout.write(
+                                f"{nom:<16}{'connectée' if connectee else 'anonyme':<10}{usage:<14}"
+                                f"{duree:>12.3f}{requetes:>13.2f}"
+                            )
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS('Benchmark terminé'))
+
+    def mesurer(self, moteur, connectee, vue, nombre):
+        """Temps moyen (ms) et requêtes SQL moyennes par requête HTTP."""
+        def initialiser(request):
+            if connectee:
+                request.session[SESSION_KEY] = '1'
+            request.session['compteur'] = 0
+            return HttpResponse()
+
+        def servir(request):
+            vue(request.session)
+            return HttpResponse()
+
+        cookie = self.requete(SessionMiddleware(initialiser), None)
+        middleware = SessionMiddleware(servir)
+        durees = []
+        with CaptureQueriesContext(connection) as requetes:
+            for _ in range(nombre):
+                debut = time.perf_counter()
+                cookie = self.requete(middleware, cookie)
+                durees.append((time.perf_counter() - debut) * 1000)
+        import_module(moteur).SessionStore(cookie).delete()
+        return statistics.mean(durees), len(requetes) / nombre
+
+    def requete(self, middleware, cookie):
+        """Sert une requête ; renvoie le cookie de session à renvoyer ensuite."""
+        request = self.factory.get('/')
+        if cookie:
+            request.COOKIES[settings.SESSION_COOKIE_NAME] = cookie
+        response = middleware(request)
+        morsel = response.cookies.get(settings.SESSION_COOKIE_NAME)
+        return morsel.value if morsel and morsel.value else cookie
@@ -0,0 +1,28 @@
+"""Compacte le journal des changements de chaque mairie.
+
+Usage:
+  python manage.py compacter_changements [--schema=code ...]
+
+Supprime les entrées plus anciennes que CHANGEMENTS_RETENTION_JOURS
+remplacées par une entrée plus récente du même objet, puis les
+suppressions (voir core.changements). À lancer chaque nuit.
+"""
+from django.core.management.base import BaseCommand
+
+from core import changements
+from core.tenants import schema_context, schemas_mairies
+
+
+class Command(BaseCommand):
+    help = 'Prune superseded and old deletion entries from the change log'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', action='append', dest='schemas',
+                            help='Only compact this schema (repeatable)')
+
+    def handle(self, *args, **options):
+        for schema in options['schemas'] or schemas_mairies():
+            with schema_context(schema):
+                supprimees = changements.compacter()
+                self.stdout.write(f'{schema} : {supprimees} entrée(s) supprimée(s)')
+        self.stdout.write(self.style.SUCCESS('Journal des changements compacté'))
@@ -0,0 +1,37 @@
+"""Génère le plan du site (sitemap) et le robots.txt de chaque site.
+
+Usage:
+  python manage.py generer_plan_site [--schema=code ...]
+
+Réécrit tous les fichiers de chaque site Wagtail de chaque mairie (voir
+core.plan_site). À lancer au déploiement ou après un import massif ; les
+publications courantes mettent le plan à jour par la file de tâches.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from wagtail.models import Site
+
+from core import plan_site
+from core.tenants import schema_context, schemas_mairies
+
+
+class Command(BaseCommand):
+    help = 'Write the static sitemap files and robots.txt of every site'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', action='append', dest='schemas',
+                            help='Only generate for this schema (repeatable)')
+
+    def handle(self, *args, **options):
+        for schema in options['schemas'] or schemas_mairies():
+            with schema_context(schema):
+                for site in Site.objects.all():
+                    debut = time.perf_counter()
+                    urls = plan_site.generer(site)
+                    self.stdout.write(
+                        f'{schema} / {site.hostname} : {urls} URL(s) en '
+                        f'{time.perf_counter() - debut:.2f} s → {plan_site.repertoire(site)}'
+                    )
+        self.stdout.write(self.style.SUCCESS('Plan du site généré'))
@@ -0,0 +1,28 @@
+"""Supprime les réponses idempotentes expirées de chaque mairie.
+
+Usage:
+  python manage.py purger_idempotence [--schema=code ...]
+
+Supprime les réponses enregistrées au-delà de IDEMPOTENCE_DUREE et les
+clés des formulaires hors ligne au-delà de IDEMPOTENCE_SOUMISSIONS_JOURS
+(voir core.idempotence). À lancer chaque nuit.
+"""
+from django.core.management.base import BaseCommand
+
+from core import idempotence
+from core.tenants import schema_context, schemas_mairies
+
+
+class Command(BaseCommand):
+    help = 'Delete expired idempotent responses and old offline submission keys'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', action='append', dest='schemas',
+                            help='Only purge this schema (repeatable)')
+
+    def handle(self, *args, **options):
+        for schema in options['schemas'] or schemas_mairies():
+            with schema_context(schema):
+                supprimees = idempotence.purger()
+                self.stdout.write(f'{schema} : {supprimees} entrée(s) supprimée(s)')
+        self.stdout.write(self.style.SUCCESS('Réponses idempotentes purgées'))
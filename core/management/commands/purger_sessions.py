@@ -0,0 +1,33 @@
+"""Supprime les sessions expirées de chaque mairie.
+
+Usage:
+  python manage.py purger_sessions [--schema=code ...]
+
+Équivalent de clearsessions, schéma par schéma (voir core.sessions), puis
+suppression des fichiers expirés du cache des sessions. À lancer chaque
+nuit.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+
+from core import sessions
+from core.tenants import schema_context, schemas_mairies
+
+
+class Command(BaseCommand):
+    help = 'Delete expired sessions of each tenant schema'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', action='append', dest='schemas',
+                            help='Only purge this schema (repeatable)')
+
+    def handle(self, *args, **options):
+        for schema in options['schemas'] or schemas_mairies():
+            with schema_context(schema):
+                supprimees = sessions.purger()
+                self.stdout.write(f'{schema} : {supprimees} session(s) supprimée(s)')
+        # Les fichiers de toutes les mairies sont dans le même dossier
+        fichiers = caches[settings.SESSION_CACHE_ALIAS].purger_expirees()
+        self.stdout.write(f'Cache : {fichiers} session(s) expirée(s) supprimée(s)')
+        self.stdout.write(self.style.SUCCESS('Sessions expirées purgées'))
@@ -0,0 +1,42 @@
+"""Affiche le taux de lectures trouvées de chaque alias de cache.
+
+Usage:
+  python manage.py statistiques_cache [--alias=pages ...] [--reinitialiser]
+
+Les comptes sont cumulés par tous les processus du serveur depuis la
+dernière réinitialisation (voir core.cache) ; un processus écrit les siens
+toutes les 1000 lectures ou toutes les minutes.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+
+from core.cache import CacheFichiersPartage
+
+
+class Command(BaseCommand):
+    help = 'Show cache hit/miss ratios per cache alias'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alias', action='append', dest='alias',
+                            help='Only this cache alias (repeatable)')
+        parser.add_argument('--reinitialiser', action='store_true',
+                            help='Reset the counters after displaying them')
+
+    def handle(self, *args, **options):
+        for alias in options['alias'] or settings.CACHES:
+            cache = caches[alias]
+            if not isinstance(cache, CacheFichiersPartage):
+                self.stdout.write(f'{alias} : pas de statistiques ({type(cache).__name__})')
+                continue
+            stats = cache.statistiques()
+            lectures = stats['succes'] + stats['echecs']
+            taux = f"{100 * stats['succes'] / lectures:.1f} %" if lectures else '-'
+            self.stdout.write(
+                f"{alias} : {lectures} lecture(s), {stats['succes']} trouvée(s), "
+                f"{stats['echecs']} manquée(s), taux {taux}"
+            )
+            if options['reinitialiser']:
+                cache.reinitialiser_statistiques()
+        if options['reinitialiser']:
+            self.stdout.write(self.style.SUCCESS('Statistiques réinitialisées'))
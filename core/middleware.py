@@ -0,0 +1,98 @@
+"""
+Middlewares du noyau.
+
+Tous fonctionnent en WSGI comme en ASGI (MiddlewareMixin) : un seul
+middleware synchrone dans la chaîne ferait exécuter chaque requête ASGI
+dans un thread, vues asynchrones comprises.
+"""
+import math
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.http import HttpResponse
+from django.utils.deprecation import MiddlewareMixin
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import idempotence, limitation
+
+
+class FichiersStatiquesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware utilisable en ASGI. En production nginx sert les
+    fichiers statiques ; il ne reste ici qu'une recherche dans un dict.
+    """
+
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
+
+
+class IdempotenceMiddleware(MiddlewareMixin):
+    """
+    Rejoue la réponse d'un envoi identique aux vues de IDEMPOTENCE_VUES au
+    lieu d'appeler de nouveau la vue (voir core.idempotence). Placé après
+    CsrfViewMiddleware : un envoi refusé n'est jamais enregistré.
+    """
+
+    def process_response(self, request, response):
+        cle = getattr(request, 'empreinte_idempotence', None)
+        if cle is not None:
+            idempotence.enregistrer(cle, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method != 'POST' or request.resolver_match.view_name not in idempotence.VUES:
+            return None
+        cle = idempotence.empreinte(request)
+        requete = idempotence.reserver(cle)
+        if requete is None:
+            request.empreinte_idempotence = cle
+            return None
+        if requete.statut is None:
+            requete = idempotence.attendre(cle)
+            if requete is None:
+                response = HttpResponse(
+                    "Votre demande est en cours de traitement. Réessayez dans quelques instants.",
+                    status=409, content_type='text/plain; charset=utf-8',
+                )
+                response['Retry-After'] = '5'
+                return response
+        return idempotence.rejouer(requete)
+
+
+class LimitationDebitMiddleware(MiddlewareMixin):
+    """
+    Refuse (429) les requêtes aux vues de LIMITATION_DEBIT dont un seau est
+    vide (voir core.limitation). Placé avant les sessions et
+    l'authentification : une requête refusée n'interroge pas la base.
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        trouvee = limitation.regle(request.resolver_match.view_name, request.method)
+        if trouvee is None:
+            return None
+        attente = limitation.consommer(*trouvee, idempotence.adresse_client(request))
+        if not attente:
+            return None
+        response = HttpResponse(
+            "Trop de requêtes. Réessayez dans quelques instants.",
+            status=429, content_type='text/plain; charset=utf-8',
+        )
+        response['Retry-After'] = str(math.ceil(attente))
+        return response
@@ -0,0 +1,30 @@
+# Generated by Django 5.1 on 2026-10-19 19:33
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Changement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modele', models.CharField(max_length=100)),
+                ('objet_id', models.CharField(max_length=64)),
+                ('operation', models.CharField(choices=[('c', 'Création'), ('u', 'Modification'), ('d', 'Suppression')], max_length=1)),
+                ('version', models.PositiveIntegerField()),
+                ('date', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Changement',
+                'verbose_name_plural': 'Changements',
+                'indexes': [models.Index(fields=['modele', 'objet_id', '-version'], name='changement_objet_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1 on 2026-10-19 19:36
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_changement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Soumission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cle', models.UUIDField(unique=True)),
+                ('formulaire', models.CharField(max_length=50)),
+                ('resultat', models.JSONField(default=dict)),
+                ('date', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Soumission hors ligne',
+                'verbose_name_plural': 'Soumissions hors ligne',
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1 on 2026-10-19 19:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_soumission'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequeteIdempotente',
+            fields=[
+                ('empreinte', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('statut', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('en_tetes', models.JSONField(default=dict)),
+                ('contenu', models.BinaryField(default=b'')),
+                ('expire', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Requête idempotente',
+                'verbose_name_plural': 'Requêtes idempotentes',
+            },
+        ),
+    ]
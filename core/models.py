@@ -2,6 +2,11 @@
 Modèles de base pour le CMS.
 """
 from django.db import models
+from django.utils import timezone
+
+from wagtail.search import index
+
+from recherche.ponderation import BOOST_CORPS, BOOST_RESUME, BOOST_TITRE
 
 
 class Configuration(models.Model):
@@ -18,7 +23,7 @@ class Configuration(models.Model):
         return self.cle
 
 
-class PageStatique(models.Model):
+class PageStatique(index.Indexed, models.Model):
     """Pages statiques du site (À propos, Mentions légales, etc.)"""
     titre = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
@@ -29,6 +34,14 @@ class PageStatique(models.Model):
     date_creation = models.DateTimeField(auto_now_add=True)
     date_modification = models.DateTimeField(auto_now=True)
     
+    search_fields = [
+        index.SearchField('titre', boost=BOOST_TITRE),
+        index.AutocompleteField('titre'),
+        index.SearchField('meta_description', boost=BOOST_RESUME),
+        index.SearchField('contenu', boost=BOOST_CORPS),
+        index.FilterField('publie'),
+    ]
+    
     class Meta:
         verbose_name = "Page statique"
         verbose_name_plural = "Pages statiques"
@@ -36,3 +49,73 @@ class PageStatique(models.Model):
     
     def __str__(self):
         return self.titre
+
+
+class Changement(models.Model):
+    """
+    Journal des modifications (ajout seul) lu par /api/changements/.
+    Une entrée par écriture : modèle, identifiant, opération et version de l'objet.
+    """
+
+    CREATION = 'c'
+    MODIFICATION = 'u'
+    SUPPRESSION = 'd'
+
+    OPERATION_CHOICES = [
+        (CREATION, 'Création'),
+        (MODIFICATION, 'Modification'),
+        (SUPPRESSION, 'Suppression'),
+    ]
+
+    modele = models.CharField(max_length=100)
+    objet_id = models.CharField(max_length=64)
+    operation = models.CharField(max_length=1, choices=OPERATION_CHOICES)
+    version = models.PositiveIntegerField()
+    date = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Changement"
+        verbose_name_plural = "Changements"
+        indexes = [
+            models.Index(fields=['modele', 'objet_id', '-version'], name='changement_objet_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.modele}:{self.objet_id} {self.operation} v{self.version}"
+
+
+class Soumission(models.Model):
+    """
+    Formulaire citoyen reçu par /api/soumissions/, identifié par la clé
+    générée sur l'appareil : un renvoi du même formulaire n'est pas réenregistré.
+    """
+    cle = models.UUIDField(unique=True)
+    formulaire = models.CharField(max_length=50)
+    resultat = models.JSONField(default=dict)
+    date = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Soumission hors ligne"
+        verbose_name_plural = "Soumissions hors ligne"
+
+    def __str__(self):
+        return f"{self.formulaire} {self.cle}"
+
+
+class RequeteIdempotente(models.Model):
+    """
+    Réponse d'un envoi de formulaire citoyen, rejouée aux envois identiques
+    jusqu'à son expiration (voir core.idempotence). Sans statut : en cours.
+    """
+    empreinte = models.CharField(max_length=64, primary_key=True)
+    statut = models.PositiveSmallIntegerField(null=True, blank=True)
+    en_tetes = models.JSONField(default=dict)
+    contenu = models.BinaryField(default=b'')
+    expire = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = "Requête idempotente"
+        verbose_name_plural = "Requêtes idempotentes"
+
+    def __str__(self):
+        return self.empreinte
@@ -0,0 +1,294 @@
+"""
+Plan du site (sitemap) et robots.txt statiques, par site Wagtail.
+
+Les fichiers sont écrits dans PLAN_SITE_RACINE/<nom d'hôte du site>/ :
+sitemap.xml (index), sitemap-1.xml.gz, sitemap-2.xml.gz... (au plus
+PLAN_SITE_URLS_PAR_FICHIER URLs chacun) et robots.txt. nginx les sert
+directement ; à défaut, la vue core.views.fichier_plan_site les lit sur
+disque. Un robot d'indexation ne coûte donc aucune requête en base.
+
+Le plan contient les pages publiées et publiques du site et, pour le site
+par défaut de la mairie, les articles, événements et projets publiés.
+
+`generer(site)` écrit tout le plan. Une publication, une dépublication, un
+déplacement ou la modification d'un objet publié met en file
+`mettre_a_jour(cles)`, qui ne réécrit que les fichiers contenant les
+entrées concernées, puis l'index. Le manifeste (manifeste.json) garde,
+pour chaque entrée, ses URLs et le numéro de son fichier.
+"""
+import fcntl
+import gzip
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from django.apps import apps
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.urls import reverse
+from django.utils import timezone
+
+from taches.models import Tache
+from taches.registre import tache
+
+
+RACINE = Path(getattr(settings, 'PLAN_SITE_RACINE', Path(settings.MEDIA_ROOT) / 'plan_site'))
+URLS_PAR_FICHIER = getattr(settings, 'PLAN_SITE_URLS_PAR_FICHIER', 50_000)
+
+# Objets publiés hors arborescence Wagtail : (modèle, vue de détail, date de modification)
+SOURCES_CONTENU = [
+    ('contenu.Article', 'contenu:article_detail', 'date_modification'),
+    ('contenu.Evenement', 'contenu:evenement_detail', 'date_creation'),
+    ('contenu.ProjetMunicipal', 'contenu:projet_detail', 'date_creation'),
+]
+# Champs dont la modification change le plan (le compteur de vues n'en fait pas partie)
+CHAMPS_SUIVIS = {'slug', 'publie', 'date_modification'}
+
+CHEMINS_INTERDITS = ['/admin/', '/cms-admin/', '/api/', '/utilisateurs/', '/tableau-de-bord/', '/recherche/']
+
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def repertoire(site):
+    return RACINE / site.hostname
+
+
+def _date(valeur):
+    return valeur.isoformat() if valeur else None
+
+
+# =============================================================================
+# ENTRÉES
+# =============================================================================
+
+def _entrees_pages(site, pks=None):
+    """{'page:<pk>': [[url, date], ...]} des pages publiées et publiques du site."""
+    from wagtail.models import Page
+
+    pages = Page.objects.live().public().in_site(site)
+    if pks is not None:
+        pages = pages.filter(pk__in=pks)
+    entrees = {}
+    for page in pages.specific().order_by('path').iterator(chunk_size=2000):
+        urls = [
+            [url['location'], _date(url.get('lastmod'))]
+            for url in page.get_sitemap_urls()
+            if url.get('location')
+        ]
+        if urls:
+            entrees[f'page:{page.pk}'] = urls
+    return entrees
+
+
+def _entrees_contenu(site, cles=None):
+    """Entrées des objets de `contenu` publiés, sur le site par défaut seulement."""
+    if not site.is_default_site:
+        return {}
+    entrees = {}
+    for label, vue, champ_date in SOURCES_CONTENU:
+        model = apps.get_model(label)
+        objets = model.objects.filter(publie=True)
+        if cles is not None:
+            pks = [cle.rsplit(':', 1)[1] for cle in cles if cle.startswith(f'{label}:')]
+            if not pks:
+                continue
+            objets = objets.filter(pk__in=pks)
+        for pk, slug, date in objets.order_by('pk').values_list('pk', 'slug', champ_date).iterator():
+            url = site.root_url + reverse(vue, kwargs={'slug': slug})
+            entrees[f'{label}:{pk}'] = [[url, _date(date)]]
+    return entrees
+
+
+# =============================================================================
+# FICHIERS
+# =============================================================================
+
+def _ecrire(chemin, contenu):
+    """Écriture atomique : nginx ne sert jamais un fichier à moitié écrit."""
+    temporaire = chemin.with_name(f'.{chemin.name}.tmp')
+    temporaire.write_bytes(contenu)
+    os.replace(temporaire, chemin)
+
+
+def _ecrire_partie(dossier, numero, entrees):
+    lignes = [f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{XMLNS}">']
+    for urls in entrees:
+        for url, date in urls:
+            lastmod = f'<lastmod>{date}</lastmod>' if date else ''
+            lignes.append(f'<url><loc>{escape(url)}</loc>{lastmod}</url>')
+    lignes.append('</urlset>\n')
+    # mtime fixe : un fichier inchangé garde la même empreinte (ETag de nginx)
+    _ecrire(dossier / f'sitemap-{numero}.xml.gz', gzip.compress('\n'.join(lignes).encode(), mtime=0))
+
+
+def _ecrire_index(site, dossier, parties):
+    lignes = [f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{XMLNS}">']
+    for numero, date in sorted(parties.items(), key=lambda partie: int(partie[0])):
+        lignes.append(
+            f'<sitemap><loc>{escape(site.root_url)}/sitemap-{numero}.xml.gz</loc>'
+            f'<lastmod>{date}</lastmod></sitemap>'
+        )
+    lignes.append('</sitemapindex>\n')
+    _ecrire(dossier / 'sitemap.xml', '\n'.join(lignes).encode())
+
+
+def _ecrire_robots(site, dossier):
+    lignes = ['User-agent: *']
+    lignes += [f'Disallow: {chemin}' for chemin in CHEMINS_INTERDITS]
+    lignes += ['', f'Sitemap: {site.root_url}/sitemap.xml', '']
+    _ecrire(dossier / 'robots.txt', '\n'.join(lignes).encode())
+
+
+@contextmanager
+def _verrou(dossier):
+    """Un seul processus écrit le plan d'un site à la fois."""
+    dossier.mkdir(parents=True, exist_ok=True)
+    with open(dossier / '.verrou', 'w') as fichier:
+        fcntl.flock(fichier, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fichier, fcntl.LOCK_UN)
+
+
+def _lire_manifeste(dossier):
+    try:
+        return json.loads((dossier / 'manifeste.json').read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _ecrire_fichiers(site, dossier, manifeste, numeros):
+    """Réécrit les fichiers `numeros`, l'index et le manifeste."""
+    par_partie = {numero: [] for numero in numeros}
+    for partie, urls in manifeste['entrees'].values():
+        if partie in par_partie:
+            par_partie[partie].append(urls)
+    maintenant = timezone.now().isoformat()
+    for numero, entrees in par_partie.items():
+        _ecrire_partie(dossier, numero, entrees)
+        manifeste['parties'][str(numero)] = maintenant
+    _ecrire_index(site, dossier, manifeste['parties'])
+    _ecrire(dossier / 'manifeste.json', json.dumps(manifeste).encode())
+
+
+# =============================================================================
+# GÉNÉRATION
+# =============================================================================
+
+def generer(site):
+    """Écrit tout le plan du site et son robots.txt ; renvoie le nombre d'URLs."""
+    dossier = repertoire(site)
+    with _verrou(dossier):
+        return _generer(site, dossier)
+
+
+def _generer(site, dossier):
+    entrees = {**_entrees_pages(site), **_entrees_contenu(site)}
+    manifeste = {'entrees': {}, 'parties': {}}
+    numero, taille = 1, 0
+    for cle, urls in entrees.items():
+        if taille + len(urls) > URLS_PAR_FICHIER and taille:
+            numero, taille = numero + 1, 0
+        manifeste['entrees'][cle] = [numero, urls]
+        taille += len(urls)
+
+    _ecrire_fichiers(site, dossier, manifeste, range(1, numero + 1))
+    _ecrire_robots(site, dossier)
+    # Fichiers d'une génération précédente plus longue
+    for ancien in dossier.glob('sitemap-*.xml.gz'):
+        if int(ancien.name.split('-')[1].split('.')[0]) > numero:
+            ancien.unlink()
+    return sum(len(urls) for urls in entrees.values())
+
+
+def _mettre_a_jour_site(site, cles):
+    dossier = repertoire(site)
+    with _verrou(dossier):
+        manifeste = _lire_manifeste(dossier)
+        if manifeste is None:
+            _generer(site, dossier)
+            return
+
+        pks_pages = [cle.split(':')[1] for cle in cles if cle.startswith('page:')]
+        nouvelles = {
+            **(_entrees_pages(site, pks_pages) if pks_pages else {}),
+            **_entrees_contenu(site, cles),
+        }
+        entrees = manifeste['entrees']
+        modifiees = set()
+        for cle in cles:
+            ancienne = entrees.pop(cle, None)
+            if ancienne is not None:
+                modifiees.add(ancienne[0])
+            urls = nouvelles.get(cle)
+            if urls is None:
+                continue
+            if ancienne is not None:
+                numero = ancienne[0]
+            else:
+                # Ajout au dernier fichier, ou à un nouveau s'il est plein
+                tailles = {}
+                for partie, urls_entree in entrees.values():
+                    tailles[partie] = tailles.get(partie, 0) + len(urls_entree)
+                numero = max(tailles, default=1)
+                if tailles.get(numero, 0) + len(urls) > URLS_PAR_FICHIER:
+                    numero += 1
+            entrees[cle] = [numero, urls]
+            modifiees.add(numero)
+        if modifiees:
+            _ecrire_fichiers(site, dossier, manifeste, sorted(modifiees))
+
+
+@tache(nom='core.mettre_a_jour_plan_site', priorite=Tache.PRIORITE_BASSE)
+def mettre_a_jour(cles):
+    """Met à jour les entrées `cles` ('page:12', 'contenu.Article:3') dans le plan de chaque site."""
+    from wagtail.models import Site
+
+    for site in Site.objects.all():
+        _mettre_a_jour_site(site, cles)
+
+
+@tache(nom='core.generer_plan_site', priorite=Tache.PRIORITE_BASSE)
+def generer_tous():
+    """Régénère le plan de chaque site de la mairie courante."""
+    from wagtail.models import Site
+
+    return {site.hostname: generer(site) for site in Site.objects.all()}
+
+
+# =============================================================================
+# SIGNAUX
+# =============================================================================
+
+def _apres_publication(sender, instance, **kwargs):
+    mettre_a_jour.differer([f'page:{instance.pk}'])
+
+
+def _apres_changement_url(sender, instance, **kwargs):
+    # Slug modifié ou page déplacée : l'URL des sous-pages change aussi
+    pks = instance.get_descendants(inclusive=True).values_list('pk', flat=True)
+    mettre_a_jour.differer([f'page:{pk}' for pk in pks])
+
+
+def _apres_modification_contenu(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields is not None and not set(update_fields) & CHAMPS_SUIVIS):
+        return
+    mettre_a_jour.differer([f'{sender._meta.label}:{instance.pk}'])
+
+
+def connecter_signaux():
+    from wagtail.models import Page
+    from wagtail.signals import page_published, page_slug_changed, page_unpublished, post_page_move
+
+    for signal in (page_published, page_unpublished):
+        signal.connect(_apres_publication)
+    post_delete.connect(_apres_publication, sender=Page)
+    for signal in (page_slug_changed, post_page_move):
+        signal.connect(_apres_changement_url)
+    for label, _, _ in SOURCES_CONTENU:
+        model = apps.get_model(label)
+        post_save.connect(_apres_modification_contenu, sender=model)
+        post_delete.connect(_apres_modification_contenu, sender=model)
@@ -0,0 +1,85 @@
+"""
+Moteur de sessions (SESSION_ENGINE = 'core.sessions').
+
+Sessions en cache (alias 'sessions', voir core.cache) adossées à la base,
+comme cached_db, avec deux économies d'écriture :
+
+- une session anonyme (mot de passe d'une page protégée, par exemple) ne
+  vit que dans le cache : aucune écriture en base pour les citoyens non
+  connectés. La connexion change la clé de session ; la session devient
+  alors persistante ;
+- une session marquée modifiée dont le contenu est identique à celui lu
+  n'est pas réécrite.
+
+L'alias 'sessions' lui est réservé : dossier à part (SESSIONS_DOSSIER, sur
+disque en conteneurs), sans éviction. Une écriture impossible dans le
+cache (disque plein) enregistre la session anonyme en base.
+
+Compromis : une session anonyme n'existe qu'en cache. Si le dossier des
+sessions est effacé ou perdu (volume recréé, disque changé), les visiteurs
+non connectés perdent leur session ; ils doivent par exemple saisir de
+nouveau le mot de passe d'une page protégée. Les sessions des utilisateurs
+connectés, en base, ne sont pas touchées.
+
+Les messages passent par un cookie (MESSAGE_STORAGE) et n'ouvrent pas de
+session. La commande purger_sessions supprime chaque nuit les sessions
+expirées de chaque mairie, en base, et les fichiers expirés du cache.
+"""
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.backends.base import CreateError
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.utils import timezone
+
+from taches.models import Tache
+from taches.registre import tache
+
+
+class SessionStore(CachedDBStore):
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        # Contenu sérialisé lors de la lecture (None : pas lu en stockage)
+        self._contenu_lu = None
+        # Session anonyme enregistrée par cet objet : absente de la base
+        self._cache_seul = False
+
+    def _serialiser(self, donnees):
+        return self.serializer().dumps(donnees)
+
+    def load(self):
+        donnees = super().load()
+        self._contenu_lu = self._serialiser(donnees) if donnees else None
+        return donnees
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        donnees = self._get_session(no_load=must_create)
+        if not must_create and self._contenu_lu is not None and self._serialiser(donnees) == self._contenu_lu:
+            return
+
+        if SESSION_KEY not in donnees:
+            if must_create and self._cache.has_key(self.cache_key):
+                raise CreateError
+            if self._cache.set(self.cache_key, donnees, self.get_expiry_age()) is False:
+                # Cache plein : la session anonyme va en base
+                super().save(must_create=must_create)
+                self._cache_seul = False
+            else:
+                self._cache_seul = True
+        else:
+            # Connexion pendant cette requête : la nouvelle clé n'est encore qu'en cache
+            super().save(must_create=must_create or self._cache_seul)
+            self._cache_seul = False
+        self._contenu_lu = self._serialiser(donnees)
+
+    @classmethod
+    def clear_expired(cls):
+        """Supprime les sessions expirées en base ; renvoie leur nombre."""
+        return cls.get_model_class().objects.filter(expire_date__lt=timezone.now()).delete()[0]
+
+
+@tache(nom='core.purger_sessions', priorite=Tache.PRIORITE_BASSE)
+def purger():
+    """Supprime les sessions expirées de la mairie courante."""
+    return SessionStore.clear_expired()
@@ -0,0 +1,141 @@
+"""
+Soumission groupée des formulaires citoyens mis en file hors ligne.
+
+Le service worker (gabarit core/sw.js) garde sur l'appareil les formulaires
+envoyés sans réseau, chacun avec une clé générée localement, puis les
+envoie ensemble à /api/soumissions/ au retour du réseau :
+
+    [{"cle": "<uuid>", "formulaire": "naissance", "donnees": {...}}, ...]
+
+Le lot est traité dans une transaction, chaque formulaire dans son propre
+point de sauvegarde : un formulaire invalide n'empêche pas les autres. Le
+résultat de chaque formulaire enregistré est conservé (Soumission) ; un
+renvoi de la même clé renvoie ce résultat sans rien créer. Les clés déjà
+reçues sont lues en une requête pour tout le lot.
+
+Les pièces jointes (pièce d'identité, photo) ne sont pas mises en file.
+"""
+from uuid import UUID
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+from .models import Soumission
+
+LOT_MAX = getattr(settings, 'SOUMISSIONS_LOT_MAX', 50)
+
+CREE = 'cree'
+DEJA_RECU = 'deja_recu'
+INVALIDE = 'invalide'
+
+
+def _enregistrer_acte(form, user):
+    from etat_civil.taches import confirmer_demande
+
+    acte = form.save(commit=False)
+    if user.is_authenticated:
+        acte.demandeur = user
+    acte.save()
+    confirmer_demande.differer(acte._meta.label, acte.pk)
+    return {
+        'numero': str(acte.numero_suivi),
+        'url': reverse('etat_civil:suivi', kwargs={'numero_suivi': acte.numero_suivi}),
+    }
+
+
+def _enregistrer_rendez_vous(form, user):
+    from services.taches import confirmer_rendez_vous
+
+    rdv = form.save(commit=False)
+    if user.is_authenticated:
+        rdv.citoyen = user
+    rdv.save()
+    confirmer_rendez_vous.differer(rdv.pk)
+    return {
+        'numero': str(rdv.numero),
+        'url': reverse('services:confirmation_rdv', kwargs={'numero': rdv.numero}),
+    }
+
+
+def _enregistrer_reclamation(form, user):
+    from services.taches import accuser_reception_reclamation
+
+    reclamation = form.save(commit=False)
+    if user.is_authenticated:
+        reclamation.auteur = user
+    reclamation.save()
+    accuser_reception_reclamation.differer(reclamation.pk)
+    return {
+        'numero': str(reclamation.numero),
+        'url': reverse('services:suivi_reclamation', kwargs={'numero': reclamation.numero}),
+    }
+
+
+# Formulaire : (classe du formulaire, enregistrement, URL du formulaire)
+FORMULAIRES = {
+    'naissance': ('etat_civil.forms.ActeNaissanceForm', _enregistrer_acte, 'etat_civil:demande_naissance'),
+    'mariage': ('etat_civil.forms.ActeMariageForm', _enregistrer_acte, 'etat_civil:demande_mariage'),
+    'deces': ('etat_civil.forms.ActeDecesForm', _enregistrer_acte, 'etat_civil:demande_deces'),
+    'livret': ('etat_civil.forms.LivretFamilleForm', _enregistrer_acte, 'etat_civil:demande_livret'),
+    'rendez_vous': ('services.forms.RendezVousForm', _enregistrer_rendez_vous, 'services:prendre_rdv'),
+    'reclamation': ('services.forms.ReclamationForm', _enregistrer_reclamation, 'services:soumettre_reclamation'),
+}
+
+
+def urls_formulaires():
+    """{URL du formulaire: nom} : le service worker met en file les envois vers ces URLs."""
+    return {reverse(nom_url): nom for nom, (_, _, nom_url) in FORMULAIRES.items()}
+
+
+def _cle(element):
+    try:
+        return UUID(str(element['cle']))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def traiter(elements, user):
+    """Enregistre les formulaires `elements` ; renvoie un résultat par élément, dans l'ordre."""
+    cles = [_cle(element) if isinstance(element, dict) else None for element in elements]
+    recues = dict(
+        Soumission.objects.filter(cle__in=[cle for cle in cles if cle])
+        .values_list('cle', 'resultat')
+    )
+
+    resultats = []
+    with transaction.atomic():
+        for cle, element in zip(cles, elements):
+            if cle is None:
+                resultats.append({'cle': None, 'statut': INVALIDE, 'erreurs': {'cle': ["Clé manquante ou invalide."]}})
+                continue
+            if cle in recues:
+                resultats.append({'cle': str(cle), 'statut': DEJA_RECU, **recues[cle]})
+                continue
+            resultats.append({'cle': str(cle), **_traiter_element(cle, element, user, recues)})
+    return resultats
+
+
+def _traiter_element(cle, element, user, recues):
+    formulaire = FORMULAIRES.get(element.get('formulaire'))
+    if formulaire is None:
+        return {'statut': INVALIDE, 'erreurs': {'formulaire': ["Formulaire inconnu."]}}
+    chemin, enregistrer, _ = formulaire
+    donnees = element.get('donnees')
+    form = import_string(chemin)(data=donnees if isinstance(donnees, dict) else {})
+    if not form.is_valid():
+        return {'statut': INVALIDE, 'erreurs': form.errors.get_json_data()}
+
+    try:
+        with transaction.atomic():
+            resultat = enregistrer(form, user)
+            Soumission.objects.create(cle=cle, formulaire=element['formulaire'], resultat=resultat)
+    except IntegrityError:
+        # Même clé reçue entre-temps par une autre requête : rien n'a été créé ici
+        soumission = Soumission.objects.filter(cle=cle).first()
+        if soumission is None:
+            raise
+        return {'statut': DEJA_RECU, **soumission.resultat}
+    recues[cle] = resultat
+    return {'statut': CREE, **resultat}
@@ -0,0 +1,44 @@
+"""
+Utilitaires multi-tenant.
+
+django-tenants n'est actif qu'en production (PostgreSQL) : en SQLite la
+connexion n'a pas de schéma et ces fonctions se replient sur 'public'.
+"""
+from contextlib import nullcontext
+
+from django.db import connection
+
+
+SCHEMA_PUBLIC = 'public'
+
+
+def schema_courant():
+    """Nom du schéma de la mairie courante."""
+    return getattr(connection, 'schema_name', SCHEMA_PUBLIC)
+
+
+def schema_context(schema_name):
+    """Bascule sur le schéma d'une mairie si django-tenants est installé."""
+    if not hasattr(connection, 'set_schema'):
+        return nullcontext()
+    from django_tenants.utils import schema_context as tenant_schema_context
+    return tenant_schema_context(schema_name)
+
+
+def schemas_mairies():
+    """Schémas de toutes les mairies actives (ou le schéma unique en SQLite)."""
+    if not hasattr(connection, 'set_schema'):
+        return [SCHEMA_PUBLIC]
+    from tenants.models import Mairie
+    return list(
+        Mairie.objects.filter(actif=True)
+        .exclude(schema_name=SCHEMA_PUBLIC)
+        .values_list('schema_name', flat=True)
+    )
+
+
+def pour_chaque_mairie():
+    """Itère sur les schémas des mairies en activant chacun tour à tour."""
+    for schema in schemas_mairies():
+        with schema_context(schema):
+            yield schema
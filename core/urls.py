@@ -1,4 +1,4 @@
-from django.urls import path
+from django.urls import path, re_path
 from . import views
 
 app_name = 'core'
@@ -7,4 +7,12 @@ urlpatterns = [
     path('', views.AccueilView2.as_view(), name='accueil'),
     path('tableau-de-bord/', views.TableauDeBordView.as_view(), name='tableau_de_bord'),
     path('page/<slug:slug>/', views.PageStatiqueView.as_view(), name='page_statique'),
+
+    # Plan du site et robots.txt (servis par nginx en production)
+    path('robots.txt', views.fichier_plan_site, {'fichier': 'robots.txt'}, name='robots'),
+    path('sitemap.xml', views.fichier_plan_site, {'fichier': 'sitemap.xml'}, name='sitemap'),
+    re_path(r'^(?P<fichier>sitemap-\d+\.xml\.gz)$', views.fichier_plan_site, name='sitemap_partie'),
+
+    # Service worker des formulaires hors ligne (portée : tout le site)
+    path('sw.js', views.service_worker, name='service_worker'),
 ]
@@ -1,10 +1,17 @@
 """
 Vues principales du CMS.
 """
+import json
+
+from django.core.cache import cache
+from django.http import FileResponse, Http404
+from django.http.request import split_domain_port
 from django.shortcuts import render, get_object_or_404
+from django.views.decorators.cache import cache_control
 from django.views.generic import TemplateView, DetailView
 from contenu.models import Article, Evenement, Document
 from services.models import DemandeActe
+from . import plan_site, soumissions
 from .models import PageStatique
 
 
@@ -50,3 +57,47 @@ class TableauDeBordView(TemplateView):
         context['demandes_en_cours'] = DemandeActe.objects.filter(statut='en_cours').count()
         context['articles_total'] = Article.objects.count()
         return context
+
+
+TYPES_PLAN_SITE = {
+    '.txt': 'text/plain; charset=utf-8',
+    '.xml': 'application/xml',
+    '.gz': 'application/gzip',
+}
+
+
+@cache_control(public=True, max_age=3600)
+def fichier_plan_site(request, fichier):
+    """
+    Sert sitemap.xml, ses fichiers et robots.txt générés par core.plan_site,
+    quand nginx ne les a pas servis lui-même. Lecture sur disque seulement,
+    sauf pour un nom d'hôte inconnu (site par défaut).
+    """
+    hote, _ = split_domain_port(request.get_host())
+    dossier = plan_site.RACINE / hote
+    if not dossier.is_dir():
+        from wagtail.models import Site
+        site = Site.find_for_request(request)
+        if site is None:
+            raise Http404
+        dossier = plan_site.repertoire(site)
+
+    chemin = dossier / fichier
+    if not chemin.is_file():
+        # Jamais généré : une seule génération en file, pas une par robot
+        if cache.add(f'plan_site:{dossier.name}:generation', True, 300):
+            plan_site.generer_tous.differer()
+        raise Http404
+    return FileResponse(open(chemin, 'rb'), content_type=TYPES_PLAN_SITE[chemin.suffix])
+
+
+@cache_control(no_cache=True)
+def service_worker(request):
+    """
+    Service worker des formulaires hors ligne (voir core.soumissions), servi
+    à la racine pour que sa portée couvre tout le site.
+    """
+    return render(request, 'core/sw.js', {
+        'formulaires': json.dumps(soumissions.urls_formulaires()),
+        'lot_max': soumissions.LOT_MAX,
+    }, content_type='application/javascript')
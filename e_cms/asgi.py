@@ -0,0 +1,11 @@
+"""
+ASGI config for E-CMS project.
+
+Mode ASGI (workers uvicorn) :
+  gunicorn -k uvicorn.workers.UvicornWorker --workers 3 e_cms.asgi:application
+"""
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'e_cms.settings')
+application = get_asgi_application()
@@ -4,6 +4,7 @@ CMS multisite dédié aux mairies du Cameroun
 Intégration Wagtail 6.2 + django-tenants
 """
 
+from importlib.util import find_spec
 from pathlib import Path
 import os
 from dotenv import load_dotenv
@@ -56,18 +57,23 @@ INSTALLED_APPS = [
     'contenu',
     'services',
     'utilisateurs',
+    'taches',
+    'recherche',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.FichiersStatiquesMiddleware',
+    'core.middleware.LimitationDebitMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'core.middleware.IdempotenceMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'wagtail.contrib.redirects.middleware.RedirectMiddleware',
+    'cms.middleware.VaryAcceptImagesMiddleware',
 ]
 
 ROOT_URLCONF = 'e_cms.urls'
@@ -93,13 +99,84 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'e_cms.wsgi.application'
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / os.environ.get('DB_NAME', 'db.sqlite3'),
+# Base de données : variables DB_* (voir .env.example). Le worker de tâches
+# (traiter_taches) doit lire la même base que le serveur web.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'django.db.backends.sqlite3')
+
+if DB_ENGINE == 'django.db.backends.sqlite3':
+    DATABASES = {
+        'default': {
+            'ENGINE': DB_ENGINE,
+            'NAME': BASE_DIR / os.environ.get('DB_NAME', 'db.sqlite3'),
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': DB_ENGINE,
+            'NAME': os.environ.get('DB_NAME', 'e_cms_db'),
+            'USER': os.environ.get('DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+        }
     }
+
+# Cache : un alias par usage, tous partagés par les workers du serveur et
+# le worker de tâches (fichiers en mémoire, voir core.cache). Chaque clé est
+# préfixée du schéma de la mairie courante. En conteneurs, CACHE_DOSSIER est
+# le volume tmpfs `cache_volume` monté par web et worker : sa taille (1 Gio)
+# couvre les MAX_ENTRIES ci-dessous (environ 20 Kio par page, 8 Kio par
+# fragment, un bloc de 4 Kio par seau de limitation).
+CACHE_DOSSIER = os.environ.get('CACHE_DOSSIER', '/dev/shm/e_cms')
+# Sessions hors du tmpfs : elles survivent au redémarrage des conteneurs
+SESSIONS_DOSSIER = os.environ.get('SESSIONS_DOSSIER', f'{CACHE_DOSSIER}/sessions')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.CacheFichiersPartage',
+        'LOCATION': f'{CACHE_DOSSIER}/default',
+        'KEY_FUNCTION': 'core.cache.cle_mairie',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    # Réponses de l'API des pages, listes paginées des pages d'index
+    'pages': {
+        'BACKEND': 'core.cache.CacheFichiersPartage',
+        'LOCATION': f'{CACHE_DOSSIER}/pages',
+        'KEY_FUNCTION': 'core.cache.cle_mairie',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # HTML des blocs StreamField et des textes riches expansés
+    'fragments': {
+        'BACKEND': 'core.cache.CacheFichiersPartage',
+        'LOCATION': f'{CACHE_DOSSIER}/fragments',
+        'KEY_FUNCTION': 'core.cache.cle_mairie',
+        'OPTIONS': {'MAX_ENTRIES': 40000},
+    },
+    # Sessions anonymes et copies des sessions en base (voir core.sessions) :
+    # jamais évincées, sur disque (SESSIONS_DOSSIER), purgées à expiration
+    'sessions': {
+        'BACKEND': 'core.cache.CacheFichiersPartage',
+        'LOCATION': SESSIONS_DOSSIER,
+        'KEY_FUNCTION': 'core.cache.cle_mairie',
+        'OPTIONS': {'EVINCER': False, 'STATISTIQUES': f'{CACHE_DOSSIER}/statistiques'},
+    },
+    # Seaux de la limitation de débit (voir core.limitation)
+    'limitation': {
+        'BACKEND': 'core.cache.CacheFichiersPartage',
+        'LOCATION': f'{CACHE_DOSSIER}/limitation',
+        'KEY_FUNCTION': 'core.cache.cle_mairie',
+        'OPTIONS': {'MAX_ENTRIES': 30000},
+    },
 }
 
+# Sessions en cache adossées à la base ; sessions anonymes en cache
+# seulement, sessions inchangées non réécrites (voir core.sessions)
+SESSION_ENGINE = 'core.sessions'
+SESSION_CACHE_ALIAS = 'sessions'
+# Messages dans un cookie : afficher un message n'écrit pas la session
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
 # Auth
 AUTH_USER_MODEL = 'utilisateurs.Utilisateur'
 
@@ -110,6 +187,26 @@ AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator'},
 ]
 
+# Permissions compilées et mises en cache à la connexion (voir utilisateurs.permissions)
+AUTHENTICATION_BACKENDS = ['utilisateurs.backends.RolesBackend']
+
+# Argon2id si argon2-cffi est installé ; les anciens hachages PBKDF2 sont
+# convertis à la connexion suivante (voir utilisateurs.hachage)
+PASSWORD_HASHERS = [
+    'utilisateurs.hachage.PBKDF2Hacheur',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+if find_spec('argon2'):
+    PASSWORD_HASHERS.insert(0, 'utilisateurs.hachage.Argon2Hacheur')
+
+# Paramètres d'Argon2id (mémoire en Kio), voir benchmark_connexion
+ARGON2_TEMPS = int(os.environ.get('ARGON2_TEMPS', 2))
+ARGON2_MEMOIRE = int(os.environ.get('ARGON2_MEMOIRE', 19456))
+ARGON2_PARALLELISME = 1
+# Hachages simultanés par processus
+HACHAGE_THREADS = int(os.environ.get('HACHAGE_THREADS', 2))
+
 # Internationalization
 LANGUAGE_CODE = 'fr-fr'
 TIME_ZONE = 'Africa/Douala'
@@ -149,11 +246,46 @@ WAGTAIL_SITE_NAME = 'E-CMS Mairies du Cameroun'
 WAGTAILADMIN_BASE_URL = os.environ.get('WAGTAIL_BASE_URL', 'http://localhost')
 
 # Recherche Wagtail
+# Sous PostgreSQL : configuration plein texte « francais » (racinisation
+# française + unaccent) créée par la migration recherche.0001. Ignorée par
+# le backend SQLite du développement.
 WAGTAILSEARCH_BACKENDS = {
     'default': {
         'BACKEND': 'wagtail.search.backends.database',
+        'SEARCH_CONFIG': 'francais',
+        # Index mis à jour par le worker de tâches (voir recherche.indexation)
+        'AUTO_UPDATE': False,
     }
 }
+RECHERCHE_INDEXATION_DIFFEREE = True
+RECHERCHE_INDEXATION_LOT = 200
+
+# API de recherche unifiée : résultats retenus par source et durée du cache
+RECHERCHE_API_PROFONDEUR = 100
+RECHERCHE_API_CACHE_DUREE = 300
+
+# Extraction du texte des documents PDF/DOCX/ODT (voir recherche.documents) :
+# processus du pool, plafond mémoire par processus, pages lues par PDF
+RECHERCHE_EXTRACTION_PROCESSUS = int(os.environ.get('RECHERCHE_EXTRACTION_PROCESSUS', 2))
+RECHERCHE_EXTRACTION_MEMOIRE_MAX = 512 * 1024 * 1024
+RECHERCHE_EXTRACTION_PAGES_MAX = 500
+RECHERCHE_EXTRACTION_CARACTERES_MAX = 2_000_000
+RECHERCHE_EXTRACTION_TEXTE_INDEXE_MAX = 500_000
+
+# Listes des pages d'index (voir cms.listes) : entrées servies telles
+# quelles pendant LISTES_FRAICHEUR secondes, puis recalculées par le worker
+LISTES_PAR_PAGE = 12
+LISTES_FRAICHEUR = 300
+
+# Rendu des blocs StreamField mis en cache (voir cms.cache_blocs) ; 0 désactive
+BLOCS_CACHE_DUREE = 24 * 3600
+
+# Expansion du texte riche (liens internes, embeds) mise en cache (voir cms.texte_riche)
+TEXTE_RICHE_CACHE_DUREE = 24 * 3600
+
+# Plan du site et robots.txt statiques, un dossier par nom d'hôte (voir core.plan_site)
+PLAN_SITE_RACINE = MEDIA_ROOT / 'plan_site'
+PLAN_SITE_URLS_PAR_FICHIER = 50_000
 
 # Configuration des images Wagtail
 WAGTAILIMAGES_IMAGE_MODEL = 'cms.ImagePersonnalisee'
@@ -167,9 +299,22 @@ WAGTAILIMAGES_FORMAT_CONVERSIONS = {
     'webp': 'webp',
 }
 
+# Qualité des renditions (connexions mobiles à faible débit)
+WAGTAILIMAGES_JPEG_QUALITY = 80
+WAGTAILIMAGES_WEBP_QUALITY = 75
+WAGTAILIMAGES_AVIF_QUALITY = 60
+
+# Formats modernes proposés aux navigateurs, par ordre de préférence
+IMAGES_FORMATS_MODERNES = ['avif', 'webp']
+
 # Taille max upload (10MB)
 WAGTAILIMAGES_MAX_UPLOAD_SIZE = 10 * 1024 * 1024
 
+# Normalisation à l'upload (voir core.images) : les originaux sont réduits
+# à cette dimension, sans EXIF, puis recompressés par le worker de tâches
+IMAGES_UPLOAD_DIMENSION_MAX = int(os.environ.get('IMAGES_UPLOAD_DIMENSION_MAX', 2560))
+IMAGES_UPLOAD_QUALITE = 82
+
 # Configuration des embeds
 WAGTAILEMBEDS_FINDERS = [
     {
@@ -215,6 +360,8 @@ WAGTAILFORMS_HELP_TEXT_ALLOW_HTML = True
 # API Wagtail
 WAGTAILAPI_BASE_URL = '/api/v2/'
 WAGTAILAPI_LIMIT_MAX = 100
+# Réponses de l'API mises en cache par mairie, périmées à chaque publication (voir cms.api)
+API_CACHE_DUREE = 600
 
 # Configuration de l'admin Wagtail
 WAGTAILADMIN_NOTIFICATION_USE_HTML = True
@@ -239,3 +386,91 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
 }
+
+# Nombre maximal d'objets par appel aux routes lot/ (voir core.api)
+API_LOT_MAX = 5000
+
+# Journal des changements (voir core.changements) : durée de conservation
+# des entrées remplacées ou supprimées, et âge minimal d'une entrée servie
+CHANGEMENTS_RETENTION_JOURS = 30
+CHANGEMENTS_DELAI = 10
+
+# Formulaires hors ligne envoyés ensemble par le service worker (voir core.soumissions)
+SOUMISSIONS_LOT_MAX = 50
+
+# Formulaires citoyens dont un envoi identique rejoue la première réponse
+# (voir core.idempotence) ; durées de conservation
+IDEMPOTENCE_VUES = [
+    'etat_civil:demande_naissance',
+    'etat_civil:demande_mariage',
+    'etat_civil:demande_deces',
+    'etat_civil:demande_livret',
+    'services:prendre_rdv',
+    'services:soumettre_reclamation',
+    'services:newsletter',
+    'utilisateurs:inscription',
+]
+IDEMPOTENCE_DUREE = 24 * 3600
+IDEMPOTENCE_SOUMISSIONS_JOURS = 30
+
+# Proxies dont l'en-tête X-Real-IP donne l'adresse du client (voir
+# core.idempotence.adresse_client) : réseaux séparés par des virgules. En
+# conteneurs, l'adresse fixe de nginx (voir docker-compose.yml).
+PROXIES_DE_CONFIANCE = os.environ.get('PROXIES_DE_CONFIANCE', '127.0.0.1/32,::1/128').split(',')
+
+# Limitation du débit des vues publiques (voir core.limitation) :
+# portée → (capacité du seau, période de remplissage en secondes)
+LIMITATION_DEBIT = {
+    'creneaux': {
+        'vues': ['services:api_creneaux'],
+        'ip': (60, 60),
+        'mairie': (1200, 60),
+    },
+    'suivi_acte': {
+        'vues': ['etat_civil:suivi_form', 'etat_civil:suivi'],
+        'ip': (20, 60),
+        'mairie': (600, 60),
+    },
+    'suivi_reclamation': {
+        'vues': ['services:suivi_reclamation_form', 'services:suivi_reclamation'],
+        'ip': (20, 60),
+        'mairie': (600, 60),
+    },
+    # Pas de seau par mairie : le pic de connexions est borné par le pool
+    # de hachage (voir utilisateurs.hachage et benchmark_connexion)
+    'connexion': {
+        'vues': ['utilisateurs:connexion'],
+        'ip': (10, 300),
+        'methodes': ['POST'],
+    },
+    'newsletter': {
+        'vues': ['services:newsletter'],
+        'ip': (5, 600),
+        'methodes': ['POST'],
+    },
+}
+# Désactivable le temps d'un test de charge (scripts/test_charge.py)
+if os.environ.get('LIMITATION_DEBIT_ACTIVE', 'True') != 'True':
+    LIMITATION_DEBIT = {}
+
+# =============================================================================
+# TÂCHES EN ARRIÈRE-PLAN ET EMAIL
+# =============================================================================
+
+# Les emails sont mis en file (table taches_tache) puis envoyés par
+# `python manage.py traiter_taches` via le backend réel ci-dessous
+EMAIL_BACKEND = 'taches.backends.EmailBackend'
+TACHES_EMAIL_BACKEND = os.environ.get(
+    'TACHES_EMAIL_BACKEND',
+    'django.core.mail.backends.console.EmailBackend' if DEBUG else 'django.core.mail.backends.smtp.EmailBackend'
+)
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 25))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'False') == 'True'
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@e-cms.local')
+
+# Newsletter : abonnés par lot (une connexion SMTP par lot) et débit maximal
+NEWSLETTER_TAILLE_LOT = 200
+NEWSLETTER_DEBIT_MAX = int(os.environ.get('NEWSLETTER_DEBIT_MAX', 10))
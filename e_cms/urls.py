@@ -10,10 +10,13 @@ from wagtail.admin import urls as wagtailadmin_urls
 from wagtail import urls as wagtail_urls
 from wagtail.documents import urls as wagtaildocs_urls
 
-from wagtail.api.v2.views import PagesAPIViewSet
 from wagtail.api.v2.router import WagtailAPIRouter
-from wagtail.images.api.v2.views import ImagesAPIViewSet
-from wagtail.documents.api.v2.views import DocumentsAPIViewSet
+
+# Points d'accès de Wagtail avec cache, ETag et projection (voir cms.api)
+from cms.api import DocumentsAPIViewSet, ImagesAPIViewSet, PagesAPIViewSet
+from core.api import ChangementsView, SoumissionsView
+from etat_civil.api import router as etat_civil_api_router
+from services.api import router as services_api_router
 
 api_router = WagtailAPIRouter('wagtailapi')
 api_router.register_endpoint('pages', PagesAPIViewSet)
@@ -29,6 +32,10 @@ urlpatterns = [
     path('documents/', include(wagtaildocs_urls)),
     
     path('api/v2/', api_router.urls),
+    path('api/etat-civil/', include(etat_civil_api_router.urls)),
+    path('api/services/', include(services_api_router.urls)),
+    path('api/changements/', ChangementsView.as_view(), name='api_changements'),
+    path('api/soumissions/', SoumissionsView.as_view(), name='api_soumissions'),
     
     # E-CMS apps
     path('', include('core.urls')),
@@ -36,6 +43,7 @@ urlpatterns = [
     path('contenu/', include('contenu.urls')),
     path('services/', include('services.urls')),
     path('utilisateurs/', include('utilisateurs.urls')),
+    path('recherche/', include('recherche.urls')),
     
     path('', include(wagtail_urls)),
 ]
@@ -0,0 +1,112 @@
+"""
+API REST des demandes d'actes, pour les agents et les systèmes partenaires
+(registre national de l'état civil).
+
+/api/etat-civil/<naissances|mariages|deces|livrets>/ : liste paginée par
+curseur (filtres `statut` et `depuis`, date ISO), détail par numéro de
+référence, création et modification. `lot/` crée (POST) ou modifie (PATCH)
+jusqu'à API_LOT_MAX actes par appel. Pas de suppression.
+
+Les demandeurs et agents sont exposés par identifiant, lu dans la ligne de
+l'acte : aucune jointure. Les actes créés par lot sont numérotés avec un
+seul comptage ; ils ne déclenchent pas d'accusé de réception (les demandes
+synchronisées ont été déposées ailleurs).
+"""
+from django.utils.dateparse import parse_datetime
+from rest_framework import mixins, permissions, viewsets
+from rest_framework.routers import SimpleRouter
+
+from core.api import LotMixin, ModeleSerializer, PaginationCurseur
+
+from .models import ActeDeces, ActeMariage, ActeNaissance, LivretFamille
+
+
+class GestionEtatCivil(permissions.BasePermission):
+    """Agents de l'état civil et administrateurs de la mairie."""
+
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and request.user.can_manage_etat_civil()
+
+
+CHAMPS_LECTURE_SEULE = [
+    'numero_reference', 'numero_suivi', 'demandeur', 'agent_traitant', 'date_demande',
+]
+
+
+class ActeNaissanceSerializer(ModeleSerializer):
+    class Meta:
+        model = ActeNaissance
+        fields = '__all__'
+        read_only_fields = CHAMPS_LECTURE_SEULE + ['piece_identite']
+
+
+class ActeMariageSerializer(ModeleSerializer):
+    class Meta:
+        model = ActeMariage
+        fields = '__all__'
+        read_only_fields = CHAMPS_LECTURE_SEULE
+
+
+class ActeDecesSerializer(ModeleSerializer):
+    class Meta:
+        model = ActeDeces
+        fields = '__all__'
+        read_only_fields = CHAMPS_LECTURE_SEULE
+
+
+class LivretFamilleSerializer(ModeleSerializer):
+    class Meta:
+        model = LivretFamille
+        fields = '__all__'
+        read_only_fields = CHAMPS_LECTURE_SEULE
+
+
+class ActeViewSet(LotMixin,
+                  mixins.CreateModelMixin,
+                  mixins.ListModelMixin,
+                  mixins.RetrieveModelMixin,
+                  mixins.UpdateModelMixin,
+                  viewsets.GenericViewSet):
+    permission_classes = [GestionEtatCivil]
+    pagination_class = PaginationCurseur
+    lookup_field = 'numero_reference'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        statut = self.request.query_params.get('statut')
+        if statut:
+            queryset = queryset.filter(statut=statut)
+        depuis = parse_datetime(self.request.query_params.get('depuis') or '')
+        if depuis:
+            queryset = queryset.filter(date_demande__gte=depuis)
+        return queryset
+
+    def preparer_creation(self, objets):
+        self.queryset.model.numeroter(objets)
+
+
+class ActeNaissanceViewSet(ActeViewSet):
+    queryset = ActeNaissance.objects.all()
+    serializer_class = ActeNaissanceSerializer
+
+
+class ActeMariageViewSet(ActeViewSet):
+    queryset = ActeMariage.objects.all()
+    serializer_class = ActeMariageSerializer
+
+
+class ActeDecesViewSet(ActeViewSet):
+    queryset = ActeDeces.objects.all()
+    serializer_class = ActeDecesSerializer
+
+
+class LivretFamilleViewSet(ActeViewSet):
+    queryset = LivretFamille.objects.all()
+    serializer_class = LivretFamilleSerializer
+
+
+router = SimpleRouter()
+router.register('naissances', ActeNaissanceViewSet)
+router.register('mariages', ActeMariageViewSet)
+router.register('deces', ActeDecesViewSet)
+router.register('livrets', LivretFamilleViewSet)
@@ -60,13 +60,20 @@ class ActeBase(models.Model):
     
     def save(self, *args, **kwargs):
         if not self.numero_reference:
-            prefix = self.get_prefix()
-            from django.utils import timezone
-            year = timezone.now().year
-            count = self.__class__.objects.filter(date_demande__year=year).count() + 1
-            self.numero_reference = f"{prefix}-{year}-{count:05d}"
+            self.numeroter([self])
         super().save(*args, **kwargs)
     
+    @classmethod
+    def numeroter(cls, actes):
+        """Attribue un numéro de référence aux actes qui n'en ont pas (un seul comptage pour le lot)."""
+        from django.utils import timezone
+        year = timezone.now().year
+        count = cls.objects.filter(date_demande__year=year).count()
+        for acte in actes:
+            if not acte.numero_reference:
+                count += 1
+                acte.numero_reference = f"{acte.get_prefix()}-{year}-{count:05d}"
+    
     def get_prefix(self):
         return "ACT"
 
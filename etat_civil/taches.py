@@ -0,0 +1,32 @@
+"""
+Tâches en arrière-plan de l'état civil.
+"""
+from django.apps import apps
+from django.conf import settings
+from django.core.mail import send_mail
+
+from taches.models import Tache
+from taches.registre import tache
+
+
+@tache(nom='etat_civil.confirmer_demande', priorite=Tache.PRIORITE_HAUTE)
+def confirmer_demande(label, pk):
+    """
+    Accusé de réception d'une demande d'acte.
+    Les confirmations par SMS (demandeur_telephone) s'ajouteront ici.
+    """
+    acte = apps.get_model(label)._default_manager.filter(pk=pk).first()
+    if acte is None or not acte.demandeur_email:
+        return
+
+    send_mail(
+        subject=f"Demande enregistrée - {acte.numero_reference}",
+        message=(
+            f"Bonjour {acte.demandeur_prenom} {acte.demandeur_nom},\n\n"
+            f"Votre demande ({acte._meta.verbose_name}) a bien été enregistrée "
+            f"sous la référence {acte.numero_reference}.\n"
+            f"Numéro de suivi : {acte.numero_suivi}\n"
+        ),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=[acte.demandeur_email],
+    )
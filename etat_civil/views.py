@@ -7,8 +7,10 @@ from django.contrib import messages
 from django.views.generic import ListView, DetailView, CreateView, TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.http import JsonResponse
+from asgiref.sync import sync_to_async
 from .models import ActeNaissance, ActeMariage, ActeDeces, LivretFamille
 from .forms import ActeNaissanceForm, ActeMariageForm, ActeDecesForm, LivretFamilleForm
+from .taches import confirmer_demande
 
 
 class AccueilEtatCivilView(TemplateView):
@@ -27,6 +29,7 @@ class DemandeActeNaissanceView(CreateView):
         if self.request.user.is_authenticated:
             acte.demandeur = self.request.user
         acte.save()
+        confirmer_demande.differer(acte._meta.label, acte.pk)
         messages.success(
             self.request, 
             f"Votre demande a été enregistrée. Numéro de suivi : {acte.numero_suivi}"
@@ -45,6 +48,7 @@ class DemandeActeMariageView(CreateView):
         if self.request.user.is_authenticated:
             acte.demandeur = self.request.user
         acte.save()
+        confirmer_demande.differer(acte._meta.label, acte.pk)
         messages.success(
             self.request, 
             f"Votre demande a été enregistrée. Numéro de suivi : {acte.numero_suivi}"
@@ -63,6 +67,7 @@ class DemandeActeDecesView(CreateView):
         if self.request.user.is_authenticated:
             acte.demandeur = self.request.user
         acte.save()
+        confirmer_demande.differer(acte._meta.label, acte.pk)
         messages.success(
             self.request, 
             f"Votre demande a été enregistrée. Numéro de suivi : {acte.numero_suivi}"
@@ -81,6 +86,7 @@ class DemandeLivretFamilleView(CreateView):
         if self.request.user.is_authenticated:
             acte.demandeur = self.request.user
         acte.save()
+        confirmer_demande.differer(acte._meta.label, acte.pk)
         messages.success(
             self.request, 
             f"Votre demande a été enregistrée. Numéro de suivi : {acte.numero_suivi}"
@@ -88,8 +94,8 @@ class DemandeLivretFamilleView(CreateView):
         return redirect('etat_civil:suivi', numero_suivi=acte.numero_suivi)
 
 
-def suivi_demande_view(request, numero_suivi=None):
-    """Vue pour suivre une demande par numéro de suivi."""
+async def suivi_demande_view(request, numero_suivi=None):
+    """Vue pour suivre une demande par numéro de suivi (vue asynchrone, ORM async)."""
     demande = None
     type_acte = None
     
@@ -101,19 +107,18 @@ def suivi_demande_view(request, numero_suivi=None):
             (ActeDeces, 'Acte de décès'),
             (LivretFamille, 'Livret de famille')
         ]:
-            try:
-                demande = model.objects.get(numero_suivi=numero_suivi)
+            demande = await model.objects.filter(numero_suivi=numero_suivi).afirst()
+            if demande is not None:
                 type_acte = nom
                 break
-            except model.DoesNotExist:
-                continue
     
     elif request.method == 'POST':
         numero = request.POST.get('numero_suivi', '').strip()
         if numero:
             return redirect('etat_civil:suivi', numero_suivi=numero)
     
-    return render(request, 'etat_civil/suivi.html', {
+    # Le gabarit de base lit l'utilisateur et la session : rendu dans un thread
+    return await sync_to_async(render)(request, 'etat_civil/suivi.html', {
         'demande': demande,
         'type_acte': type_acte,
         'numero_suivi': numero_suivi
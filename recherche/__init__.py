@@ -0,0 +1 @@
+# Recherche app - Recherche plein texte publique
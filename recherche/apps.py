@@ -0,0 +1,16 @@
+from django.apps import AppConfig
+
+
+class RechercheConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'recherche'
+    verbose_name = 'Recherche'
+
+    def ready(self):
+        from django.conf import settings
+        if getattr(settings, 'RECHERCHE_INDEXATION_DIFFEREE', True):
+            from .indexation import connecter_signaux
+            connecter_signaux()
+
+        from .documents import surveiller_documents
+        surveiller_documents()
@@ -0,0 +1,213 @@
+"""
+Extraction du texte des documents pour la recherche plein texte.
+
+Chaque nouveau fichier d'un document (cms.DocumentPersonnalise,
+contenu.Document) met en file la tâche `recherche.extraire_texte_document`.
+Le texte est extrait dans un pool de processus (voir recherche.extraction),
+découpé en fragments (FragmentTexte), puis le document est signalé à
+l'indexation incrémentale qui indexe son champ `texte_extrait`.
+
+L'extraction est sautée quand l'empreinte SHA-1 du fichier n'a pas changé.
+"""
+import hashlib
+import multiprocessing
+import os
+import shutil
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import ExitStack, contextmanager
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.utils import timezone
+
+from .extraction import extraire_texte, format_pris_en_charge, limiter_memoire
+from .indexation import signaler_modification
+from .models import FragmentTexte, TexteDocument
+
+# Documents dont le fichier est extrait : (modèle, champ fichier)
+DOCUMENTS = [
+    ('cms.DocumentPersonnalise', 'file'),
+    ('contenu.Document', 'fichier'),
+]
+
+PROCESSUS = getattr(settings, 'RECHERCHE_EXTRACTION_PROCESSUS', 2)
+MEMOIRE_MAX = getattr(settings, 'RECHERCHE_EXTRACTION_MEMOIRE_MAX', 512 * 1024 * 1024)
+PAGES_MAX = getattr(settings, 'RECHERCHE_EXTRACTION_PAGES_MAX', 500)
+CARACTERES_MAX = getattr(settings, 'RECHERCHE_EXTRACTION_CARACTERES_MAX', 2_000_000)
+TAILLE_FRAGMENT = 10_000
+# Un processus est remplacé après N extractions : rend la mémoire des gros PDF
+EXTRACTIONS_PAR_PROCESSUS = 20
+
+_pool = None
+
+
+def pool():
+    """Pool de processus d'extraction, créé au premier usage."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=PROCESSUS,
+            # spawn : les processus n'héritent ni de Django ni des connexions
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=limiter_memoire,
+            initargs=(MEMOIRE_MAX,),
+            max_tasks_per_child=EXTRACTIONS_PAR_PROCESSUS,
+        )
+    return _pool
+
+
+def _reinitialiser_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+    _pool = None
+
+
+def empreinte(document, fieldfile):
+    """SHA-1 du fichier ; celle calculée par Wagtail à l'upload si elle existe."""
+    if getattr(document, 'file_hash', ''):
+        return document.file_hash
+    sha1 = hashlib.sha1()
+    with fieldfile.open('rb') as f:
+        for bloc in iter(lambda: f.read(1024 * 1024), b''):
+            sha1.update(bloc)
+    return sha1.hexdigest()
+
+
+@contextmanager
+def chemin_local(fieldfile):
+    """Chemin du fichier sur disque, copié dans un fichier temporaire si le stockage est distant."""
+    try:
+        chemin = fieldfile.path
+    except NotImplementedError:
+        chemin = None
+    if chemin is not None:
+        yield chemin
+        return
+
+    with tempfile.NamedTemporaryFile(suffix=os.path.splitext(fieldfile.name)[1]) as temporaire:
+        with fieldfile.open('rb') as source:
+            shutil.copyfileobj(source, temporaire)
+        temporaire.flush()
+        yield temporaire.name
+
+
+def decouper(texte, taille=TAILLE_FRAGMENT):
+    """Fragments d'environ `taille` caractères, coupés sur un blanc."""
+    fragments = []
+    debut = 0
+    while debut < len(texte):
+        fin = debut + taille
+        if fin < len(texte):
+            blanc = max(texte.rfind(' ', debut, fin), texte.rfind('\n', debut, fin))
+            if blanc > debut:
+                fin = blanc
+        fragment = texte[debut:fin].strip()
+        if fragment:
+            fragments.append(fragment)
+        debut = fin
+    return fragments
+
+
+def enregistrer(content_type, document, empreinte_fichier, statut, texte='', erreur=''):
+    """Remplace le texte extrait du document et le signale à l'indexation."""
+    with transaction.atomic():
+        texte_document, _ = TexteDocument.objects.update_or_create(
+            content_type=content_type,
+            object_id=str(document.pk),
+            defaults={
+                'empreinte': empreinte_fichier,
+                'statut': statut,
+                'nb_caracteres': len(texte),
+                'erreur': erreur,
+                'date_extraction': timezone.now(),
+            },
+        )
+        texte_document.fragments.all().delete()
+        FragmentTexte.objects.bulk_create([
+            FragmentTexte(texte_document=texte_document, ordre=ordre, texte=fragment)
+            for ordre, fragment in enumerate(decouper(texte))
+        ])
+    signaler_modification(document)
+
+
+def _resultat(future):
+    """(statut, texte, erreur) d'une extraction terminée."""
+    try:
+        texte = future.result()
+    except MemoryError:
+        return TexteDocument.STATUT_TROP_VOLUMINEUX, '', f"Plafond de {MEMOIRE_MAX // 2**20} Mo atteint"
+    except BrokenProcessPool:
+        # Processus tué (signal, plantage) : le pool est inutilisable
+        _reinitialiser_pool()
+        raise
+    except Exception as exc:
+        # Fichier corrompu, chiffré, XML invalide...
+        return TexteDocument.STATUT_ECHEC, '', f'{type(exc).__name__}: {exc}'
+    if not texte:
+        return TexteDocument.STATUT_VIDE, '', ''
+    return TexteDocument.STATUT_EXTRAIT, texte, ''
+
+
+def extraire_documents(model, champ, documents, forcer=False):
+    """
+    Extrait en parallèle le texte des `documents` (instances de `model`)
+    dont le fichier a changé. Renvoie le nombre de documents par statut.
+    """
+    content_type = ContentType.objects.get_for_model(model)
+    documents = [document for document in documents if getattr(document, champ)]
+    existants = dict(
+        TexteDocument.objects.filter(
+            content_type=content_type,
+            object_id__in=[str(document.pk) for document in documents],
+        ).values_list('object_id', 'empreinte')
+    )
+
+    statuts = Counter()
+    en_cours = {}
+    with ExitStack() as fichiers:
+        for document in documents:
+            fieldfile = getattr(document, champ)
+            empreinte_fichier = empreinte(document, fieldfile)
+            if not forcer and existants.get(str(document.pk)) == empreinte_fichier:
+                statuts['inchange'] += 1
+                continue
+            if not format_pris_en_charge(fieldfile.name):
+                enregistrer(content_type, document, empreinte_fichier, TexteDocument.STATUT_NON_PRIS_EN_CHARGE)
+                statuts[TexteDocument.STATUT_NON_PRIS_EN_CHARGE] += 1
+                continue
+
+            chemin = fichiers.enter_context(chemin_local(fieldfile))
+            future = pool().submit(extraire_texte, chemin, fieldfile.name, CARACTERES_MAX, PAGES_MAX)
+            en_cours[future] = (document, empreinte_fichier)
+
+        for future in as_completed(en_cours):
+            document, empreinte_fichier = en_cours[future]
+            statut, texte, erreur = _resultat(future)
+            enregistrer(content_type, document, empreinte_fichier, statut, texte, erreur)
+            statuts[statut] += 1
+    return statuts
+
+
+def _apres_suppression(sender, instance, **kwargs):
+    TexteDocument.objects.filter(
+        content_type=ContentType.objects.get_for_model(sender),
+        object_id=str(instance.pk),
+    ).delete()
+
+
+def surveiller_documents():
+    """Met en file l'extraction à chaque nouveau fichier de document."""
+    from core.images import surveiller_fichier
+    from .taches import extraire_texte_document
+
+    for label, champ in DOCUMENTS:
+        model = apps.get_model(label)
+        surveiller_fichier(model, champ, extraire_texte_document, label, champ)
+        post_delete.connect(_apres_suppression, sender=model)
@@ -0,0 +1,119 @@
+"""
+Extraction du texte des fichiers PDF, DOCX et ODT.
+
+Ce module est exécuté dans les processus du pool d'extraction (voir
+recherche.documents) : il n'importe pas Django, ce qui garde le démarrage
+des processus rapide. Les extracteurs sont en Python pur (pypdf, zipfile,
+ElementTree).
+
+Un PDF scanné de plusieurs centaines de pages peut consommer beaucoup de
+mémoire : chaque processus est plafonné (RLIMIT_AS) et un dépassement
+lève MemoryError dans le processus, sans toucher au worker.
+"""
+import os
+import re
+import zipfile
+from xml.etree import ElementTree
+
+NS_WORD = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+NS_TEXTE_ODF = '{urn:oasis:names:tc:opendocument:xmlns:text:1.0}'
+
+# Caractères refusés par PostgreSQL (NUL) ou sans intérêt pour l'index
+_CONTROLE = re.compile(r'[\x00-\x08\x0b-\x1f\x7f]')
+_ESPACES = re.compile(r'[ \t\xa0]+')
+_LIGNES_VIDES = re.compile(r'\n\s*\n+')
+
+
+class FormatNonPrisEnCharge(ValueError):
+    pass
+
+
+def limiter_memoire(octets):
+    """Initialisation d'un processus du pool : plafonne son espace d'adressage."""
+    if not octets:
+        return
+    try:
+        import resource
+    except ImportError:
+        # Windows : pas de plafond
+        return
+    resource.setrlimit(resource.RLIMIT_AS, (octets, octets))
+
+
+def nettoyer(texte):
+    texte = _CONTROLE.sub(' ', texte)
+    texte = _ESPACES.sub(' ', texte)
+    return _LIGNES_VIDES.sub('\n\n', texte).strip()
+
+
+def _paragraphes_xml(archive, membre, balises, balise_texte=None):
+    """Texte des paragraphes d'un XML de l'archive, lu en flux."""
+    with archive.open(membre) as flux:
+        for _, element in ElementTree.iterparse(flux):
+            if element.tag not in balises:
+                continue
+            if balise_texte:
+                yield ''.join(t.text or '' for t in element.iter(balise_texte))
+            else:
+                yield ''.join(element.itertext())
+            element.clear()
+
+
+def extraire_docx(chemin, caracteres_max):
+    with zipfile.ZipFile(chemin) as archive:
+        paragraphes = _paragraphes_xml(
+            archive, 'word/document.xml', {f'{NS_WORD}p'}, balise_texte=f'{NS_WORD}t'
+        )
+        return _assembler(paragraphes, caracteres_max)
+
+
+def extraire_odt(chemin, caracteres_max):
+    with zipfile.ZipFile(chemin) as archive:
+        # Titres et paragraphes, dans l'ordre du document
+        paragraphes = _paragraphes_xml(
+            archive, 'content.xml', {f'{NS_TEXTE_ODF}p', f'{NS_TEXTE_ODF}h'}
+        )
+        return _assembler(paragraphes, caracteres_max)
+
+
+def extraire_pdf(chemin, caracteres_max, pages_max):
+    from pypdf import PdfReader
+
+    lecteur = PdfReader(chemin)
+    pages = (page.extract_text() or '' for page in lecteur.pages[:pages_max])
+    return _assembler(pages, caracteres_max)
+
+
+def _assembler(morceaux, caracteres_max):
+    """Concatène les morceaux jusqu'à `caracteres_max` caractères."""
+    resultat = []
+    longueur = 0
+    for morceau in morceaux:
+        resultat.append(morceau)
+        longueur += len(morceau) + 1
+        if longueur >= caracteres_max:
+            break
+    return nettoyer('\n'.join(resultat))[:caracteres_max]
+
+
+FORMATS = ('.pdf', '.docx', '.odt')
+
+
+def _extension(nom_fichier):
+    return os.path.splitext(nom_fichier)[1].lower()
+
+
+def format_pris_en_charge(nom_fichier):
+    return _extension(nom_fichier) in FORMATS
+
+
+def extraire_texte(chemin, nom_fichier, caracteres_max, pages_max):
+    """Texte du fichier `chemin` ; le format est déduit de `nom_fichier`."""
+    extension = _extension(nom_fichier)
+    if extension == '.pdf':
+        return extraire_pdf(chemin, caracteres_max, pages_max)
+    if extension == '.docx':
+        return extraire_docx(chemin, caracteres_max)
+    if extension == '.odt':
+        return extraire_odt(chemin, caracteres_max)
+    raise FormatNonPrisEnCharge(nom_fichier)
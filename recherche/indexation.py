@@ -0,0 +1,143 @@
+"""
+Indexation incrémentale hors du chemin de la requête.
+
+Les signaux de Wagtail (AUTO_UPDATE) réindexent chaque objet dans la
+requête qui l'enregistre : la publication d'une page attend la mise à jour
+de l'index. Ici, un enregistrement ou une suppression ajoute seulement
+l'objet à la file IndexationEnAttente (une requête d'upsert) ; la tâche
+`recherche.indexer_modifications` traite ensuite la file par lots.
+
+Concerne tous les modèles indexés : pages, ImagePersonnalisee,
+DocumentPersonnalise, FAQ...
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from wagtail.models import Page
+from wagtail.search import index
+from wagtail.search.backends import get_search_backends
+from wagtail.search.signal_handlers import post_delete_signal_handler, post_save_signal_handler
+
+from .models import IndexationEnAttente
+from .unifiee import invalider_cache
+
+TAILLE_LOT = getattr(settings, 'RECHERCHE_INDEXATION_LOT', 200)
+# Regroupe les enregistrements successifs (autosave, publication) en un lot
+DELAI = timedelta(seconds=getattr(settings, 'RECHERCHE_INDEXATION_DELAI', 5))
+
+
+def _champs_indexes(model):
+    return {champ.field_name for champ in model.get_search_fields()}
+
+
+def _content_type_id(instance):
+    # Une page connaît déjà son type spécifique : pas de requête
+    if isinstance(instance, Page) and instance.content_type_id:
+        return instance.content_type_id
+    return ContentType.objects.get_for_model(instance).pk
+
+
+def signaler_modification(instance):
+    """Ajoute `instance` à la file d'indexation et planifie son traitement."""
+    IndexationEnAttente.objects.bulk_create(
+        [IndexationEnAttente(
+            content_type_id=_content_type_id(instance),
+            object_id=str(instance.pk),
+            date_modification=timezone.now(),
+        )],
+        update_conflicts=True,
+        unique_fields=['content_type', 'object_id'],
+        update_fields=['date_modification'],
+    )
+    planifier_traitement()
+
+
+def planifier_traitement():
+    """Met en file la tâche de traitement si aucune n'attend déjà."""
+    from taches.models import Tache
+    from core.tenants import schema_courant
+    from .taches import indexer_modifications
+
+    if not Tache.objects.filter(
+        nom=indexer_modifications.nom_tache,
+        statut=Tache.EN_ATTENTE,
+        schema_name=schema_courant(),
+    ).exists():
+        indexer_modifications.differer(executer_apres=timezone.now() + DELAI)
+
+
+def _apres_enregistrement(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    # Ex : compteur de vues mis à jour seul, rien à réindexer
+    if update_fields is not None and not set(update_fields) & _champs_indexes(sender):
+        return
+    signaler_modification(instance)
+
+
+def _apres_suppression(sender, instance, **kwargs):
+    signaler_modification(instance)
+
+
+def connecter_signaux():
+    """Remplace les signaux d'indexation synchrone de Wagtail par la file."""
+    for model in index.get_indexed_models():
+        if not getattr(model, 'search_auto_update', True):
+            continue
+        post_save.disconnect(post_save_signal_handler, sender=model)
+        post_delete.disconnect(post_delete_signal_handler, sender=model)
+        post_save.connect(_apres_enregistrement, sender=model)
+        post_delete.connect(_apres_suppression, sender=model)
+
+
+def deconnecter_signaux():
+    """Désactive la file (benchmark, import massif suivi d'un update_index)."""
+    for model in index.get_indexed_models():
+        post_save.disconnect(_apres_enregistrement, sender=model)
+        post_delete.disconnect(_apres_suppression, sender=model)
+
+
+def indexer_objets(model, object_ids, backends):
+    """Réindexe les objets encore présents et retire les autres de l'index."""
+    objets = list(model.get_indexed_objects().filter(pk__in=object_ids))
+    for backend in backends:
+        if objets:
+            backend.add_bulk(model, objets)
+
+    presents = {str(objet.pk) for objet in objets}
+    for object_id in set(object_ids) - presents:
+        absent = model(pk=model._meta.pk.to_python(object_id))
+        for backend in backends:
+            backend.delete(absent)
+
+
+def traiter_file(taille_lot=TAILLE_LOT):
+    """Vide la file par lots ; renvoie le nombre d'objets traités."""
+    backends = list(get_search_backends())
+    traites = 0
+    while True:
+        elements = list(IndexationEnAttente.objects.order_by('pk')[:taille_lot])
+        if not elements:
+            return traites
+
+        par_type = defaultdict(list)
+        for element in elements:
+            par_type[element.content_type_id].append(element.object_id)
+        for content_type_id, object_ids in par_type.items():
+            model = ContentType.objects.get_for_id(content_type_id).model_class()
+            if model is not None and index.class_is_indexed(model):
+                indexer_objets(model, object_ids, backends)
+
+        # Un objet modifié pendant le traitement reste dans la file
+        traites_lot = Q()
+        for element in elements:
+            traites_lot |= Q(pk=element.pk, date_modification=element.date_modification)
+        IndexationEnAttente.objects.filter(traites_lot).delete()
+        traites += len(elements)
+        invalider_cache()
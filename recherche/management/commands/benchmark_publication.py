@@ -0,0 +1,93 @@
+"""Mesure la latence de publication avec et sans indexation différée.
+
+Usage:
+  python manage.py benchmark_publication [--pages=200]
+
+Crée N articles (StreamField compris) sous une page d'index temporaire et
+publie une révision de chacun :
+  - « synchrone » : indexation dans la publication (ancien AUTO_UPDATE)
+  - « différée »  : ajout à la file IndexationEnAttente seulement
+Le temps de traitement de la file par le worker est donné à part. Tout est
+annulé à la fin (rollback).
+"""
+import statistics
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from wagtail.models import Page
+from wagtail.search.backends import get_search_backends
+
+from cms.models import ArticleIndexPage, ArticlePage
+from recherche.indexation import connecter_signaux, deconnecter_signaux, traiter_file
+from recherche.models import IndexationEnAttente
+
+CORPS = "<p>" + "Le conseil municipal a délibéré sur les équipements sportifs du quartier. " * 40 + "</p>"
+
+
+class Command(BaseCommand):
+    help = 'Benchmark page publish latency with synchronous and deferred search indexing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=200, help='Number of pages to publish per mode')
+
+    def handle(self, *args, **options):
+        nombre = options['pages']
+        with transaction.atomic():
+            index_page = Page.get_first_root_node().add_child(instance=ArticleIndexPage(
+                title='Benchmark publication', slug=f'benchmark-publication-{int(time.time())}',
+            ))
+
+            deconnecter_signaux()
+            try:
+                backends = list(get_search_backends())
+
+                def indexer(page):
+                    for backend in backends:
+                        backend.add(page)
+
+                synchrone = self.publier(index_page, nombre, 'sync', indexer)
+            finally:
+                connecter_signaux()
+
+            IndexationEnAttente.objects.all().delete()
+            differee = self.publier(index_page, nombre, 'diff', None)
+
+            en_file = IndexationEnAttente.objects.count()
+            debut = time.perf_counter()
+            traiter_file()
+            duree_file = time.perf_counter() - debut
+
+            self.stdout.write(f"{'Mode':<12}{'moyenne':>10}{'p50':>10}{'p95':>10}  (ms par publication)")
+            for nom, durees in [('synchrone', synchrone), ('différée', differee)]:
+                durees.sort()
+                self.stdout.write(
+                    f'{nom:<12}{statistics.mean(durees):>10.1f}{statistics.median(durees):>10.1f}'
+                    f'{durees[int(len(durees) * 0.95) - 1]:>10.1f}'
+                )
+            self.stdout.write(f'File traitée par le worker : {en_file} objet(s) en {duree_file * 1000:.0f} ms')
+            self.stdout.write(self.style.SUCCESS('Benchmark terminé'))
+
+            transaction.set_rollback(True)
+
+    def publier(self, index_page, nombre, prefixe, indexer):
+        durees = []
+        for i in range(nombre):
+            page = index_page.add_child(instance=ArticlePage(
+                title=f'Article {prefixe} {i}',
+                slug=f'{prefixe}-{i}',
+                date_publication=date.today(),
+                resume='Résumé de la délibération du conseil municipal.',
+                contenu=[('texte_riche', {'contenu': CORPS})],
+                live=False,
+            ))
+            revision = page.save_revision()
+
+            debut = time.perf_counter()
+            revision.publish()
+            if indexer is not None:
+                indexer(page)
+            durees.append((time.perf_counter() - debut) * 1000)
+        return durees
@@ -0,0 +1,171 @@
+"""Compare la recherche actuelle et la recherche plein texte française.
+
+Usage:
+  python manage.py benchmark_recherche [--pages=50000] [--repetitions=20] [--garder]
+
+Génère N articles (titre, résumé, corps en StreamField) sous une page
+d'index temporaire, puis pour chaque configuration :
+  - « actuel »   : backend database sans configuration ni StreamField indexé
+  - « francais » : WAGTAILSEARCH_BACKENDS['default'] (racinisation, unaccent,
+                   poids titre > résumé > corps, StreamField indexé)
+mesure le temps d'indexation, la latence des requêtes (p50/p95) et le
+nombre de résultats. Les pages sont supprimées à la fin (rollback) sauf
+avec --garder.
+"""
+import random
+import statistics
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from wagtail.models import Page
+from wagtail.search import index
+from wagtail.search.backends import get_search_backend
+
+from cms.models import ArticleIndexPage, ArticlePage
+from recherche.indexation import connecter_signaux, deconnecter_signaux
+
+VOCABULAIRE = (
+    "mairie conseil municipal délibération arrêté état civil acte naissance mariage décès "
+    "école marché voirie travaux route éclairage assainissement eau potable quartier "
+    "équipements sportifs stade santé vaccination jeunesse culture festival budget "
+    "recensement élection permis construire urbanisme parcelle cadastre environnement "
+    "déchets collecte salubrité sécurité police transport gare taxe patente impôt "
+    "association femme agriculture élevage forêt pluie inondation solidarité"
+).split()
+
+REQUETES = [
+    'mariage',
+    'etat civil',
+    'equipements sportifs',
+    'délibérations du conseil',
+    'travaux de voirie',
+    'collecte des déchets',
+    'vaccination',
+]
+
+# search_fields d'ArticlePage avant l'indexation du StreamField et des poids
+CHAMPS_ACTUELS = Page.search_fields + [
+    index.SearchField('resume'),
+    index.FilterField('date_publication'),
+    index.FilterField('categorie'),
+]
+
+
+def phrase(alea, longueur):
+    return ' '.join(alea.choice(VOCABULAIRE) for _ in range(longueur)).capitalize() + '.'
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the tuned French full-text search against the current backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=50000, help='Number of article pages to generate')
+        parser.add_argument('--repetitions', type=int, default=20, help='Runs per query')
+        parser.add_argument('--lot', type=int, default=1000, help='Indexing batch size')
+        parser.add_argument('--graine', type=int, default=42, help='Random seed for generated content')
+        parser.add_argument('--garder', action='store_true', help='Keep generated pages and index')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING(
+                f"Base {connection.vendor} : SEARCH_CONFIG est ignoré, seuls les champs indexés diffèrent."
+            ))
+
+        with transaction.atomic():
+            index_page = self.generer_pages(options['pages'], options['graine'])
+            articles = ArticlePage.objects.descendant_of(index_page)
+
+            resultats = []
+            for nom, backend, champs in [
+                ('actuel', get_search_backend('wagtail.search.backends.database'), CHAMPS_ACTUELS),
+                ('francais', get_search_backend('default'), ArticlePage.search_fields),
+            ]:
+                champs_origine = ArticlePage.search_fields
+                ArticlePage.search_fields = champs
+                try:
+                    duree_index = self.indexer(backend, articles, options['lot'])
+                    mesures = self.interroger(backend, articles, options['repetitions'])
+                finally:
+                    ArticlePage.search_fields = champs_origine
+                resultats.append((nom, duree_index, mesures))
+
+            self.rapport(options['pages'], resultats)
+
+            if not options['garder']:
+                transaction.set_rollback(True)
+
+    def generer_pages(self, nombre, graine):
+        alea = random.Random(graine)
+        racine = Page.get_first_root_node()
+        index_page = racine.add_child(instance=ArticleIndexPage(
+            title='Benchmark recherche', slug=f'benchmark-recherche-{int(time.time())}',
+        ))
+
+        # Pas d'indexation pendant la génération : elle est mesurée ensuite
+        deconnecter_signaux()
+        try:
+            debut = time.perf_counter()
+            for i in range(nombre):
+                index_page.add_child(instance=ArticlePage(
+                    title=phrase(alea, 5),
+                    slug=f'article-{i}',
+                    date_publication=date(2024, 1 + i % 12, 1 + i % 28),
+                    resume=phrase(alea, 25),
+                    contenu=[
+                        ('texte_riche', {'contenu': f'<p>{phrase(alea, 120)}</p>'}),
+                        ('citation', {'contenu': f'<p>{phrase(alea, 30)}</p>'}),
+                    ],
+                ))
+                if (i + 1) % 5000 == 0:
+                    self.stdout.write(f'  {i + 1} pages générées ({time.perf_counter() - debut:.0f} s)')
+        finally:
+            connecter_signaux()
+        return index_page
+
+    def indexer(self, backend, articles, lot):
+        index_backend = backend.get_index_for_model(ArticlePage)
+        pks = list(articles.values_list('pk', flat=True))
+        debut = time.perf_counter()
+        for i in range(0, len(pks), lot):
+            index_backend.add_items(ArticlePage, list(ArticlePage.objects.filter(pk__in=pks[i:i + lot])))
+        return time.perf_counter() - debut
+
+    def interroger(self, backend, articles, repetitions):
+        mesures = {}
+        for requete in REQUETES:
+            durees = []
+            for _ in range(repetitions):
+                debut = time.perf_counter()
+                # Première page de résultats, comme la page de recherche
+                premiers = list(backend.search(requete, articles)[:10])
+                durees.append((time.perf_counter() - debut) * 1000)
+            total = backend.search(requete, articles).count()
+            durees.sort()
+            mesures[requete] = (
+                statistics.median(durees),
+                durees[int(len(durees) * 0.95) - 1],
+                total,
+                len(premiers),
+            )
+        return mesures
+
+    def rapport(self, nombre, resultats):
+        self.stdout.write('')
+        self.stdout.write(f'{nombre} articles')
+        for nom, duree_index, _ in resultats:
+            self.stdout.write(f'  indexation {nom:<9} {duree_index:8.1f} s')
+        self.stdout.write('')
+
+        entete = f"{'Requête':<28}" + ''.join(f"{nom + ' p50/p95 (ms)':>26}{'résultats':>11}" for nom, _, _ in resultats)
+        self.stdout.write(entete)
+        for requete in REQUETES:
+            ligne = f'{requete:<28}'
+            for _, _, mesures in resultats:
+                p50, p95, total, _ = mesures[requete]
+                ligne += f'{p50:>15.1f} / {p95:>7.1f}{total:>11}'
+            self.stdout.write(ligne)
+
+        self.stdout.write(self.style.SUCCESS('Benchmark terminé'))
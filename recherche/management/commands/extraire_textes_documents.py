@@ -0,0 +1,45 @@
+"""Extrait le texte des documents existants (reprise ou ré-extraction).
+
+Usage:
+  python manage.py extraire_textes_documents [--forcer] [--lot=50]
+
+Parcourt les documents de chaque mairie. Ceux dont l'empreinte du fichier
+n'a pas changé sont ignorés, sauf avec --forcer. Les extractions d'un lot
+tournent en parallèle dans le pool de processus (RECHERCHE_EXTRACTION_PROCESSUS).
+"""
+import time
+from collections import Counter
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from core.tenants import pour_chaque_mairie
+from recherche.documents import DOCUMENTS, extraire_documents
+
+
+class Command(BaseCommand):
+    help = 'Extract and index the text of existing PDF, DOCX and ODT documents'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--forcer', action='store_true', help='Extract even when the file hash is unchanged')
+        parser.add_argument('--lot', type=int, default=50, help='Documents submitted to the pool at once')
+
+    def handle(self, *args, **options):
+        debut = time.perf_counter()
+        total = Counter()
+        for schema in pour_chaque_mairie():
+            for label, champ in DOCUMENTS:
+                model = apps.get_model(label)
+                documents = model._default_manager.exclude(**{champ: ''}).order_by('pk')
+                statuts = Counter()
+                for i in range(0, documents.count(), options['lot']):
+                    lot = list(documents[i:i + options['lot']])
+                    statuts.update(extraire_documents(model, champ, lot, forcer=options['forcer']))
+                if statuts:
+                    detail = ', '.join(f'{statut} : {nombre}' for statut, nombre in sorted(statuts.items()))
+                    self.stdout.write(f'{schema} / {label} — {detail}')
+                total.update(statuts)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{sum(total.values())} document(s) traité(s) en {time.perf_counter() - debut:.1f} s'
+        ))
@@ -0,0 +1,72 @@
+"""Reconstruit l'index de recherche de chaque mairie, en parallèle.
+
+Usage:
+  python manage.py reindexer_mairies [--processus=4] [--schema=code ...] [--lot=1000]
+
+Chaque schéma est reconstruit par `update_index` dans un processus séparé
+(une connexion par processus). Les entrées de la file d'indexation
+antérieures à la reconstruction sont ensuite purgées.
+"""
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from core.tenants import schema_context, schemas_mairies
+
+
+def reconstruire(schema, lot):
+    """Exécuté dans un processus fils : reconstruit l'index d'un schéma."""
+    debut = time.perf_counter()
+    with schema_context(schema):
+        from recherche.models import IndexationEnAttente
+
+        date_debut = timezone.now()
+        call_command('update_index', chunk_size=lot, stdout=io.StringIO())
+        IndexationEnAttente.objects.filter(date_modification__lt=date_debut).delete()
+    connections.close_all()
+    return time.perf_counter() - debut
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the search index of every tenant in parallel processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processus', type=int, default=min(4, os.cpu_count() or 1),
+                            help='Number of worker processes')
+        parser.add_argument('--schema', action='append', dest='schemas',
+                            help='Only rebuild this schema (repeatable)')
+        parser.add_argument('--lot', type=int, default=1000, help='update_index chunk size')
+
+    def handle(self, *args, **options):
+        schemas = options['schemas'] or schemas_mairies()
+        processus = max(1, min(options['processus'], len(schemas)))
+        self.stdout.write(f'{len(schemas)} schéma(s), {processus} processus')
+
+        # Les processus fils ne doivent pas hériter des connexions ouvertes
+        connections.close_all()
+        debut = time.perf_counter()
+        echecs = 0
+        with ProcessPoolExecutor(max_workers=processus, mp_context=multiprocessing.get_context('fork')) as pool:
+            futures = {pool.submit(reconstruire, schema, options['lot']): schema for schema in schemas}
+            for future in as_completed(futures):
+                schema = futures[future]
+                try:
+                    duree = future.result()
+                except Exception as exc:
+                    echecs += 1
+                    self.stdout.write(self.style.ERROR(f'✗ {schema} : {exc}'))
+                else:
+                    self.stdout.write(f'✓ {schema} ({duree:.1f} s)')
+
+        message = f'Index reconstruits en {time.perf_counter() - debut:.1f} s'
+        if echecs:
+            self.stdout.write(self.style.WARNING(f'{message}, {echecs} échec(s)'))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,52 @@
+"""
+Configuration de recherche plein texte « francais » (PostgreSQL uniquement).
+
+Copie de la configuration french de PostgreSQL dont les mots passent par
+unaccent avant la racinisation : « équipement », « equipements » et
+« Équipé » donnent la même racine. Avec django-tenants, migrate_schemas
+crée la configuration dans chaque schéma de mairie ; l'extension unaccent
+est partagée dans le schéma public.
+"""
+from django.db import migrations
+
+CONFIGURATION = 'francais'
+
+CREER = f"""
+CREATE EXTENSION IF NOT EXISTS unaccent SCHEMA public;
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_ts_config
+        WHERE cfgname = '{CONFIGURATION}' AND cfgnamespace = current_schema()::regnamespace
+    ) THEN
+        CREATE TEXT SEARCH CONFIGURATION {CONFIGURATION} (COPY = pg_catalog.french);
+        ALTER TEXT SEARCH CONFIGURATION {CONFIGURATION}
+            ALTER MAPPING FOR hword, hword_part, word WITH public.unaccent, french_stem;
+    END IF;
+END
+$$;
+"""
+
+SUPPRIMER = f"DROP TEXT SEARCH CONFIGURATION IF EXISTS {CONFIGURATION};"
+
+
+def creer_configuration(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREER)
+
+
+def supprimer_configuration(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(SUPPRIMER)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        # Index GIN sur wagtailsearch_indexentry (title, body, autocomplete)
+        ('wagtailsearch', '0006_customise_indexentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(creer_configuration, supprimer_configuration),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1 on 2026-10-19 18:59
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('recherche', '0001_configuration_francais'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexationEnAttente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.CharField(max_length=255)),
+                ('date_modification', models.DateTimeField(default=django.utils.timezone.now)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': 'Indexation en attente',
+                'verbose_name_plural': 'Indexations en attente',
+                'constraints': [models.UniqueConstraint(fields=('content_type', 'object_id'), name='indexation_objet_unique')],
+            },
+        ),
+    ]
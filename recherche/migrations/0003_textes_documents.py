@@ -0,0 +1,55 @@
+# Generated by Django 5.1 on 2026-10-19 19:08
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('recherche', '0002_file_indexation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TexteDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.CharField(max_length=255)),
+                ('empreinte', models.CharField(max_length=40)),
+                ('statut', models.CharField(choices=[('extrait', 'Texte extrait'), ('vide', 'Aucun texte (document scanné)'), ('non_pris_en_charge', 'Format non pris en charge'), ('trop_volumineux', 'Trop volumineux'), ('echec', 'Échec')], max_length=20)),
+                ('nb_caracteres', models.PositiveIntegerField(default=0)),
+                ('erreur', models.TextField(blank=True)),
+                ('date_extraction', models.DateTimeField(default=django.utils.timezone.now)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': 'Texte de document',
+                'verbose_name_plural': 'Textes de documents',
+            },
+        ),
+        migrations.CreateModel(
+            name='FragmentTexte',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ordre', models.PositiveIntegerField()),
+                ('texte', models.TextField()),
+                ('texte_document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fragments', to='recherche.textedocument')),
+            ],
+            options={
+                'verbose_name': 'Fragment de texte',
+                'verbose_name_plural': 'Fragments de texte',
+                'ordering': ['ordre'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='textedocument',
+            constraint=models.UniqueConstraint(fields=('content_type', 'object_id'), name='texte_document_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='fragmenttexte',
+            constraint=models.UniqueConstraint(fields=('texte_document', 'ordre'), name='fragment_texte_unique'),
+        ),
+    ]
@@ -0,0 +1,100 @@
+"""
+File des objets à réindexer et texte extrait des documents.
+
+Avec django-tenants, l'application doit figurer dans TENANT_APPS : chaque
+mairie a sa propre file, traitée dans son schéma.
+"""
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.utils import timezone
+
+
+class IndexationEnAttente(models.Model):
+    """Objet modifié ou supprimé dont l'entrée d'index doit être mise à jour."""
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.CharField(max_length=255)
+    date_modification = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Indexation en attente"
+        verbose_name_plural = "Indexations en attente"
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id'], name='indexation_objet_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.content_type} #{self.object_id}"
+
+
+class TexteDocument(models.Model):
+    """Texte extrait du fichier d'un document (voir recherche.documents)."""
+
+    STATUT_EXTRAIT = 'extrait'
+    STATUT_VIDE = 'vide'
+    STATUT_NON_PRIS_EN_CHARGE = 'non_pris_en_charge'
+    STATUT_TROP_VOLUMINEUX = 'trop_volumineux'
+    STATUT_ECHEC = 'echec'
+    STATUT_CHOICES = [
+        (STATUT_EXTRAIT, 'Texte extrait'),
+        (STATUT_VIDE, 'Aucun texte (document scanné)'),
+        (STATUT_NON_PRIS_EN_CHARGE, 'Format non pris en charge'),
+        (STATUT_TROP_VOLUMINEUX, 'Trop volumineux'),
+        (STATUT_ECHEC, 'Échec'),
+    ]
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.CharField(max_length=255)
+    # SHA-1 du fichier : une extraction n'est refaite que s'il change
+    empreinte = models.CharField(max_length=40)
+    statut = models.CharField(max_length=20, choices=STATUT_CHOICES)
+    nb_caracteres = models.PositiveIntegerField(default=0)
+    erreur = models.TextField(blank=True)
+    date_extraction = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Texte de document"
+        verbose_name_plural = "Textes de documents"
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id'], name='texte_document_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.content_type} #{self.object_id} ({self.get_statut_display()})"
+
+
+class FragmentTexte(models.Model):
+    """Morceau du texte extrait, dans l'ordre du document."""
+
+    texte_document = models.ForeignKey(TexteDocument, on_delete=models.CASCADE, related_name='fragments')
+    ordre = models.PositiveIntegerField()
+    texte = models.TextField()
+
+    class Meta:
+        verbose_name = "Fragment de texte"
+        verbose_name_plural = "Fragments de texte"
+        ordering = ['ordre']
+        constraints = [
+            models.UniqueConstraint(fields=['texte_document', 'ordre'], name='fragment_texte_unique'),
+        ]
+
+
+class TexteExtraitMixin:
+    """
+    Donne accès au texte extrait du fichier d'un document.
+
+    À indexer avec index.SearchField('texte_extrait') : le texte est relu
+    depuis ses fragments, limité à RECHERCHE_EXTRACTION_TEXTE_INDEXE_MAX
+    caractères (un tsvector PostgreSQL ne dépasse pas 1 Mo).
+    """
+
+    def texte_extrait(self):
+        if self.pk is None:
+            return ''
+        fragments = FragmentTexte.objects.filter(
+            texte_document__content_type=ContentType.objects.get_for_model(self),
+            texte_document__object_id=str(self.pk),
+        ).values_list('texte', flat=True)
+        limite = getattr(settings, 'RECHERCHE_EXTRACTION_TEXTE_INDEXE_MAX', 500_000)
+        return '\n'.join(fragments)[:limite]
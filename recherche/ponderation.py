@@ -0,0 +1,10 @@
+"""
+Pondération de la recherche plein texte (poids A à D sous PostgreSQL).
+
+Titre (boost 2, défini par Page) > chapeau/résumé > corps. Les poids sont
+répartis d'après l'ensemble des boosts distincts du projet : au-delà de
+quatre valeurs, PostgreSQL ne peut plus les distinguer.
+"""
+BOOST_TITRE = 2
+BOOST_RESUME = 1.5
+BOOST_CORPS = 0.5
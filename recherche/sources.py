@@ -0,0 +1,109 @@
+"""
+Sources interrogées par la recherche unifiée.
+
+Chaque source fournit le queryset des objets publics, leur titre et leur
+URL. Toutes passent par le même backend (même configuration plein texte
+et mêmes poids), ce qui rend leurs scores comparables.
+"""
+from dataclasses import dataclass
+from typing import Callable
+
+from django.urls import reverse
+
+from wagtail.models import Page, Site
+
+
+@dataclass(frozen=True)
+class Source:
+    nom: str
+    libelle: str
+    queryset: Callable
+    titre: Callable
+    url: Callable
+    # Chargement des objets d'une page de résultats (ex : pages spécifiques)
+    charger: Callable = None
+    date: Callable = None
+
+
+def _pages(request):
+    pages = Page.objects.live().public()
+    site = Site.find_for_request(request)
+    if site:
+        pages = pages.descendant_of(site.root_page, inclusive=True)
+    return pages
+
+
+def _faq(request):
+    from cms.models import FAQ
+    return FAQ.objects.filter(publie=True)
+
+
+def _articles(request):
+    from contenu.models import Article
+    return Article.objects.filter(publie=True)
+
+
+def _evenements(request):
+    from contenu.models import Evenement
+    return Evenement.objects.filter(publie=True)
+
+
+def _documents(request):
+    from contenu.models import Document
+    return Document.objects.filter(public=True)
+
+
+def _projets(request):
+    from contenu.models import ProjetMunicipal
+    return ProjetMunicipal.objects.filter(publie=True)
+
+
+def _pages_statiques(request):
+    from core.models import PageStatique
+    return PageStatique.objects.filter(publie=True)
+
+
+SOURCES = [
+    Source(
+        'pages', "Page du site", _pages,
+        titre=lambda page: page.title,
+        url=lambda page, request: page.get_url(request),
+        charger=lambda queryset, ids: queryset.filter(pk__in=ids).specific().in_bulk(),
+        date=lambda page: page.last_published_at,
+    ),
+    Source(
+        'faq', "Question fréquente", _faq,
+        titre=lambda faq: faq.question,
+        url=lambda faq, request: None,
+    ),
+    Source(
+        'articles', "Actualité", _articles,
+        titre=lambda article: article.titre,
+        url=lambda article, request: reverse('contenu:article_detail', args=[article.slug]),
+        date=lambda article: article.date_publication,
+    ),
+    Source(
+        'evenements', "Événement", _evenements,
+        titre=lambda evenement: evenement.titre,
+        url=lambda evenement, request: reverse('contenu:evenement_detail', args=[evenement.slug]),
+        date=lambda evenement: evenement.date_debut,
+    ),
+    Source(
+        'documents', "Document", _documents,
+        titre=lambda document: document.titre,
+        url=lambda document, request: reverse('contenu:telecharger_document', args=[document.pk]),
+        date=lambda document: document.date_document,
+    ),
+    Source(
+        'projets', "Projet municipal", _projets,
+        titre=lambda projet: projet.titre,
+        url=lambda projet, request: reverse('contenu:projet_detail', args=[projet.slug]),
+    ),
+    Source(
+        'pages_statiques', "Information", _pages_statiques,
+        titre=lambda page: page.titre,
+        url=lambda page, request: reverse('core:page_statique', args=[page.slug]),
+    ),
+]
+
+SOURCES_PAR_NOM = {source.nom: source for source in SOURCES}
@@ -0,0 +1,175 @@
+"""
+Extraits et surlignage des termes recherchés.
+
+La comparaison ignore la casse et les accents, et rapproche les formes
+fléchies par un préfixe commun (« équipements » surligne « équipement »),
+à l'image de la racinisation française faite par PostgreSQL.
+
+Le texte extrait d'un document peut atteindre des centaines de milliers de
+caractères : pour une page de résultats, extraits_documents() n'en lit
+qu'une fenêtre autour des termes, en une requête par type de document.
+"""
+import re
+import unicodedata
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q, Value
+from django.db.models.functions import Greatest, Lower, StrIndex, Substr
+from django.utils.html import escape, strip_tags
+from django.utils.safestring import mark_safe
+from django.utils.text import Truncator
+
+from wagtail.search import index
+
+from .models import FragmentTexte, TexteExtraitMixin
+
+LONGUEUR_EXTRAIT = 240
+LONGUEUR_RACINE_MIN = 4
+# Fenêtre lue en base autour d'un terme, dans le texte d'un document
+FENETRE_DOCUMENT = 2 * LONGUEUR_EXTRAIT
+# Termes cherchés en base pour placer la fenêtre
+TERMES_DOCUMENT_MAX = 3
+
+_MOT = re.compile(r'\w+')
+
+
+def sans_accents(texte):
+    return ''.join(
+        c for c in unicodedata.normalize('NFD', texte.lower())
+        if unicodedata.category(c) != 'Mn'
+    )
+
+
+def racines(requete, accents=False):
+    """Racines approchées des termes de la requête (sans accents, sauf `accents`)."""
+    resultat = set()
+    texte = (requete or '').lower() if accents else sans_accents(requete or '')
+    for mot in _MOT.findall(texte):
+        if len(mot) < 2:
+            continue
+        # Retire les terminaisons les plus fréquentes (pluriels, féminins)
+        racine = re.sub(r'(ements?|ations?|euses?|eurs?|es|s|e)$', '', mot)
+        resultat.add(racine if len(racine) >= LONGUEUR_RACINE_MIN else mot)
+    return resultat
+
+
+def _correspond(mot, termes):
+    mot = sans_accents(mot)
+    return any(mot.startswith(terme) for terme in termes)
+
+
+def _cle_document(objet):
+    return (type(objet)._meta.label_lower, str(objet.pk))
+
+
+def extraits_documents(objets, requete):
+    """
+    Fenêtres du texte extrait des documents de `objets` : autour de la
+    première occurrence d'un terme de la requête, sinon début du texte.
+    Une requête par type de document ; {(modèle, pk): texte}.
+    """
+    par_modele = defaultdict(list)
+    for objet in objets:
+        if isinstance(objet, TexteExtraitMixin) and objet.pk is not None:
+            par_modele[type(objet)].append(str(objet.pk))
+    if not par_modele:
+        return {}
+
+    termes = sorted(racines(requete) | racines(requete, accents=True), key=len, reverse=True)
+    termes = termes[:TERMES_DOCUMENT_MAX]
+    annotations = {'debut': Substr('texte', 1, FENETRE_DOCUMENT)}
+    condition = Q(ordre=0)
+    for i, terme in enumerate(termes):
+        position = StrIndex(Lower('texte'), Value(terme))
+        annotations[f'position_{i}'] = position
+        annotations[f'fenetre_{i}'] = Substr(
+            'texte', Greatest(position - FENETRE_DOCUMENT // 4, 1), FENETRE_DOCUMENT,
+        )
+        condition |= Q(texte__icontains=terme)
+
+    extraits = {}
+    for modele, ids in par_modele.items():
+        fragments = (
+            FragmentTexte.objects
+            .filter(
+                condition,
+                texte_document__content_type=ContentType.objects.get_for_model(modele),
+                texte_document__object_id__in=ids,
+            )
+            .annotate(**annotations)
+            .values('texte_document__object_id', 'ordre', *annotations)
+            .order_by('texte_document__object_id', 'ordre')
+        )
+        debuts, trouves = {}, {}
+        for fragment in fragments:
+            cle = (modele._meta.label_lower, fragment['texte_document__object_id'])
+            if fragment['ordre'] == 0:
+                debuts[cle] = fragment['debut']
+            if cle in trouves:
+                continue
+            for i in range(len(termes)):
+                if fragment[f'position_{i}']:
+                    trouves[cle] = fragment[f'fenetre_{i}']
+                    break
+        extraits.update(debuts)
+        extraits.update(trouves)
+    return extraits
+
+
+def texte_indexe(objet, extraits=None):
+    """
+    Texte des champs de recherche d'un objet indexé (titre exclu), par
+    poids décroissant. Le texte extrait d'un document est pris dans
+    `extraits` (voir extraits_documents) s'il est fourni.
+    """
+    champs = [
+        champ for champ in objet.get_search_fields()
+        if isinstance(champ, index.SearchField) and champ.field_name not in ('title', 'titre')
+    ]
+    champs.sort(key=lambda champ: -(champ.boost or 0))
+    morceaux = []
+    for champ in champs:
+        if champ.field_name == 'texte_extrait' and extraits is not None:
+            valeur = extraits.get(_cle_document(objet), '')
+        else:
+            valeur = champ.get_value(objet)
+        if isinstance(valeur, (list, tuple)):
+            morceaux.extend(str(v) for v in valeur if v)
+        elif valeur:
+            morceaux.append(str(valeur))
+    texte = ' '.join(morceaux) or getattr(objet, 'search_description', '')
+    return re.sub(r'\s+', ' ', strip_tags(texte)).strip()
+
+
+def extrait(texte, requete, longueur=LONGUEUR_EXTRAIT):
+    """Fenêtre de texte centrée sur la première occurrence d'un terme."""
+    termes = racines(requete)
+    debut = 0
+    for correspondance in _MOT.finditer(texte):
+        if _correspond(correspondance.group(), termes):
+            debut = max(correspondance.start() - longueur // 4, 0)
+            break
+    if debut:
+        # Commence sur une frontière de mot
+        espace = texte.find(' ', debut)
+        debut = espace + 1 if 0 <= espace < debut + 30 else debut
+    fenetre = Truncator(texte[debut:]).chars(longueur)
+    return ('… ' if debut else '') + fenetre
+
+
+def surligner(texte, requete):
+    """Échappe `texte` et entoure de <mark> les mots correspondant à la requête."""
+    termes = racines(requete)
+    if not termes:
+        return escape(texte)
+
+    morceaux = []
+    position = 0
+    for correspondance in _MOT.finditer(texte):
+        if _correspond(correspondance.group(), termes):
+            morceaux.append(escape(texte[position:correspondance.start()]))
+            morceaux.append(f'<mark>{escape(correspondance.group())}</mark>')
+            position = correspondance.end()
+    morceaux.append(escape(texte[position:]))
+    return mark_safe(''.join(morceaux))
@@ -0,0 +1,24 @@
+"""
+Tâches en arrière-plan de la recherche.
+"""
+from taches.models import Tache
+from taches.registre import tache
+
+
+@tache(nom='recherche.indexer_modifications', priorite=Tache.PRIORITE_NORMALE)
+def indexer_modifications():
+    """Met à jour l'index de recherche pour les objets de la file."""
+    from .indexation import traiter_file
+    traiter_file()
+
+
+@tache(nom='recherche.extraire_texte_document', priorite=Tache.PRIORITE_BASSE, max_tentatives=3)
+def extraire_texte_document(label, champ, pk):
+    """Extrait le texte du fichier `champ` du document `label` / `pk`."""
+    from django.apps import apps
+    from .documents import extraire_documents
+
+    Model = apps.get_model(label)
+    document = Model._default_manager.filter(pk=pk).first()
+    if document is not None:
+        extraire_documents(Model, champ, [document])
@@ -0,0 +1,193 @@
+"""
+Recherche unifiée : pages Wagtail, contenus, FAQ et pages statiques.
+
+Les sources sont interrogées en parallèle (une connexion par thread,
+fermée à la fin de chaque source) ; leurs meilleurs résultats sont
+fusionnés par score puis mis en cache par mairie. La pagination par curseur parcourt cette liste classée : les pages
+suivantes d'une même recherche ne coûtent qu'une lecture de cache et le
+chargement des objets affichés.
+
+Le cache est invalidé par mairie à chaque passage de l'indexation
+incrémentale (voir recherche.indexation).
+"""
+import base64
+import binascii
+import bisect
+import hashlib
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from wagtail.models import Site
+from wagtail.search.backends import get_search_backend
+
+from core.tenants import schema_context, schema_courant
+
+from .sources import SOURCES, SOURCES_PAR_NOM
+from .surlignage import extrait, extraits_documents, surligner, texte_indexe
+
+logger = logging.getLogger(__name__)
+
+# Résultats retenus par source avant fusion
+PROFONDEUR = getattr(settings, 'RECHERCHE_API_PROFONDEUR', 100)
+DUREE_CACHE = getattr(settings, 'RECHERCHE_API_CACHE_DUREE', 300)
+LIMITE_MAX = 50
+
+_executeur = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'RECHERCHE_API_THREADS', len(SOURCES)),
+    thread_name_prefix='recherche',
+)
+
+
+class CurseurInvalide(ValueError):
+    pass
+
+
+def normaliser_requete(requete):
+    return ' '.join((requete or '').lower().split())
+
+
+def _cle_version(schema):
+    return f'recherche:{schema}:version'
+
+
+def invalider_cache(schema=None):
+    """Change la version du cache de recherche de la mairie."""
+    cle = _cle_version(schema or schema_courant())
+    try:
+        cache.incr(cle)
+    except ValueError:
+        cache.set(cle, 1, None)
+
+
+def _cle_cache(schema, requete, noms_sources, site_id):
+    version = cache.get(_cle_version(schema), 0)
+    empreinte = hashlib.md5(f"{requete}|{','.join(noms_sources)}|{site_id}".encode()).hexdigest()
+    return f'recherche:{schema}:{version}:{empreinte}'
+
+
+def _chercher_source(ordre, source, queryset, requete, schema):
+    """Exécuté dans un thread : meilleurs résultats d'une source."""
+    try:
+        with schema_context(schema):
+            resultats = get_search_backend().search(requete, queryset)
+            if connection.vendor != 'postgresql':
+                # Le backend SQLite de Wagtail ne sait pas annoter le score :
+                # les résultats étant triés, le rang en tient lieu
+                return [
+                    (-1.0 / (rang + 1), ordre, objet.pk, source.nom)
+                    for rang, objet in enumerate(resultats[:PROFONDEUR])
+                ]
+            return [
+                (-(objet._score or 0.0), ordre, objet.pk, source.nom)
+                for objet in resultats.annotate_score('_score')[:PROFONDEUR]
+            ]
+    except Exception:
+        logger.exception("Recherche unifiée : échec de la source %s", source.nom)
+        return []
+    finally:
+        # Connexion propre au thread du pool : fermée après chaque source
+        connection.close()
+
+
+def resultats_classes(request, requete, noms_sources):
+    """Liste fusionnée (clé de tri, source) des résultats, depuis le cache si possible."""
+    schema = schema_courant()
+    site = Site.find_for_request(request)
+    cle = _cle_cache(schema, requete, noms_sources, getattr(site, 'pk', None))
+    classes = cache.get(cle)
+    if classes is not None:
+        return classes
+
+    futures = [
+        _executeur.submit(
+            _chercher_source, ordre, source, source.queryset(request), requete, schema
+        )
+        for ordre, source in enumerate(SOURCES)
+        if source.nom in noms_sources
+    ]
+    classes = sorted(r for future in futures for r in future.result())
+    cache.set(cle, classes, DUREE_CACHE)
+    return classes
+
+
+def encoder_curseur(cle):
+    return base64.urlsafe_b64encode(json.dumps(list(cle[:3])).encode()).decode().rstrip('=')
+
+
+def decoder_curseur(curseur):
+    try:
+        score, ordre, pk = json.loads(base64.urlsafe_b64decode(curseur + '=' * (-len(curseur) % 4)))
+        return (float(score), int(ordre), pk)
+    except (ValueError, TypeError, binascii.Error):
+        raise CurseurInvalide(curseur)
+
+
+def _serialiser(request, requete, page):
+    """Charge les objets de la page de résultats (une requête par source)."""
+    par_source = {}
+    for _, _, pk, nom in page:
+        par_source.setdefault(nom, []).append(pk)
+
+    objets = {}
+    for nom, ids in par_source.items():
+        source = SOURCES_PAR_NOM[nom]
+        queryset = source.queryset(request)
+        if source.charger:
+            trouves = source.charger(queryset, ids)
+        else:
+            trouves = queryset.filter(pk__in=ids).in_bulk()
+        objets.update({(nom, pk): objet for pk, objet in trouves.items()})
+
+    # Texte des documents : une fenêtre autour des termes, en bloc
+    extraits = extraits_documents(objets.values(), requete)
+
+    resultats = []
+    for score, _, pk, nom in page:
+        objet = objets.get((nom, pk))
+        if objet is None:
+            # Dépublié depuis la mise en cache
+            continue
+        source = SOURCES_PAR_NOM[nom]
+        date = source.date(objet) if source.date else None
+        resultats.append({
+            'type': nom,
+            'type_libelle': source.libelle,
+            'id': pk,
+            'titre': source.titre(objet),
+            'titre_html': surligner(source.titre(objet), requete),
+            'extrait_html': surligner(extrait(texte_indexe(objet, extraits), requete), requete),
+            'url': source.url(objet, request),
+            'date': date.isoformat() if date else None,
+            'score': round(-score, 4),
+        })
+    return resultats
+
+
+def rechercher(request, requete, noms_sources=None, curseur=None, limite=20):
+    """Page de résultats de la recherche unifiée."""
+    requete = normaliser_requete(requete)
+    noms_sources = sorted(set(noms_sources or SOURCES_PAR_NOM) & set(SOURCES_PAR_NOM))
+    limite = max(1, min(limite, LIMITE_MAX))
+    if not requete:
+        return {'requete': requete, 'total': 0, 'resultats': [], 'curseur_suivant': None}
+
+    classes = resultats_classes(request, requete, noms_sources)
+    debut = bisect.bisect_right(classes, decoder_curseur(curseur), key=lambda r: r[:3]) if curseur else 0
+    page = classes[debut:debut + limite]
+    suivant = encoder_curseur(page[-1]) if page and debut + limite < len(classes) else None
+
+    return {
+        'requete': requete,
+        'total': len(classes),
+        # Chaque source est limitée à PROFONDEUR résultats
+        'total_exact': all(
+            sum(1 for r in classes if r[3] == nom) < PROFONDEUR for nom in noms_sources
+        ),
+        'resultats': _serialiser(request, requete, page),
+        'curseur_suivant': suivant,
+    }
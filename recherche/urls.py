@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+app_name = 'recherche'
+
+urlpatterns = [
+    path('', views.recherche_view, name='resultats'),
+    path('api/', views.recherche_api_view, name='api'),
+]
@@ -0,0 +1,89 @@
+"""
+Page de résultats de la recherche plein texte et API de recherche unifiée.
+"""
+import time
+
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.http import JsonResponse
+from django.shortcuts import render
+from django.views.decorators.http import require_GET
+
+from wagtail.contrib.search_promotions.models import Query
+from wagtail.models import Page, Site
+
+from .surlignage import extrait, surligner, texte_indexe
+from .unifiee import CurseurInvalide, rechercher
+
+RESULTATS_PAR_PAGE = 10
+
+
+def recherche_view(request):
+    """Recherche dans les pages publiées du site, classées par pertinence."""
+    requete = request.GET.get('q', '').strip()
+    resultats = []
+    page_resultats = None
+    promotions = []
+
+    if requete:
+        pages = Page.objects.live().public()
+        site = Site.find_for_request(request)
+        if site:
+            pages = pages.descendant_of(site.root_page, inclusive=True)
+
+        paginator = Paginator(pages.search(requete), RESULTATS_PAR_PAGE)
+        try:
+            page_resultats = paginator.page(request.GET.get('page', 1))
+        except PageNotAnInteger:
+            page_resultats = paginator.page(1)
+        except EmptyPage:
+            page_resultats = paginator.page(paginator.num_pages)
+
+        # Une requête pour les versions spécifiques des pages affichées
+        ids = [page.pk for page in page_resultats.object_list]
+        specifiques = Page.objects.filter(pk__in=ids).specific().in_bulk()
+        for pk in ids:
+            page = specifiques[pk]
+            resultats.append({
+                'page': page,
+                'titre': surligner(page.title, requete),
+                'extrait': surligner(extrait(texte_indexe(page), requete), requete),
+            })
+
+        query = Query.get(requete)
+        query.add_hit()
+        promotions = query.editors_picks.select_related('page')
+
+    return render(request, 'recherche/resultats.html', {
+        'requete': requete,
+        'resultats': resultats,
+        'page_resultats': page_resultats,
+        'promotions': promotions,
+    })
+
+
+@require_GET
+def recherche_api_view(request):
+    """
+    API JSON : /recherche/api/?q=...&sources=pages,articles&limite=20&curseur=...
+    Renvoie les résultats de toutes les sources, classés par pertinence.
+    """
+    debut = time.perf_counter()
+    sources = [nom for nom in request.GET.get('sources', '').split(',') if nom]
+    try:
+        limite = int(request.GET.get('limite', 20))
+    except ValueError:
+        limite = 20
+
+    try:
+        donnees = rechercher(
+            request,
+            request.GET.get('q', ''),
+            noms_sources=sources,
+            curseur=request.GET.get('curseur') or None,
+            limite=limite,
+        )
+    except CurseurInvalide:
+        return JsonResponse({'erreur': 'Curseur invalide'}, status=400)
+
+    donnees['duree_ms'] = round((time.perf_counter() - debut) * 1000, 1)
+    return JsonResponse(donnees)
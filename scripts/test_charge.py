@@ -0,0 +1,146 @@
+"""
+Test de charge comparatif : serveur WSGI (gunicorn) et ASGI (uvicorn).
+
+Lancer les deux serveurs, directement (sans nginx, qui met en tampon les
+envois lents) et sans limitation de débit (LIMITATION_DEBIT_ACTIVE=False) :
+
+    gunicorn --workers 3 --threads 4 --bind 127.0.0.1:8000 e_cms.wsgi:application
+    gunicorn -k uvicorn.workers.UvicornWorker --workers 3 --bind 127.0.0.1:8001 e_cms.asgi:application
+
+puis :
+
+    python scripts/test_charge.py --url http://127.0.0.1:8000 --url http://127.0.0.1:8001 \
+        [--concurrence 10 50 100] [--duree 15] [--lents 20] [--chemin /services/api/creneaux/?...]
+
+Pour chaque serveur et chaque niveau de concurrence, C clients enchaînent
+des GET sur les chemins (par défaut l'API des créneaux et le suivi d'une
+demande) pendant --duree secondes. Pendant ce temps, --lents clients
+envoient un lot de formulaires (/api/soumissions/) octet par octet, comme
+un citoyen sur réseau mobile : en WSGI chacun occupe un thread de worker
+jusqu'à la fin de l'envoi, en ASGI le corps est lu sans thread.
+Le rapport donne le débit, les latences p50/p95 et les erreurs.
+
+Aucune dépendance : bibliothèque standard seulement.
+"""
+import argparse
+import http.client
+import socket
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+
+LENDEMAIN = (date.today() + timedelta(days=1)).isoformat()
+CHEMINS = [
+    f'/services/api/creneaux/?type_rdv=1&date={LENDEMAIN}',
+    f'/etat-civil/suivi/{uuid.uuid4()}/',
+]
+# Vue sans jeton CSRF qui lit tout le corps de la requête
+CHEMIN_LENT = '/api/soumissions/'
+# Taille de l'envoi lent et débit (octets par seconde)
+TAILLE_LENTE = 64 * 1024
+DEBIT_LENT = 2048
+
+
+def client(hote, port, chemins, fin, latences, erreurs):
+    """Enchaîne les GET jusqu'à `fin` sur une connexion persistante."""
+    connexion = http.client.HTTPConnection(hote, port, timeout=30)
+    i = 0
+    while time.monotonic() < fin:
+        chemin = chemins[i % len(chemins)]
+        i += 1
+        debut = time.perf_counter()
+        try:
+            connexion.request('GET', chemin)
+            reponse = connexion.getresponse()
+            reponse.read()
+            # 429 : limitation de débit encore active sur le serveur
+            if reponse.status >= 500 or reponse.status == 429:
+                erreurs.append(reponse.status)
+            else:
+                latences.append((time.perf_counter() - debut) * 1000)
+        except (OSError, http.client.HTTPException) as exc:
+            erreurs.append(type(exc).__name__)
+            connexion.close()
+            connexion = http.client.HTTPConnection(hote, port, timeout=30)
+    connexion.close()
+
+
+def client_lent(hote, port, fin):
+    """Envoie un POST de TAILLE_LENTE octets à DEBIT_LENT octets/s jusqu'à `fin`."""
+    while time.monotonic() < fin:
+        try:
+            with socket.create_connection((hote, port), timeout=30) as sock:
+                sock.sendall((
+                    f'POST {CHEMIN_LENT} HTTP/1.1\r\nHost: {hote}\r\n'
+                    f'Content-Type: application/json\r\n'
+                    f'Content-Length: {TAILLE_LENTE}\r\nConnection: close\r\n\r\n'
+                ).encode())
+                envoye = 0
+                while envoye < TAILLE_LENTE and time.monotonic() < fin:
+                    morceau = min(DEBIT_LENT // 10, TAILLE_LENTE - envoye)
+                    sock.sendall(b'x' * morceau)
+                    envoye += morceau
+                    time.sleep(0.1)
+                if envoye == TAILLE_LENTE:
+                    sock.recv(1024)
+        except OSError:
+            time.sleep(0.1)
+
+
+def mesurer(url, concurrence, duree, lents, chemins):
+    parties = urlsplit(url)
+    hote, port = parties.hostname, parties.port or 80
+    fin = time.monotonic() + duree
+    latences, erreurs = [], []
+
+    fils_lents = [
+        threading.Thread(target=client_lent, args=(hote, port, fin), daemon=True)
+        for _ in range(lents)
+    ]
+    for fil in fils_lents:
+        fil.start()
+    # Laisse les envois lents occuper le serveur avant de mesurer
+    time.sleep(1)
+
+    debut = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrence) as clients:
+        for _ in range(concurrence):
+            clients.submit(client, hote, port, chemins, fin, latences, erreurs)
+    total = time.monotonic() - debut
+    for fil in fils_lents:
+        fil.join()
+
+    if len(latences) > 1:
+        p50 = statistics.median(latences)
+        p95 = statistics.quantiles(latences, n=20)[-1]
+    else:
+        p50 = p95 = float('nan')
+    return len(latences) / total, p50, p95, len(erreurs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge comparatif WSGI / ASGI")
+    parser.add_argument('--url', action='append', required=True, help="Serveur à mesurer (répétable)")
+    parser.add_argument('--concurrence', type=int, nargs='+', default=[10, 50, 100],
+                        help="Clients simultanés")
+    parser.add_argument('--duree', type=int, default=15, help="Durée de chaque mesure (s)")
+    parser.add_argument('--lents', type=int, default=20, help="Clients lents simultanés")
+    parser.add_argument('--chemin', action='append', dest='chemins', help="Chemin GET (répétable)")
+    options = parser.parse_args()
+
+    print(f"{'Serveur':<28}{'Clients':>8}{'Req/s':>10}{'p50 (ms)':>10}{'p95 (ms)':>10}{'Erreurs':>9}"
+          f"  ({options.lents} clients lents)")
+    for url in options.url:
+        for concurrence in options.concurrence:
+            debit, p50, p95, erreurs = mesurer(
+                url, concurrence, options.duree, options.lents, options.chemins or CHEMINS,
+            )
+            print(f'{url:<28}{concurrence:>8}{debit:>10.1f}{p50:>10.1f}{p95:>10.1f}{erreurs:>9}')
+
+
+if __name__ == '__main__':
+    main()
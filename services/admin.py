@@ -1,8 +1,10 @@
 from django.contrib import admin
 from .models import (
     TypeRendezVous, CreneauDisponible, RendezVous,
-    CategorieReclamation, Reclamation, InscriptionNewsletter
+    CategorieReclamation, Reclamation, InscriptionNewsletter,
+    CampagneNewsletter, EnvoiNewsletter
 )
+from .taches import campagne_en_file, envoyer_campagne
 
 
 @admin.register(TypeRendezVous)
@@ -43,3 +45,37 @@ class InscriptionNewsletterAdmin(admin.ModelAdmin):
     list_display = ['email', 'nom', 'prenom', 'actif', 'date_inscription']
     list_filter = ['actif']
     search_fields = ['email', 'nom', 'prenom']
+
+
+@admin.register(CampagneNewsletter)
+class CampagneNewsletterAdmin(admin.ModelAdmin):
+    list_display = ['sujet', 'statut', 'nb_envoyes', 'nb_echecs', 'date_creation', 'date_fin']
+    list_filter = ['statut']
+    search_fields = ['sujet']
+    readonly_fields = ['statut', 'nb_envoyes', 'nb_echecs', 'dernier_inscrit_id', 'date_debut', 'date_fin']
+    actions = ['lancer_envoi', 'suspendre_envoi']
+
+    @admin.action(description="Lancer ou reprendre l'envoi")
+    def lancer_envoi(self, request, queryset):
+        campagnes = list(queryset.exclude(statut__in=['en_cours', 'terminee']))
+        for campagne in campagnes:
+            campagne.statut = 'en_cours'
+            campagne.save(update_fields=['statut'])
+            # Suspendue puis reprise avant la fin de son lot : la chaîne de lots continue
+            if not campagne_en_file(campagne.pk):
+                envoyer_campagne.differer(campagne.pk)
+        self.message_user(request, f"{len(campagnes)} campagne(s) mise(s) en file d'envoi.")
+
+    @admin.action(description="Suspendre l'envoi")
+    def suspendre_envoi(self, request, queryset):
+        nombre = queryset.filter(statut='en_cours').update(statut='suspendue')
+        self.message_user(request, f"{nombre} campagne(s) suspendue(s) après le lot en cours.")
+
+
+@admin.register(EnvoiNewsletter)
+class EnvoiNewsletterAdmin(admin.ModelAdmin):
+    list_display = ['campagne', 'inscription', 'statut', 'date_envoi']
+    list_filter = ['statut', 'campagne']
+    search_fields = ['inscription__email']
+    list_select_related = ['campagne', 'inscription']
+    raw_id_fields = ['inscription']
@@ -0,0 +1,113 @@
+"""
+API REST des services en ligne, pour les agents et les systèmes partenaires.
+
+/api/services/ :
+- rendez-vous/ : rendez-vous, identifiés par leur numéro (filtres `statut`,
+  `date`) ;
+- reclamations/ : réclamations, identifiées par leur numéro (filtres
+  `statut`, `priorite`) ;
+- creneaux/ : créneaux d'ouverture par type de rendez-vous.
+
+Listes paginées par curseur ; `lot/` crée (POST) ou modifie (PATCH)
+jusqu'à API_LOT_MAX objets par appel, types de rendez-vous et catégories
+compris résolus en une requête par lot. Le nom du type ou de la catégorie
+est lu par jointure (select_related), pas par objet.
+"""
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils.dateparse import parse_date
+from rest_framework import mixins, permissions, serializers, viewsets
+from rest_framework.exceptions import ValidationError
+from rest_framework.routers import SimpleRouter
+
+from core.api import LotMixin, ModeleSerializer, PaginationCurseur
+
+from .models import CreneauDisponible, Reclamation, RendezVous
+
+
+class GestionServices(permissions.BasePermission):
+    """Agents et administrateurs de la mairie."""
+
+    def has_permission(self, request, view):
+        user = request.user
+        return user.is_authenticated and (user.is_admin() or user.is_agent())
+
+
+class RendezVousSerializer(ModeleSerializer):
+    type_rdv_nom = serializers.CharField(source='type_rdv.nom', read_only=True)
+
+    class Meta:
+        model = RendezVous
+        fields = '__all__'
+        read_only_fields = ['numero', 'citoyen', 'date_creation']
+
+
+class ReclamationSerializer(ModeleSerializer):
+    categorie_nom = serializers.CharField(source='categorie.nom', read_only=True, default=None)
+
+    class Meta:
+        model = Reclamation
+        exclude = ['photo_largeur', 'photo_hauteur']
+        read_only_fields = ['numero', 'auteur', 'agent_traitant', 'photo', 'date_creation']
+
+
+class CreneauDisponibleSerializer(ModeleSerializer):
+    class Meta:
+        model = CreneauDisponible
+        fields = '__all__'
+
+
+class ServiceViewSet(LotMixin,
+                     mixins.CreateModelMixin,
+                     mixins.ListModelMixin,
+                     mixins.RetrieveModelMixin,
+                     mixins.UpdateModelMixin,
+                     viewsets.GenericViewSet):
+    permission_classes = [GestionServices]
+    pagination_class = PaginationCurseur
+    # Paramètres de requête filtrant la liste par égalité
+    filtres = []
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        for nom in self.filtres:
+            valeur = self.request.query_params.get(nom)
+            if valeur:
+                try:
+                    queryset = queryset.filter(**{nom: valeur})
+                except (DjangoValidationError, ValueError):
+                    raise ValidationError({nom: ["Valeur invalide."]})
+        return queryset
+
+
+class RendezVousViewSet(ServiceViewSet):
+    queryset = RendezVous.objects.select_related('type_rdv')
+    serializer_class = RendezVousSerializer
+    lookup_field = 'numero'
+    filtres = ['statut']
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        date = parse_date(self.request.query_params.get('date') or '')
+        if date:
+            queryset = queryset.filter(date=date)
+        return queryset
+
+
+class ReclamationViewSet(ServiceViewSet):
+    queryset = Reclamation.objects.select_related('categorie')
+    serializer_class = ReclamationSerializer
+    lookup_field = 'numero'
+    filtres = ['statut', 'priorite']
+
+
+class CreneauDisponibleViewSet(mixins.DestroyModelMixin, ServiceViewSet):
+    queryset = CreneauDisponible.objects.all()
+    serializer_class = CreneauDisponibleSerializer
+    lookup_field = 'id'
+    filtres = ['type_rdv', 'jour']
+
+
+router = SimpleRouter()
+router.register('rendez-vous', RendezVousViewSet)
+router.register('reclamations', ReclamationViewSet)
+router.register('creneaux', CreneauDisponibleViewSet)
@@ -0,0 +1,28 @@
+# Generated by Django 5.1 on 2026-10-19 18:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reclamation',
+            name='photo_hauteur',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='reclamation',
+            name='photo_largeur',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='reclamation',
+            name='photo',
+            field=models.ImageField(blank=True, height_field='photo_hauteur', null=True, upload_to='reclamations/', width_field='photo_largeur'),
+        ),
+    ]
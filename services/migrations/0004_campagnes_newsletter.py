@@ -0,0 +1,51 @@
+# Generated by Django 5.1 on 2026-10-19 18:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0003_dimensions_images'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CampagneNewsletter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sujet', models.CharField(max_length=200)),
+                ('contenu_texte', models.TextField(help_text='Version texte ; variables : $prenom, $nom, $email')),
+                ('contenu_html', models.TextField(blank=True, help_text='Version HTML facultative (mêmes variables)')),
+                ('statut', models.CharField(choices=[('brouillon', 'Brouillon'), ('en_cours', 'Envoi en cours'), ('suspendue', 'Suspendue'), ('terminee', 'Terminée')], default='brouillon', max_length=20)),
+                ('dernier_inscrit_id', models.PositiveBigIntegerField(default=0, editable=False)),
+                ('nb_envoyes', models.PositiveIntegerField(default=0, editable=False)),
+                ('nb_echecs', models.PositiveIntegerField(default=0, editable=False)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('date_debut', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('date_fin', models.DateTimeField(blank=True, editable=False, null=True)),
+            ],
+            options={
+                'verbose_name': 'Campagne newsletter',
+                'verbose_name_plural': 'Campagnes newsletter',
+                'ordering': ['-date_creation'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EnvoiNewsletter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('statut', models.CharField(choices=[('envoye', 'Envoyé'), ('echec', 'Échec')], max_length=10)),
+                ('erreur', models.CharField(blank=True, max_length=255)),
+                ('date_envoi', models.DateTimeField(auto_now_add=True)),
+                ('campagne', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='envois', to='services.campagnenewsletter')),
+                ('inscription', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='envois', to='services.inscriptionnewsletter')),
+            ],
+            options={
+                'verbose_name': 'Envoi newsletter',
+                'verbose_name_plural': 'Envois newsletter',
+                'constraints': [models.UniqueConstraint(fields=('campagne', 'inscription'), name='envoi_newsletter_unique')],
+            },
+        ),
+    ]
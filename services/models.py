@@ -132,7 +132,12 @@ class Reclamation(models.Model):
     titre = models.CharField(max_length=200)
     description = models.TextField()
     localisation = models.CharField(max_length=300, blank=True, help_text="Adresse ou quartier concerné")
-    photo = models.ImageField(upload_to='reclamations/', blank=True, null=True)
+    photo = models.ImageField(
+        upload_to='reclamations/', blank=True, null=True,
+        width_field='photo_largeur', height_field='photo_hauteur'
+    )
+    photo_largeur = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    photo_hauteur = models.PositiveIntegerField(null=True, blank=True, editable=False)
     
     statut = models.CharField(max_length=20, choices=STATUT_CHOICES, default='soumise')
     priorite = models.CharField(max_length=20, choices=PRIORITE_CHOICES, default='normale')
@@ -195,3 +200,64 @@ class InscriptionNewsletter(models.Model):
     
     def __str__(self):
         return self.email
+
+
+class CampagneNewsletter(models.Model):
+    """
+    Campagne d'envoi de la newsletter.
+    Le sujet et le contenu acceptent les variables $prenom, $nom et $email.
+    """
+
+    STATUT_CHOICES = [
+        ('brouillon', 'Brouillon'),
+        ('en_cours', 'Envoi en cours'),
+        ('suspendue', 'Suspendue'),
+        ('terminee', 'Terminée'),
+    ]
+
+    sujet = models.CharField(max_length=200)
+    contenu_texte = models.TextField(help_text="Version texte ; variables : $prenom, $nom, $email")
+    contenu_html = models.TextField(blank=True, help_text="Version HTML facultative (mêmes variables)")
+
+    statut = models.CharField(max_length=20, choices=STATUT_CHOICES, default='brouillon')
+    # Point de reprise : plus grand pk d'inscription déjà traité
+    dernier_inscrit_id = models.PositiveBigIntegerField(default=0, editable=False)
+    nb_envoyes = models.PositiveIntegerField(default=0, editable=False)
+    nb_echecs = models.PositiveIntegerField(default=0, editable=False)
+
+    date_creation = models.DateTimeField(auto_now_add=True)
+    date_debut = models.DateTimeField(null=True, blank=True, editable=False)
+    date_fin = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        verbose_name = "Campagne newsletter"
+        verbose_name_plural = "Campagnes newsletter"
+        ordering = ['-date_creation']
+
+    def __str__(self):
+        return self.sujet
+
+
+class EnvoiNewsletter(models.Model):
+    """État de remise d'une campagne à un abonné."""
+
+    STATUT_CHOICES = [
+        ('envoye', 'Envoyé'),
+        ('echec', 'Échec'),
+    ]
+
+    campagne = models.ForeignKey(CampagneNewsletter, on_delete=models.CASCADE, related_name='envois')
+    inscription = models.ForeignKey(InscriptionNewsletter, on_delete=models.CASCADE, related_name='envois')
+    statut = models.CharField(max_length=10, choices=STATUT_CHOICES)
+    erreur = models.CharField(max_length=255, blank=True)
+    date_envoi = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Envoi newsletter"
+        verbose_name_plural = "Envois newsletter"
+        constraints = [
+            models.UniqueConstraint(fields=['campagne', 'inscription'], name='envoi_newsletter_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.campagne} → {self.inscription}"
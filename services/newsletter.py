@@ -0,0 +1,195 @@
+"""
+Envoi des campagnes de newsletter par lots.
+
+Le message est rendu une fois par lot (gabarit HTML compris) puis
+personnalisé par simple substitution ($prenom, $nom, $email, $desinscription). Les
+abonnés sont parcourus par ordre de pk ; chaque lot partage une connexion
+SMTP et son résultat est enregistré d'un bloc avec le point de reprise.
+
+Les messages sont espacés d'au moins 1 / DEBIT_MAX seconde, y compris d'un
+lot au suivant : le relais SMTP impose ce débit sur de courtes durées et
+refuserait des rafales. Chaque lot est une tâche
+(services.taches.envoyer_campagne) qui met le lot suivant en file. Elle
+dure le temps d'un lot (TAILLE_LOT / DEBIT_MAX secondes), bien moins que
+le délai au-delà duquel traiter_taches remet en file une tâche restée en
+cours. Une campagne interrompue repart du dernier lot enregistré.
+
+Chaque message porte un lien de désinscription signé (vue
+services:newsletter_desinscription) et l'en-tête List-Unsubscribe.
+"""
+import logging
+import time
+from string import Template
+
+from django.conf import settings
+from django.core import signing
+from django.core.mail import EmailMultiAlternatives
+from django.db import transaction
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import escape
+from wagtail.models import Site
+
+from taches.backends import backend_reel
+
+from .models import CampagneNewsletter, EnvoiNewsletter, InscriptionNewsletter
+
+logger = logging.getLogger(__name__)
+
+TAILLE_LOT = getattr(settings, 'NEWSLETTER_TAILLE_LOT', 200)
+# Messages par seconde (0 : pas de limite)
+DEBIT_MAX = getattr(settings, 'NEWSLETTER_DEBIT_MAX', 10)
+
+SEL_DESINSCRIPTION = 'services.newsletter.desinscription'
+
+
+def jeton_desinscription(inscription):
+    return signing.dumps(inscription.pk, salt=SEL_DESINSCRIPTION)
+
+
+def inscription_pour_jeton(jeton):
+    """Inscription désignée par un jeton de désinscription, ou None."""
+    try:
+        pk = signing.loads(jeton, salt=SEL_DESINSCRIPTION)
+    except signing.BadSignature:
+        return None
+    return InscriptionNewsletter.objects.filter(pk=pk).first()
+
+
+def _racine():
+    """URL du site de la mairie courante (liens des messages)."""
+    site = Site.objects.filter(is_default_site=True).first() or Site.objects.first()
+    return site.root_url if site else settings.WAGTAILADMIN_BASE_URL.rstrip('/')
+
+
+class GabaritCampagne:
+    """Sujet, texte et HTML d'une campagne, rendus une fois pour toutes."""
+
+    def __init__(self, campagne):
+        self.racine = _racine()
+        self.sujet = Template(campagne.sujet)
+        self.texte = Template(campagne.contenu_texte + "\n\n--\nSe désinscrire : $desinscription\n")
+        self.html = None
+        if campagne.contenu_html:
+            self.html = Template(render_to_string('services/email/newsletter.html', {
+                'campagne': campagne,
+                'contenu': campagne.contenu_html,
+            }))
+
+    def message(self, inscription, connection):
+        desinscription = self.racine + reverse(
+            'services:newsletter_desinscription', args=[jeton_desinscription(inscription)],
+        )
+        valeurs = {
+            'prenom': inscription.prenom,
+            'nom': inscription.nom,
+            'email': inscription.email,
+            'desinscription': desinscription,
+        }
+        message = EmailMultiAlternatives(
+            subject=self.sujet.safe_substitute(valeurs),
+            body=self.texte.safe_substitute(valeurs),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[inscription.email],
+            headers={
+                'Precedence': 'bulk',
+                # Désinscription en un clic depuis le client de messagerie (RFC 8058)
+                'List-Unsubscribe': f'<{desinscription}>',
+                'List-Unsubscribe-Post': 'List-Unsubscribe=One-Click',
+            },
+            connection=connection,
+        )
+        if self.html is not None:
+            html = self.html.safe_substitute({k: escape(v) for k, v in valeurs.items()})
+            message.attach_alternative(html, 'text/html')
+        return message
+
+
+def abonnes_restants(campagne):
+    """Abonnés actifs pas encore traités, dans l'ordre du point de reprise."""
+    return (
+        InscriptionNewsletter.objects
+        .filter(actif=True, pk__gt=campagne.dernier_inscrit_id)
+        .only('pk', 'email', 'nom', 'prenom')
+        .order_by('pk')
+    )
+
+
+def envoyer_lot(gabarit, campagne, lot, debit_max=DEBIT_MAX):
+    """Envoie un lot sur une seule connexion, au débit `debit_max` ; renvoie les EnvoiNewsletter."""
+    envois = []
+    prochain = time.monotonic()
+    with backend_reel() as connection:
+        for inscription in lot:
+            try:
+                message = gabarit.message(inscription, connection)
+                if debit_max:
+                    time.sleep(max(prochain - time.monotonic(), 0))
+                    prochain = time.monotonic() + 1 / debit_max
+                message.send()
+            except Exception as exc:
+                logger.warning("Newsletter %s : échec pour %s (%s)", campagne.pk, inscription.email, exc)
+                envois.append(EnvoiNewsletter(
+                    campagne=campagne, inscription=inscription,
+                    statut='echec', erreur=str(exc)[:255],
+                ))
+            else:
+                envois.append(EnvoiNewsletter(campagne=campagne, inscription=inscription, statut='envoye'))
+    return envois
+
+
+def enregistrer_lot(campagne, envois):
+    """
+    Enregistre les envois et avance le point de reprise dans une transaction.
+    Les compteurs ne comptent que les envois pas encore enregistrés (lot repris).
+    """
+    with transaction.atomic():
+        # Verrou sur la campagne : deux reprises du même lot ne comptent qu'une fois
+        CampagneNewsletter.objects.select_for_update().only('pk').get(pk=campagne.pk)
+        deja = set(
+            EnvoiNewsletter.objects
+            .filter(campagne=campagne, inscription__in=[envoi.inscription for envoi in envois])
+            .values_list('inscription_id', flat=True)
+        )
+        nouveaux = [envoi for envoi in envois if envoi.inscription.pk not in deja]
+        nb_echecs = sum(1 for envoi in nouveaux if envoi.statut == 'echec')
+        EnvoiNewsletter.objects.bulk_create(nouveaux, ignore_conflicts=True)
+        CampagneNewsletter.objects.filter(pk=campagne.pk).update(
+            dernier_inscrit_id=envois[-1].inscription.pk,
+            nb_envoyes=F('nb_envoyes') + len(nouveaux) - nb_echecs,
+            nb_echecs=F('nb_echecs') + nb_echecs,
+        )
+    campagne.dernier_inscrit_id = envois[-1].inscription.pk
+
+
+def envoyer_lot_suivant(campagne, taille_lot=TAILLE_LOT, debit_max=DEBIT_MAX):
+    """
+    Envoie le lot suivant d'une campagne « en cours ». Renvoie le délai en
+    secondes avant le lot d'après, ou None si la campagne est terminée ou
+    n'est plus en cours (suspendue depuis l'admin).
+    """
+    if campagne.statut != 'en_cours':
+        return None
+
+    if campagne.date_debut is None:
+        CampagneNewsletter.objects.filter(pk=campagne.pk).update(date_debut=timezone.now())
+    lot = list(abonnes_restants(campagne)[:taille_lot])
+    if not lot:
+        CampagneNewsletter.objects.filter(pk=campagne.pk).update(statut='terminee', date_fin=timezone.now())
+        return None
+
+    envois = envoyer_lot(GabaritCampagne(campagne), campagne, lot, debit_max)
+    fin = time.monotonic()
+    enregistrer_lot(campagne, envois)
+
+    statut = CampagneNewsletter.objects.values_list('statut', flat=True).get(pk=campagne.pk)
+    if statut == 'suspendue':
+        logger.info("Newsletter %s suspendue après l'abonné %s", campagne.pk, campagne.dernier_inscrit_id)
+        return None
+
+    # Le premier message du lot suivant garde l'espacement
+    if not debit_max:
+        return 0
+    return max(fin + 1 / debit_max - time.monotonic(), 0)
@@ -0,0 +1,77 @@
+"""
+Tâches en arrière-plan des services en ligne.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.utils import timezone
+
+from taches.models import Tache
+from taches.registre import tache
+
+from .models import CampagneNewsletter, RendezVous, Reclamation
+
+
+@tache(nom='services.confirmer_rendez_vous', priorite=Tache.PRIORITE_HAUTE)
+def confirmer_rendez_vous(pk):
+    """Confirmation de rendez-vous (email ; SMS à venir sur rdv.telephone)."""
+    rdv = RendezVous.objects.select_related('type_rdv').filter(pk=pk).first()
+    if rdv is None or not rdv.email:
+        return
+
+    send_mail(
+        subject=f"Confirmation de rendez-vous - {rdv.type_rdv}",
+        message=(
+            f"Bonjour {rdv.prenom} {rdv.nom},\n\n"
+            f"Votre rendez-vous « {rdv.type_rdv} » est confirmé le "
+            f"{rdv.date:%d/%m/%Y} à {rdv.heure:%H:%M}.\n"
+            f"Numéro : {rdv.numero}\n"
+        ),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=[rdv.email],
+    )
+
+
+@tache(nom='services.accuser_reception_reclamation')
+def accuser_reception_reclamation(pk):
+    """Accusé de réception d'une réclamation."""
+    reclamation = Reclamation.objects.filter(pk=pk).first()
+    if reclamation is None or not reclamation.email:
+        return
+
+    send_mail(
+        subject=f"Réclamation enregistrée - {reclamation.titre}",
+        message=(
+            f"Bonjour {reclamation.prenom} {reclamation.nom},\n\n"
+            f"Votre réclamation « {reclamation.titre} » a bien été enregistrée.\n"
+            f"Numéro de suivi : {reclamation.numero}\n"
+        ),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=[reclamation.email],
+    )
+
+
+@tache(nom='services.envoyer_campagne', priorite=Tache.PRIORITE_BASSE, max_tentatives=10)
+def envoyer_campagne(pk):
+    """
+    Envoi d'un lot d'une campagne, puis mise en file du lot suivant ; un
+    nouvel essai reprend au dernier lot enregistré.
+    """
+    from .newsletter import envoyer_lot_suivant
+
+    campagne = CampagneNewsletter.objects.filter(pk=pk).first()
+    if campagne is None:
+        return
+    attente = envoyer_lot_suivant(campagne)
+    if attente is not None:
+        envoyer_campagne.differer(pk, executer_apres=timezone.now() + timedelta(seconds=attente))
+
+
+def campagne_en_file(pk):
+    """Vrai si un lot de la campagne attend ou est en cours d'envoi."""
+    return Tache.objects.filter(
+        nom=envoyer_campagne.nom_tache,
+        arguments__args=[pk],
+        statut__in=[Tache.EN_ATTENTE, Tache.EN_COURS],
+    ).exists()
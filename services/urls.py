@@ -21,4 +21,6 @@ urlpatterns = [
     
     # Newsletter
     path('newsletter/', views.inscription_newsletter_view, name='newsletter'),
+    path('newsletter/desinscription/<str:jeton>/', views.desinscription_newsletter_view,
+         name='newsletter_desinscription'),
 ]
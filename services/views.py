@@ -4,13 +4,18 @@ Vues pour les services en ligne.
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.views.generic import ListView, CreateView, DetailView, TemplateView
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.db.models import Count
+from asgiref.sync import sync_to_async
 from datetime import datetime, timedelta
 from .models import (
     TypeRendezVous, CreneauDisponible, RendezVous,
     CategorieReclamation, Reclamation, InscriptionNewsletter
 )
 from .forms import RendezVousForm, ReclamationForm, NewsletterForm
+from .newsletter import inscription_pour_jeton
+from .taches import confirmer_rendez_vous, accuser_reception_reclamation
 
 
 class AccueilServicesView(TemplateView):
@@ -40,6 +45,7 @@ class PrendreRendezVousView(CreateView):
         if self.request.user.is_authenticated:
             rdv.citoyen = self.request.user
         rdv.save()
+        confirmer_rendez_vous.differer(rdv.pk)
         messages.success(
             self.request,
             f"Votre rendez-vous a été confirmé. Numéro : {rdv.numero}"
@@ -53,8 +59,8 @@ def confirmation_rdv_view(request, numero):
     return render(request, 'services/confirmation_rdv.html', {'rdv': rdv})
 
 
-def creneaux_disponibles_api(request):
-    """API pour récupérer les créneaux disponibles."""
+async def creneaux_disponibles_api(request):
+    """API pour récupérer les créneaux disponibles (vue asynchrone, ORM async)."""
     type_rdv_id = request.GET.get('type_rdv')
     date_str = request.GET.get('date')
     
@@ -65,21 +71,26 @@ def creneaux_disponibles_api(request):
         date = datetime.strptime(date_str, '%Y-%m-%d').date()
         jour_semaine = date.weekday()
         
-        creneaux = CreneauDisponible.objects.filter(
-            type_rdv_id=type_rdv_id,
-            jour=jour_semaine
-        )
+        creneaux = [
+            creneau async for creneau in CreneauDisponible.objects.filter(
+                type_rdv_id=type_rdv_id,
+                jour=jour_semaine
+            )
+        ]
         
-        # Vérifier les places disponibles
-        creneaux_dispo = []
-        for creneau in creneaux:
-            rdv_existants = RendezVous.objects.filter(
+        # Rendez-vous confirmés de la journée par heure, en une requête
+        reserves = {
+            heure: nombre async for heure, nombre in RendezVous.objects.filter(
                 type_rdv_id=type_rdv_id,
                 date=date,
-                heure=creneau.heure_debut,
+                heure__in=[creneau.heure_debut for creneau in creneaux],
                 statut='confirme'
-            ).count()
-            
+            ).values('heure').annotate(nombre=Count('pk')).values_list('heure', 'nombre')
+        }
+        
+        creneaux_dispo = []
+        for creneau in creneaux:
+            rdv_existants = reserves.get(creneau.heure_debut, 0)
             if rdv_existants < creneau.places_max:
                 creneaux_dispo.append({
                     'heure': creneau.heure_debut.strftime('%H:%M'),
@@ -108,6 +119,7 @@ class SoumettreReclamationView(CreateView):
         if self.request.user.is_authenticated:
             reclamation.auteur = self.request.user
         reclamation.save()
+        accuser_reception_reclamation.differer(reclamation.pk)
         messages.success(
             self.request,
             f"Votre réclamation a été enregistrée. Numéro de suivi : {reclamation.numero}"
@@ -115,14 +127,13 @@ class SoumettreReclamationView(CreateView):
         return redirect('services:suivi_reclamation', numero=reclamation.numero)
 
 
-def suivi_reclamation_view(request, numero=None):
-    """Suivi d'une réclamation."""
+async def suivi_reclamation_view(request, numero=None):
+    """Suivi d'une réclamation (vue asynchrone, ORM async)."""
     reclamation = None
     
     if numero:
-        try:
-            reclamation = Reclamation.objects.get(numero=numero)
-        except Reclamation.DoesNotExist:
+        reclamation = await Reclamation.objects.select_related('categorie').filter(numero=numero).afirst()
+        if reclamation is None:
             messages.error(request, "Réclamation non trouvée.")
     
     elif request.method == 'POST':
@@ -130,7 +141,8 @@ def suivi_reclamation_view(request, numero=None):
         if numero_input:
             return redirect('services:suivi_reclamation', numero=numero_input)
     
-    return render(request, 'services/suivi_reclamation.html', {
+    # Le gabarit de base lit l'utilisateur et la session : rendu dans un thread
+    return await sync_to_async(render)(request, 'services/suivi_reclamation.html', {
         'reclamation': reclamation,
         'numero': numero
     })
@@ -150,6 +162,29 @@ def inscription_newsletter_view(request):
     return render(request, 'services/newsletter.html', {'form': form})
 
 
+@csrf_exempt
+def desinscription_newsletter_view(request, jeton):
+    """
+    Désinscription depuis le lien d'une campagne (jeton signé, voir
+    services.newsletter). GET demande confirmation ; POST désinscrit, y
+    compris en un clic depuis le client de messagerie (List-Unsubscribe-Post).
+    """
+    inscription = inscription_pour_jeton(jeton)
+    if inscription is None:
+        raise Http404("Lien de désinscription invalide.")
+
+    if request.method == 'POST':
+        if inscription.actif:
+            inscription.actif = False
+            inscription.save(update_fields=['actif'])
+        return render(request, 'services/newsletter_desinscription.html', {
+            'inscription': inscription,
+            'desinscrit': True,
+        })
+
+    return render(request, 'services/newsletter_desinscription.html', {'inscription': inscription})
+
+
 class MesRendezVousView(ListView):
     """Liste des rendez-vous de l'utilisateur connecté."""
     model = RendezVous
@@ -0,0 +1 @@
+# Taches app - File de tâches en arrière-plan (sans broker externe)
@@ -0,0 +1,20 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Tache
+
+
+@admin.register(Tache)
+class TacheAdmin(admin.ModelAdmin):
+    list_display = ['nom', 'statut', 'priorite', 'schema_name', 'tentatives', 'executer_apres', 'date_fin']
+    list_filter = ['statut', 'priorite', 'schema_name', 'nom']
+    search_fields = ['nom', 'derniere_erreur']
+    readonly_fields = ['date_creation', 'date_debut', 'date_fin', 'worker', 'derniere_erreur']
+    actions = ['relancer']
+
+    @admin.action(description="Relancer les tâches sélectionnées")
+    def relancer(self, request, queryset):
+        nombre = queryset.exclude(statut=Tache.EN_COURS).update(
+            statut=Tache.EN_ATTENTE, tentatives=0, executer_apres=timezone.now(), date_fin=None,
+        )
+        self.message_user(request, f"{nombre} tâche(s) remise(s) en file.")
@@ -0,0 +1,81 @@
+"""
+Backend d'email qui passe par la file de tâches.
+
+    EMAIL_BACKEND = 'taches.backends.EmailBackend'
+    TACHES_EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+
+Tous les envois (formulaires de contact Wagtail, notifications de
+modération, confirmations) sont mis en file au lieu de bloquer la requête ;
+le worker les remet ensuite au backend réel TACHES_EMAIL_BACKEND.
+"""
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .registre import en_cours_d_execution
+
+
+def backend_reel(**kwargs):
+    """Connexion au backend d'envoi effectif."""
+    return get_connection(
+        getattr(settings, 'TACHES_EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend'),
+        **kwargs
+    )
+
+
+def serialiser_message(message):
+    """Représentation JSON d'un EmailMessage (sans pièces jointes binaires)."""
+    return {
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': list(message.to),
+        'cc': list(message.cc),
+        'bcc': list(message.bcc),
+        'reply_to': list(message.reply_to),
+        'headers': dict(message.extra_headers),
+        'alternatives': [list(alt) for alt in getattr(message, 'alternatives', [])],
+        'content_subtype': message.content_subtype,
+    }
+
+
+def deserialiser_message(donnees, connection=None):
+    message = EmailMultiAlternatives(
+        subject=donnees['subject'],
+        body=donnees['body'],
+        from_email=donnees['from_email'],
+        to=donnees['to'],
+        cc=donnees['cc'],
+        bcc=donnees['bcc'],
+        reply_to=donnees['reply_to'],
+        headers=donnees['headers'],
+        alternatives=[tuple(alt) for alt in donnees['alternatives']],
+        connection=connection,
+    )
+    message.content_subtype = donnees.get('content_subtype', 'plain')
+    return message
+
+
+class EmailBackend(BaseEmailBackend):
+    """Met chaque message en file ; envoi direct depuis le worker."""
+
+    def send_messages(self, email_messages):
+        if not email_messages:
+            return 0
+
+        if en_cours_d_execution():
+            # Déjà dans une tâche : pas de seconde mise en file
+            with backend_reel(fail_silently=self.fail_silently) as connection:
+                return connection.send_messages(email_messages)
+
+        from .taches import envoyer_email
+
+        envoyes = 0
+        for message in email_messages:
+            if message.attachments:
+                # Pièces jointes non sérialisables en JSON : envoi immédiat
+                envoyes += backend_reel(fail_silently=self.fail_silently).send_messages([message])
+                continue
+            envoyer_email.differer(serialiser_message(message))
+            envoyes += 1
+        return envoyes
@@ -0,0 +1,3 @@
+"""
+Management package for taches app.
+"""
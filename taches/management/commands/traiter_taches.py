@@ -0,0 +1,66 @@
+"""Django management command running the background task worker.
+
+Usage:
+  python manage.py traiter_taches [--une-fois] [--intervalle=2] [--lot=10]
+
+The worker claims ready tasks by priority, runs each one in the schema of
+the mairie that queued it and retries failures with exponential backoff.
+Several workers can run side by side: a task is only claimed once.
+"""
+import os
+import signal
+import socket
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from taches.models import Tache
+from taches.registre import executer
+
+
+class Command(BaseCommand):
+    help = 'Run the database-backed background task worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--une-fois', action='store_true',
+                            help='Process ready tasks then exit')
+        parser.add_argument('--intervalle', type=float, default=2.0,
+                            help='Seconds to wait when the queue is empty')
+        parser.add_argument('--lot', type=int, default=10,
+                            help='Number of candidates examined per claim')
+        parser.add_argument('--delai-blocage', type=int, default=15,
+                            help='Minutes after which a running task is considered stuck')
+
+    def handle(self, *args, **options):
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        self.arret = False
+        signal.signal(signal.SIGTERM, self._arreter)
+        signal.signal(signal.SIGINT, self._arreter)
+
+        liberees = Tache.objects.liberer_bloquees(timedelta(minutes=options['delai_blocage']))
+        if liberees:
+            self.stdout.write(self.style.WARNING(f'{liberees} tâche(s) bloquée(s) remise(s) en attente'))
+
+        traitees = 0
+        while not self.arret:
+            close_old_connections()
+            tache = Tache.objects.reserver(worker, lot=options['lot'])
+            if tache is None:
+                if options['une_fois']:
+                    break
+                time.sleep(options['intervalle'])
+                continue
+
+            if executer(tache):
+                self.stdout.write(f'✓ {tache.nom} #{tache.pk}')
+            else:
+                self.stdout.write(self.style.ERROR(f'✗ {tache.nom} #{tache.pk} ({tache.get_statut_display()})'))
+            traitees += 1
+
+        self.stdout.write(self.style.SUCCESS(f'{traitees} tâche(s) traitée(s)'))
+
+    def _arreter(self, signum, frame):
+        # Termine la tâche en cours avant de quitter
+        self.arret = True
@@ -0,0 +1,40 @@
+# Generated by Django 5.1 on 2026-10-19 18:52
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom', models.CharField(max_length=200, verbose_name='Tâche')),
+                ('arguments', models.JSONField(blank=True, default=dict)),
+                ('schema_name', models.CharField(default='public', max_length=63, verbose_name='Schéma de la mairie')),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('terminee', 'Terminée'), ('echouee', 'Échouée')], default='en_attente', max_length=20)),
+                ('priorite', models.SmallIntegerField(choices=[(0, 'Basse'), (5, 'Normale'), (10, 'Haute')], default=5)),
+                ('tentatives', models.PositiveIntegerField(default=0)),
+                ('max_tentatives', models.PositiveIntegerField(default=3)),
+                ('derniere_erreur', models.TextField(blank=True)),
+                ('worker', models.CharField(blank=True, max_length=100)),
+                ('executer_apres', models.DateTimeField(default=django.utils.timezone.now)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('date_debut', models.DateTimeField(blank=True, null=True)),
+                ('date_fin', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Tâche',
+                'verbose_name_plural': 'Tâches',
+                'ordering': ['-date_creation'],
+                'indexes': [models.Index(fields=['statut', '-priorite', 'executer_apres'], name='tache_file_idx')],
+            },
+        ),
+    ]
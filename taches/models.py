@@ -0,0 +1,104 @@
+"""
+File de tâches persistée en base de données.
+
+Chaque tâche mémorise le schéma de la mairie qui l'a créée : avec
+django-tenants, l'application doit figurer dans SHARED_APPS pour qu'un seul
+worker serve toutes les mairies.
+"""
+from datetime import timedelta
+
+from django.db import models
+from django.db.models import F
+from django.utils import timezone
+
+
+class TacheQuerySet(models.QuerySet):
+
+    def pretes(self):
+        """Tâches en attente dont l'heure d'exécution est passée."""
+        return self.filter(statut=Tache.EN_ATTENTE, executer_apres__lte=timezone.now())
+
+    def reserver(self, worker, lot=10):
+        """
+        Réserve la tâche prête la plus prioritaire pour `worker`.
+        La réservation est un UPDATE conditionnel : deux workers ne peuvent
+        pas obtenir la même tâche, sans verrou ni broker externe.
+        """
+        candidats = self.pretes().order_by('-priorite', 'executer_apres', 'pk')
+        for pk in candidats.values_list('pk', flat=True)[:lot]:
+            reservee = self.filter(pk=pk, statut=Tache.EN_ATTENTE).update(
+                statut=Tache.EN_COURS,
+                worker=worker,
+                date_debut=timezone.now(),
+                tentatives=F('tentatives') + 1,
+            )
+            if reservee:
+                return self.get(pk=pk)
+        return None
+
+    def liberer_bloquees(self, delai):
+        """Remet en attente les tâches restées en cours (worker arrêté brutalement)."""
+        return self.filter(
+            statut=Tache.EN_COURS,
+            date_debut__lt=timezone.now() - delai,
+        ).update(statut=Tache.EN_ATTENTE, worker='')
+
+
+class Tache(models.Model):
+    """Tâche différée exécutée par la commande `traiter_taches`."""
+
+    EN_ATTENTE = 'en_attente'
+    EN_COURS = 'en_cours'
+    TERMINEE = 'terminee'
+    ECHOUEE = 'echouee'
+
+    STATUT_CHOICES = [
+        (EN_ATTENTE, 'En attente'),
+        (EN_COURS, 'En cours'),
+        (TERMINEE, 'Terminée'),
+        (ECHOUEE, 'Échouée'),
+    ]
+
+    PRIORITE_BASSE = 0
+    PRIORITE_NORMALE = 5
+    PRIORITE_HAUTE = 10
+
+    PRIORITE_CHOICES = [
+        (PRIORITE_BASSE, 'Basse'),
+        (PRIORITE_NORMALE, 'Normale'),
+        (PRIORITE_HAUTE, 'Haute'),
+    ]
+
+    nom = models.CharField(max_length=200, verbose_name="Tâche")
+    arguments = models.JSONField(default=dict, blank=True)
+    schema_name = models.CharField(max_length=63, default='public', verbose_name="Schéma de la mairie")
+
+    statut = models.CharField(max_length=20, choices=STATUT_CHOICES, default=EN_ATTENTE)
+    priorite = models.SmallIntegerField(choices=PRIORITE_CHOICES, default=PRIORITE_NORMALE)
+
+    tentatives = models.PositiveIntegerField(default=0)
+    max_tentatives = models.PositiveIntegerField(default=3)
+    derniere_erreur = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+
+    executer_apres = models.DateTimeField(default=timezone.now)
+    date_creation = models.DateTimeField(auto_now_add=True)
+    date_debut = models.DateTimeField(null=True, blank=True)
+    date_fin = models.DateTimeField(null=True, blank=True)
+
+    objects = TacheQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Tâche"
+        verbose_name_plural = "Tâches"
+        ordering = ['-date_creation']
+        indexes = [
+            models.Index(fields=['statut', '-priorite', 'executer_apres'], name='tache_file_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.nom} ({self.get_statut_display()})"
+
+    def delai_avant_nouvel_essai(self):
+        """Backoff exponentiel : 30 s, 1 min, 2 min, 4 min..."""
+        return timedelta(seconds=30 * 2 ** max(self.tentatives - 1, 0))
@@ -0,0 +1,96 @@
+"""
+Déclaration, mise en file et exécution des tâches.
+
+    from taches.registre import tache
+
+    @tache(priorite=Tache.PRIORITE_HAUTE)
+    def confirmer_demande(label, pk):
+        ...
+
+    confirmer_demande.differer('etat_civil.ActeNaissance', acte.pk)
+
+Les arguments doivent être sérialisables en JSON. La tâche est créée dans
+la transaction courante : le worker ne la voit qu'après le commit.
+"""
+import logging
+import threading
+import traceback
+
+from django.utils import timezone
+
+from core.tenants import schema_context, schema_courant
+
+from .models import Tache
+
+logger = logging.getLogger(__name__)
+
+REGISTRE = {}
+
+_execution = threading.local()
+
+
+def tache(nom=None, priorite=Tache.PRIORITE_NORMALE, max_tentatives=3):
+    """Enregistre une fonction comme tâche différable."""
+    def decorateur(fonction):
+        nom_tache = nom or f"{fonction.__module__}.{fonction.__name__}"
+        REGISTRE[nom_tache] = fonction
+
+        def differer(*args, **kwargs):
+            return mettre_en_file(
+                nom_tache, *args,
+                priorite=priorite, max_tentatives=max_tentatives,
+                **kwargs
+            )
+
+        fonction.nom_tache = nom_tache
+        fonction.differer = differer
+        return fonction
+    return decorateur
+
+
+def mettre_en_file(nom, *args, priorite=Tache.PRIORITE_NORMALE, max_tentatives=3,
+                   executer_apres=None, **kwargs):
+    """Crée la tâche `nom` pour le schéma de la mairie courante."""
+    if nom not in REGISTRE:
+        raise KeyError(f"Tâche inconnue : {nom}")
+    return Tache.objects.create(
+        nom=nom,
+        arguments={'args': list(args), 'kwargs': kwargs},
+        schema_name=schema_courant(),
+        priorite=priorite,
+        max_tentatives=max_tentatives,
+        executer_apres=executer_apres or timezone.now(),
+    )
+
+
+def en_cours_d_execution():
+    """Vrai dans le thread d'un worker pendant l'exécution d'une tâche."""
+    return getattr(_execution, 'active', False)
+
+
+def executer(tache_obj):
+    """Exécute une tâche réservée et enregistre son résultat."""
+    fonction = REGISTRE.get(tache_obj.nom)
+    try:
+        if fonction is None:
+            raise KeyError(f"Tâche inconnue : {tache_obj.nom}")
+        _execution.active = True
+        with schema_context(tache_obj.schema_name):
+            fonction(*tache_obj.arguments.get('args', []), **tache_obj.arguments.get('kwargs', {}))
+    except Exception:
+        tache_obj.derniere_erreur = traceback.format_exc()
+        if tache_obj.tentatives < tache_obj.max_tentatives:
+            tache_obj.statut = Tache.EN_ATTENTE
+            tache_obj.executer_apres = timezone.now() + tache_obj.delai_avant_nouvel_essai()
+        else:
+            tache_obj.statut = Tache.ECHOUEE
+            tache_obj.date_fin = timezone.now()
+        logger.exception("Échec de la tâche %s (essai %s)", tache_obj.nom, tache_obj.tentatives)
+    else:
+        tache_obj.statut = Tache.TERMINEE
+        tache_obj.date_fin = timezone.now()
+    finally:
+        _execution.active = False
+
+    tache_obj.save(update_fields=['statut', 'derniere_erreur', 'executer_apres', 'date_fin'])
+    return tache_obj.statut == Tache.TERMINEE
@@ -0,0 +1,13 @@
+"""
+Tâches de l'application taches.
+"""
+from .backends import backend_reel, deserialiser_message
+from .models import Tache
+from .registre import tache
+
+
+@tache(nom='taches.envoyer_email', priorite=Tache.PRIORITE_HAUTE, max_tentatives=5)
+def envoyer_email(donnees):
+    """Remet un message au backend réel ; une erreur SMTP déclenche un nouvel essai."""
+    with backend_reel() as connection:
+        deserialiser_message(donnees, connection=connection).send()
@@ -0,0 +1,122 @@
+/*
+ * Service worker : formulaires citoyens hors ligne (voir core.soumissions).
+ *
+ * Un formulaire envoyé sans réseau est gardé sur l'appareil (IndexedDB)
+ * avec une clé générée ici, puis envoyé avec les autres à l'API des
+ * soumissions au retour du réseau (Background Sync, ou message 'envoyer'
+ * de la page). Un envoi interrompu est refait avec les mêmes clés : le
+ * serveur ne crée pas deux fois la même demande.
+ */
+const FORMULAIRES = {{ formulaires|safe }};
+const API = '{% url "api_soumissions" %}';
+const LOT_MAX = {{ lot_max }};
+const CACHE = 'formulaires-v1';
+const BASE = 'e-cms-hors-ligne';
+const FILE = 'soumissions';
+
+const PAGE_EN_FILE = `<!DOCTYPE html>
+<html lang="fr"><head><meta charset="UTF-8"><meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>Demande enregistrée sur cet appareil</title></head>
+<body style="font-family: sans-serif; max-width: 40rem; margin: 4rem auto; padding: 0 1rem;">
+<h1>Demande enregistrée sur cet appareil</h1>
+<p>Le réseau n'est pas disponible. Votre demande sera envoyée automatiquement
+dès le retour de la connexion ; son numéro de suivi s'affichera alors sur le site.</p>
+<p>Les pièces jointes éventuelles n'ont pas été conservées.</p>
+<p><a href="/">Retour à l'accueil</a></p>
+</body></html>`;
+
+self.addEventListener('install', () => self.skipWaiting());
+self.addEventListener('activate', event => event.waitUntil(self.clients.claim()));
+
+function ouvrirBase() {
+    return new Promise((resolve, reject) => {
+        const requete = indexedDB.open(BASE, 1);
+        requete.onupgradeneeded = () => requete.result.createObjectStore(FILE, {keyPath: 'cle'});
+        requete.onsuccess = () => resolve(requete.result);
+        requete.onerror = () => reject(requete.error);
+    });
+}
+
+async function dansFile(mode, action) {
+    const base = await ouvrirBase();
+    return new Promise((resolve, reject) => {
+        const transaction = base.transaction(FILE, mode);
+        const requete = action(transaction.objectStore(FILE));
+        transaction.oncomplete = () => resolve(requete && requete.result);
+        transaction.onerror = () => reject(transaction.error);
+    });
+}
+
+async function mettreEnFile(request, formulaire) {
+    const donnees = {};
+    let csrf = '';
+    for (const [nom, valeur] of (await request.formData()).entries()) {
+        if (nom === 'csrfmiddlewaretoken') {
+            csrf = valeur;
+        } else if (typeof valeur === 'string') {
+            donnees[nom] = valeur;
+        }
+    }
+    await dansFile('readwrite', file => file.put({cle: crypto.randomUUID(), formulaire, donnees, csrf}));
+    if (self.registration.sync) {
+        await self.registration.sync.register('soumissions').catch(() => {});
+    }
+    return new Response(PAGE_EN_FILE, {headers: {'Content-Type': 'text/html; charset=utf-8'}});
+}
+
+async function envoyer() {
+    const elements = await dansFile('readonly', file => file.getAll());
+    for (let debut = 0; debut < elements.length; debut += LOT_MAX) {
+        const lot = elements.slice(debut, debut + LOT_MAX);
+        const reponse = await fetch(API, {
+            method: 'POST',
+            credentials: 'same-origin',
+            headers: {'Content-Type': 'application/json', 'X-CSRFToken': lot[lot.length - 1].csrf},
+            body: JSON.stringify(lot.map(({cle, formulaire, donnees}) => ({cle, formulaire, donnees}))),
+        });
+        if (!reponse.ok) {
+            // Les éléments restent en file : nouvel essai au prochain retour du réseau
+            throw new Error(`Soumissions refusées (${reponse.status})`);
+        }
+        const {resultats} = await reponse.json();
+        await dansFile('readwrite', file => resultats.forEach(resultat => resultat.cle && file.delete(resultat.cle)));
+        const pages = await self.clients.matchAll({type: 'window'});
+        pages.forEach(page => page.postMessage({type: 'soumissions', resultats}));
+    }
+}
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    const url = new URL(request.url);
+    const formulaire = url.origin === location.origin && FORMULAIRES[url.pathname];
+    if (!formulaire) {
+        return;
+    }
+    if (request.method === 'POST') {
+        const copie = request.clone();
+        event.respondWith(fetch(request).catch(() => mettreEnFile(copie, formulaire)));
+    } else if (request.method === 'GET' && request.mode === 'navigate') {
+        // Formulaire ouvrable hors ligne : réseau d'abord, sinon dernière version vue
+        event.respondWith(
+            fetch(request).then(reponse => {
+                if (reponse.ok) {
+                    const copie = reponse.clone();
+                    caches.open(CACHE).then(cache => cache.put(request, copie));
+                }
+                return reponse;
+            }).catch(() => caches.match(request).then(reponse => reponse || Response.error()))
+        );
+    }
+});
+
+self.addEventListener('sync', event => {
+    if (event.tag === 'soumissions') {
+        event.waitUntil(envoyer());
+    }
+});
+
+self.addEventListener('message', event => {
+    if (event.data === 'envoyer') {
+        event.waitUntil(envoyer().catch(() => {}));
+    }
+});
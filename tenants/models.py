@@ -23,7 +23,12 @@ class Mairie(TenantMixin):
     email = models.EmailField(blank=True)
     
     # Personnalisation visuelle
-    logo = models.ImageField(upload_to='logos/', blank=True, null=True)
+    logo = models.ImageField(
+        upload_to='logos/', blank=True, null=True,
+        width_field='logo_largeur', height_field='logo_hauteur'
+    )
+    logo_largeur = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    logo_hauteur = models.PositiveIntegerField(null=True, blank=True, editable=False)
     couleur_primaire = models.CharField(max_length=7, default='#1E40AF', verbose_name="Couleur primaire")
     couleur_secondaire = models.CharField(max_length=7, default='#059669', verbose_name="Couleur secondaire")
     
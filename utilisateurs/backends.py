@@ -0,0 +1,20 @@
+"""
+Backend d'authentification (AUTHENTICATION_BACKENDS).
+"""
+from django.contrib.auth.backends import ModelBackend
+
+from . import permissions
+
+
+class RolesBackend(ModelBackend):
+    """
+    ModelBackend dont l'utilisateur de la requête arrive avec ses
+    permissions compilées (voir utilisateurs.permissions). Les citoyens
+    n'ont pas accès à l'admin : leurs permissions restent lues à la demande.
+    """
+
+    def get_user(self, user_id):
+        user = super().get_user(user_id)
+        if user is not None and (user.role != 'citoyen' or user.is_superuser):
+            permissions.charger(user)
+        return user
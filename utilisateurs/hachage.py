@@ -0,0 +1,43 @@
+"""
+Hachage des mots de passe (PASSWORD_HASHERS).
+
+Argon2id (argon2-cffi) avec les paramètres ARGON2_TEMPS, ARGON2_MEMOIRE
+(Kio) et ARGON2_PARALLELISME, choisis avec benchmark_connexion. Un mot de
+passe haché par PBKDF2 ou avec d'anciens paramètres est re-haché à la
+connexion réussie suivante (check_password de Django). Sans argon2-cffi,
+PBKDF2 reste l'algorithme par défaut.
+
+Les calculs passent par un pool de HACHAGE_THREADS threads par processus.
+argon2 et PBKDF2 libèrent le GIL : les autres threads du worker (gunicorn
+--threads) continuent de servir pendant un hachage, et le pool borne le
+nombre de hachages simultanés lors d'un pic de connexions au lieu de
+partager le processeur entre tous.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher
+
+_executeur = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'HACHAGE_THREADS', 2),
+    thread_name_prefix='hachage',
+)
+
+
+class Argon2Hacheur(Argon2PasswordHasher):
+    # Recommandation OWASP : 19 Mio, 2 passes, 1 voie
+    time_cost = getattr(settings, 'ARGON2_TEMPS', 2)
+    memory_cost = getattr(settings, 'ARGON2_MEMOIRE', 19456)
+    parallelism = getattr(settings, 'ARGON2_PARALLELISME', 1)
+
+    def encode(self, password, salt):
+        return _executeur.submit(super().encode, password, salt).result()
+
+    def verify(self, password, encoded):
+        return _executeur.submit(super().verify, password, encoded).result()
+
+
+class PBKDF2Hacheur(PBKDF2PasswordHasher):
+    # verify() appelle encode()
+    def encode(self, password, salt, iterations=None):
+        return _executeur.submit(super().encode, password, salt, iterations).result()
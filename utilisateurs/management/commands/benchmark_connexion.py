@@ -0,0 +1,95 @@
+"""Mesure le débit de vérification des mots de passe selon le hacheur.
+
+Usage:
+  python manage.py benchmark_connexion [--connexions=60] [--concurrence=12]
+                                       [--argon2=T,M,P ...]
+
+Pour PBKDF2 (itérations de Django) et chaque jeu de paramètres Argon2id
+(T passes, M Kio de mémoire, P voies ; par défaut ceux recommandés par
+l'OWASP et ceux de la configuration), un mot de passe est haché puis
+vérifié :
+  - « latence » : une vérification seule
+  - « débit »   : N vérifications lancées par C threads, comme C
+    connexions simultanées sur un worker ; elles passent par le pool de
+    HACHAGE_THREADS threads (voir utilisateurs.hachage)
+Choisir les paramètres les plus coûteux dont le débit par worker, multiplié
+par le nombre de workers, couvre le pic de connexions attendu.
+"""
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from utilisateurs.hachage import Argon2Hacheur, PBKDF2Hacheur
+
+MOT_DE_PASSE = 'Mairie-Douala-2025!'
+
+# (passes, mémoire en Kio, voies)
+ARGON2_OWASP = [(1, 47104, 1), (2, 19456, 1), (3, 12288, 1), (4, 9216, 1)]
+
+
+def _parametres(valeur):
+    try:
+        temps, memoire, parallelisme = (int(partie) for partie in valeur.split(','))
+    except ValueError:
+        raise CommandError(f"Paramètres Argon2 invalides : {valeur} (attendu : T,M,P)")
+    return temps, memoire, parallelisme
+
+
+class Command(BaseCommand):
+    help = 'Benchmark password verification latency and throughput for PBKDF2 and Argon2 settings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connexions', type=int, default=60, help='Verifications per hasher')
+        parser.add_argument('--concurrence', type=int, default=12, help='Simultaneous logins')
+        parser.add_argument('--argon2', action='append', type=_parametres, dest='argon2',
+                            help='Argon2 parameters T,M,P (repeatable)')
+
+    def handle(self, *args, **options):
+        hacheurs = [(f'PBKDF2 {PBKDF2Hacheur.iterations} it.', PBKDF2Hacheur())]
+        if find_spec('argon2'):
+            configuration = (settings.ARGON2_TEMPS, settings.ARGON2_MEMOIRE, settings.ARGON2_PARALLELISME)
+            jeux = options['argon2'] or list(dict.fromkeys(ARGON2_OWASP + [configuration]))
+            for temps, memoire, parallelisme in jeux:
+                hacheur = Argon2Hacheur()
+                hacheur.time_cost, hacheur.memory_cost, hacheur.parallelism = temps, memoire, parallelisme
+                nom = f'Argon2id t={temps} m={memoire // 1024}M p={parallelisme}'
+                if (temps, memoire, parallelisme) == configuration:
+                    nom += ' *'
+                hacheurs.append((nom, hacheur))
+        else:
+            self.stdout.write(self.style.WARNING('argon2-cffi absent : PBKDF2 seulement'))
+
+        self.stdout.write(
+            f"{'Hacheur':<34}{'Latence (ms)':>14}{'Débit (/s)':>12}{'p95 (ms)':>10}"
+            f"  ({options['connexions']} connexions, {options['concurrence']} simultanées, "
+            f"{settings.HACHAGE_THREADS} threads de hachage)"
+        )
+        for nom, hacheur in hacheurs:
+            latence, debit, p95 = self.mesurer(hacheur, options['connexions'], options['concurrence'])
+            self.stdout.write(f'{nom:<34}{latence:>14.1f}{debit:>12.1f}{p95:>10.1f}')
+        self.stdout.write(self.style.SUCCESS('Benchmark terminé (* : configuration actuelle)'))
+
+    def mesurer(self, hacheur, connexions, concurrence):
+        """Latence seule (ms), vérifications par seconde et p95 (ms) sous charge."""
+        encode = hacheur.encode(MOT_DE_PASSE, hacheur.salt())
+
+        debut = time.perf_counter()
+        hacheur.verify(MOT_DE_PASSE, encode)
+        latence = (time.perf_counter() - debut) * 1000
+
+        def verifier(_):
+            debut = time.perf_counter()
+            if not hacheur.verify(MOT_DE_PASSE, encode):
+                raise CommandError('Vérification échouée')
+            return (time.perf_counter() - debut) * 1000
+
+        debut = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrence) as clients:
+            durees = list(clients.map(verifier, range(connexions)))
+        total = time.perf_counter() - debut
+        p95 = statistics.quantiles(durees, n=20)[-1] if len(durees) > 1 else durees[0]
+        return latence, connexions / total, p95
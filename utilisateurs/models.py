@@ -4,6 +4,8 @@ Modèles utilisateurs avec rôles granulaires.
 from django.db import models
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 
+from .permissions import capacites
+
 
 class UtilisateurManager(BaseUserManager):
     """Manager personnalisé pour les utilisateurs."""
@@ -70,16 +72,16 @@ class Utilisateur(AbstractUser):
         return f"{self.get_full_name()} ({self.get_role_display()})"
     
     def is_admin(self):
-        return self.role in ['super_admin', 'admin_mairie']
+        return 'admin' in capacites(self.role)
     
     def is_agent(self):
-        return self.role in ['agent_etat_civil', 'agent_urbanisme', 'agent_communication']
+        return 'agent' in capacites(self.role)
     
     def can_manage_etat_civil(self):
-        return self.role in ['super_admin', 'admin_mairie', 'agent_etat_civil']
+        return 'etat_civil' in capacites(self.role)
     
     def can_manage_contenu(self):
-        return self.role in ['super_admin', 'admin_mairie', 'agent_communication']
+        return 'contenu' in capacites(self.role)
     
     def can_manage_urbanisme(self):
-        return self.role in ['super_admin', 'admin_mairie', 'agent_urbanisme']
+        return 'urbanisme' in capacites(self.role)
@@ -0,0 +1,111 @@
+"""
+Permissions des utilisateurs : matrice des rôles et cache par utilisateur.
+
+MATRICE donne les capacités de chaque rôle ; Utilisateur.is_admin,
+is_agent et can_manage_* la consultent sans requête.
+
+Les permissions de l'admin (permissions Django des groupes et de
+l'utilisateur, permissions de pages et de collections Wagtail) coûtent
+quatre requêtes à chaque requête d'un agent. Elles sont compilées une fois
+puis gardées en cache pour la durée de la session ; le backend
+d'authentification (utilisateurs.backends) les pose sur l'utilisateur à
+son chargement, dans les attributs de cache que lisent Django
+(ModelBackend) et les politiques de permissions de Wagtail : l'arbre des
+pages de l'admin n'interroge plus les tables de groupes et de permissions.
+
+Toute modification de groupe, de permission ou d'appartenance à un groupe,
+et tout déplacement de page, change la version du cache de la mairie. Un
+changement de rôle, de statut actif ou superutilisateur change la clé de
+l'utilisateur.
+"""
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+DUREE = getattr(settings, 'PERMISSIONS_CACHE_DUREE', settings.SESSION_COOKIE_AGE)
+
+# Capacité : rôles qui la possèdent
+ROLES_PAR_CAPACITE = {
+    'admin': ['super_admin', 'admin_mairie'],
+    'agent': ['agent_etat_civil', 'agent_urbanisme', 'agent_communication'],
+    'etat_civil': ['super_admin', 'admin_mairie', 'agent_etat_civil'],
+    'contenu': ['super_admin', 'admin_mairie', 'agent_communication'],
+    'urbanisme': ['super_admin', 'admin_mairie', 'agent_urbanisme'],
+}
+
+# Rôle : capacités
+MATRICE = {
+    role: frozenset(capacite for capacite, roles in ROLES_PAR_CAPACITE.items() if role in roles)
+    for role in {role for roles in ROLES_PAR_CAPACITE.values() for role in roles}
+}
+
+# Attributs de cache lus par ModelBackend et par les politiques de Wagtail
+ATTRIBUTS = ['_user_perm_cache', '_group_perm_cache', '_perm_cache',
+             '_page_permission_cache', '_collection_permission_cache']
+
+
+def capacites(role):
+    return MATRICE.get(role, frozenset())
+
+
+def _cle_version():
+    return 'permissions:version'
+
+
+def _cle(user):
+    version = cache.get(_cle_version(), 0)
+    return f'permissions:{version}:{user.pk}:{user.role}:{user.is_active:d}{user.is_superuser:d}'
+
+
+def compiler(user):
+    """Permissions Django et Wagtail de `user`, lues en base."""
+    from django.contrib.auth.backends import ModelBackend
+    from wagtail.permissions import collection_permission_policy, page_permission_policy
+
+    ModelBackend().get_all_permissions(user)
+    return {
+        '_user_perm_cache': getattr(user, '_user_perm_cache', set()),
+        '_group_perm_cache': getattr(user, '_group_perm_cache', set()),
+        '_perm_cache': getattr(user, '_perm_cache', set()),
+        '_page_permission_cache': list(page_permission_policy.get_all_permissions_for_user(user)),
+        '_collection_permission_cache': list(collection_permission_policy.get_all_permissions_for_user(user)),
+    }
+
+
+def charger(user):
+    """Pose sur `user` ses permissions compilées, depuis le cache ou la base."""
+    cle = _cle(user)
+    permissions = cache.get(cle)
+    if permissions is None:
+        permissions = compiler(user)
+        cache.set(cle, permissions, DUREE)
+    for attribut in ATTRIBUTS:
+        setattr(user, attribut, permissions[attribut])
+
+
+def invalider(**kwargs):
+    cle = _cle_version()
+    try:
+        cache.incr(cle)
+    except ValueError:
+        cache.set(cle, 1, None)
+
+
+def _apres_changement_m2m(action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalider()
+
+
+def connecter_signaux():
+    from django.contrib.auth import get_user_model
+    from wagtail.models import Collection, GroupCollectionPermission, GroupPagePermission
+    from wagtail.signals import post_page_move
+
+    for model in (Group, GroupPagePermission, GroupCollectionPermission, Collection):
+        post_save.connect(invalider, sender=model)
+        post_delete.connect(invalider, sender=model)
+    Utilisateur = get_user_model()
+    for through in (Group.permissions.through, Utilisateur.groups.through, Utilisateur.user_permissions.through):
+        m2m_changed.connect(_apres_changement_m2m, sender=through)
+    post_page_move.connect(invalider)